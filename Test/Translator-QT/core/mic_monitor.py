@@ -31,7 +31,7 @@ class MicMonitorThread(QThread):
         self.translated_offset = 0
         self.translated_audio_lock = threading.Lock()
         self.buffer_lock = threading.Lock()
-        self.ws_client = WebSocketPCMClient(role="user")
+        self.ws_client = WebSocketPCMClient(role="user", channels=1)
         self.lang_combo = lang_combo
         self.translated_audio_manager = TranslatedAudioManager(sample_rate=48000)
 
@@ -83,10 +83,9 @@ class MicMonitorThread(QThread):
     def audio_callback(self, indata, frames, time_info, status):
         raw_mono = indata[:, 0].copy()
 
-        # 1. Gửi raw stereo lên server
-        raw_stereo = np.repeat(raw_mono[:, np.newaxis], 2, axis=1)
-        if self.ws_client.connected:
-            self.ws_client.send_pcm_chunk(raw_stereo.astype(np.int16).tobytes())
+        # 1. Gửi raw mono lên server
+        if self.ws_client.active:
+            self.ws_client.send_pcm_chunk(raw_mono.tobytes())
 
         # 2. Mic gain
         mic_level = SettingsManager().get("microphone_level", 100)
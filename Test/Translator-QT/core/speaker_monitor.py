@@ -188,7 +188,7 @@ class SpeakerMonitorThread(QThread):
                     print("[WARN] playback_queue full, dropping chunk.")
 
                 # Send to socket if enabled
-                if self.enable_translation and self.ws_client.connected:
+                if self.enable_translation and self.ws_client.active:
                     self.ws_client.send_pcm_chunk(raw)
 
         except Exception as e:
@@ -44,7 +44,8 @@ def wav_to_pcm_bytes(wav_path: str) -> bytes:
     return pcm_data.tobytes()
 
 class Widget(QWidget):
-    transcript_received = Signal(str, str, str) # role, text, color
+    transcript_received = Signal(str, str, str, str, str) # role, text, color, line key, unstable suffix
+    transcript_merged = Signal(list) # line keys folded into a later final
     def __init__(self, parent=None):
         super().__init__(parent)
         self.mic_thread = None
@@ -53,6 +54,9 @@ class Widget(QWidget):
         self.ui = Ui_Widget()
         self.setupUi()
         self.transcript_received.connect(self.display_transcript_line)
+        self.transcript_merged.connect(self.remove_transcript_lines)
+        # Lines that can still be updated in place (partial transcripts): "role:utterance_id" -> (block, time)
+        self.transcript_line_index = {}
         self.settings_manager = SettingsManager()
 
         # === Virtual Devices Keep Alive ===
@@ -240,6 +244,7 @@ class Widget(QWidget):
             print("No chat content to save.")
 
         self.ui.textChatBox.clear()
+        self.transcript_line_index = {}
 
     def add_sound_effect(self, target_label: QLabel):
         target_label.setStyleSheet("""
@@ -315,9 +320,16 @@ class Widget(QWidget):
 
     def handle_transcript(self, data):
         role = data.get("sender", "unknown").capitalize()
-        text = data.get("text", "").strip()
-        if not text:
+        merged = data.get("merged")
+        if merged:
+            self.transcript_merged.emit([f"{role}:{utterance_id}" for utterance_id in merged])
+        text = data.get("text", "")
+        if not text.strip():
             return
+        stable = data.get("stable", text)
+        unstable = text[len(stable):]
+        utterance_id = data.get("utterance_id")
+        key = f"{role}:{utterance_id}" if utterance_id is not None else ""
     
         role_colors = {
             "user": "#2e86de",
@@ -325,18 +337,59 @@ class Widget(QWidget):
         }
         color = role_colors.get(role.lower(), "#555555")
     
-        self.transcript_received.emit(role, text, color)
+        self.transcript_received.emit(role, stable.strip(), color, key, unstable)
 
-    def display_transcript_line(self, role: str, text: str, color: str):
+    def display_transcript_line(self, role: str, text: str, color: str, key: str = "", unstable: str = ""):
         text = escape(text)
-        timestamp = datetime.now().strftime('%H:%M:%S')
+        if key in self.transcript_line_index:
+            index, timestamp = self.transcript_line_index[key]
+        else:
+            index, timestamp = None, datetime.now().strftime('%H:%M:%S')
+
         html_line = (
             f'<span style="color:gray; font-size:small;">[{timestamp}]</span> '
             f'<span style="color:{color}; font-weight: bold;">{role}:</span> '
-            f'<span style="color:black;">{text}</span><br>'
+            f'<span style="color:black;">{text}</span>'
         )
-        self.ui.textChatBox.insertHtml(html_line)
+        if unstable:
+            html_line += f' <span style="color:gray; font-style:italic;">{escape(unstable.strip())}</span>'
+
+        # One block per line, so a partial transcript rewrites only its own block
+        document = self.ui.textChatBox.document()
+        if index is None:
+            cursor = QTextCursor(document)
+            cursor.movePosition(QTextCursor.End)
+            if not document.isEmpty():
+                cursor.insertBlock()
+            if key:
+                self.transcript_line_index[key] = (cursor.blockNumber(), timestamp)
+        else:
+            cursor = QTextCursor(document.findBlockByNumber(index))
+            cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+        cursor.insertHtml(html_line)
         self.ui.textChatBox.moveCursor(QTextCursor.End)
+
+    def remove_transcript_lines(self, keys):
+        document = self.ui.textChatBox.document()
+        for key in keys:
+            entry = self.transcript_line_index.pop(key, None)
+            if entry is None:
+                continue
+            index = entry[0]
+            block = document.findBlockByNumber(index)
+            # Take the block together with one separator so no empty line is left
+            if block.next().isValid():
+                start, end = block.position(), block.next().position()
+            else:
+                start, end = max(block.position() - 1, 0), block.position() + block.length() - 1
+            cursor = QTextCursor(document)
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+            for other, (number, timestamp) in self.transcript_line_index.items():
+                if number > index:
+                    self.transcript_line_index[other] = (number - 1, timestamp)
         
     def closeEvent(self, event):
         self.speaker_thread.stop()
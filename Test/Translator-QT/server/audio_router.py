@@ -1,20 +1,36 @@
 import webrtcvad  # type: ignore
 import numpy as np
+import atexit
 import os
 import time
-import threading
-import queue
 import json
-import struct
-import resampy  # type: ignore
+import itertools
+import wave
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, APIRouter
+from fastapi.responses import JSONResponse
 import asyncio
-from pydub import AudioSegment  # type: ignore
-from pydub.effects import low_pass_filter  # type: ignore
-import whisper
 from starlette.websockets import WebSocketState
 import base64
-# from modules.synthesizer import tts # Uncomment for deploy
+from modules.dsp import PolyphaseDecimator, EnergyGate, frame_energies
+from modules.frame_parser import FrameParser, FrameAccumulator
+from modules.inference_scheduler import InferenceScheduler
+from modules.inference_sidecar import SidecarClient
+from modules.model_registry import ModelRegistry, load_model_settings
+from modules.transcript_filter import TranscriptFilter
+from modules.protocol import (
+    PROTOCOL_V1, MSG_CONTROL, MSG_RESULT, MSG_PARTIAL, MSG_FINAL, CAP_BINARY_AUDIO, CAP_PARTIALS,
+    negotiate, negotiate_capabilities, hello_message, encode_result,
+)
+from modules.streaming import PartialTranscript
+from modules.endpointer import Endpointer, START, END, CUT
+from modules.workers import WorkerPool
+from modules.pipeline import Pipeline, Stage, SHED_POLICIES
+from modules.sessions import SessionRegistry
+from modules.text_to_speech import cache as tts_cache, synthesize
+from modules.metrics import (
+    INGRESS, DSP, ENDPOINT, SEND, IngressClock, render_histograms, render_values,
+)
+from modules.translate import memory as translation_memory
 # from modules.translator.core.orchestrator import Orchestrator as Translator  # Uncomment for deploy
 
 
@@ -26,231 +42,493 @@ WS_SAMPLE_RATE = 48000
 CHANNELS = 2
 BYTES_PER_SAMPLE = 2
 FRAME_DURATION = 20
-FRAME_BYTES = int(WS_SAMPLE_RATE * FRAME_DURATION / 1000) * CHANNELS * BYTES_PER_SAMPLE
+FRAME_SAMPLES = int(WS_SAMPLE_RATE * FRAME_DURATION / 1000)
+FRAME_BYTES = FRAME_SAMPLES * CHANNELS * BYTES_PER_SAMPLE
 PING_INTERVAL = 2
-BLOCKED_KEYWORDS = [
-    "Hãy subscribe cho kênh",
-    "Ghiền Mì Gõ",
-    "Cảm ơn các bạn.",
-    "Hẹn gặp lại ở video tiếp theo",
-    "Chào mừng quý vị đến với bộ phim",
-    "Chúc các bạn đừng quên đăng ký",
-    "ご視聴ありがとうございました",
-    "Cảm ơn các bạn đã xem video hấp dẫn",
-    "ご視聴ありがとうございました",
-]
-
-whisper_model = whisper.load_model("large").to("cuda")
+LOW_PASS_CUTOFF = 3000
+
+# Endpointing, counted in 20 ms frames of received audio rather than wall-clock time
+VAD_PRE_ROLL_MS = int(os.environ.get("VAD_PRE_ROLL_MS", 200))
+VAD_HANGOVER_MS = int(os.environ.get("VAD_HANGOVER_MS", 100))
+VAD_MIN_SPEECH_MS = int(os.environ.get("VAD_MIN_SPEECH_MS", 100))
+MAX_UTTERANCE_MS = int(os.environ.get("MAX_UTTERANCE_MS", 15000))
+FORCE_CUT_SEARCH_MS = int(os.environ.get("FORCE_CUT_SEARCH_MS", 1000))
+# Frames quieter than the role's noise floor + VAD_GATE_MARGIN_DB skip webrtcvad entirely
+VAD_ENERGY_GATE = os.environ.get("VAD_ENERGY_GATE", "1") == "1"
+VAD_GATE_MARGIN_DB = float(os.environ.get("VAD_GATE_MARGIN_DB", 6))
+VAD_GATE_MAX_DBFS = float(os.environ.get("VAD_GATE_MAX_DBFS", -46))  # never gate frames louder than this
+# Debug: keep the raw 48 kHz input of every utterance and write it here as WAV
+ARCHIVE_RAW_DIR = os.environ.get("ARCHIVE_RAW_DIR", "")
+
+# Per-frame DSP + VAD runs on this pool, off the event loop: thread or inline
+DSP_POOL_MODE = os.environ.get("DSP_POOL_MODE", "thread")
+DSP_WORKERS = int(os.environ.get("DSP_WORKERS", os.cpu_count() or 1))
+DSP_MAX_PENDING = int(os.environ.get("DSP_MAX_PENDING", 50))  # frame blocks per role
+# STT -> translate -> TTS stages of finished utterances, shared by all sessions.
+# STT workers wait on the batching scheduler, so keep them >= STT_MAX_BATCH_SIZE.
+STT_WORKERS = int(os.environ.get("STT_WORKERS", 16))
+TRANSLATE_WORKERS = int(os.environ.get("TRANSLATE_WORKERS", 4))
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", 4))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 64))  # per stage
+PIPELINE_MAX_PENDING = int(os.environ.get("PIPELINE_MAX_PENDING", 10))  # utterances per role
+# What to shed when a role has PIPELINE_MAX_PENDING utterances in flight:
+# drop_oldest, coalesce (merge into the previous queued utterance) or deadline
+# (drop_oldest, plus drop anything older than PIPELINE_MAX_AGE_MS before STT)
+PIPELINE_SHED_POLICY = os.environ.get("PIPELINE_SHED_POLICY", "deadline")
+PIPELINE_MAX_AGE_MS = int(os.environ.get("PIPELINE_MAX_AGE_MS", 10000))
+COALESCE_MAX_S = float(os.environ.get("COALESCE_MAX_S", 30))  # Whisper's window
+SEND_QUEUE_SIZE = int(os.environ.get("SEND_QUEUE_SIZE", 32))  # messages per connection, oldest dropped
+# Also export every live session's histograms on /metrics (one series per session and stage)
+METRICS_PER_SESSION = os.environ.get("METRICS_PER_SESSION", "0") == "1"
+
+# Blocked phrases and confidence thresholds (see modules/transcript_filter.py), reloaded on change
+TRANSCRIPT_FILTER_CONFIG = os.environ.get("TRANSCRIPT_FILTER_CONFIG", "config/transcript_filter.json")
+
+# STT runs in this process ("inprocess") or in an inference sidecar shared by
+# every web worker ("sidecar"; start it with `python -m modules.inference_sidecar`)
+STT_MODE = os.environ.get("STT_MODE", "inprocess")
+STT_SIDECAR_SOCKET = os.environ.get("STT_SIDECAR_SOCKET", "/tmp/translator-stt.sock")
+STT_SIDECAR_SLOTS = int(os.environ.get("STT_SIDECAR_SLOTS", 32))  # shared memory slots of 30 s each
+# STT model (in-process mode): backend, size, device, compute type and warm-up clip come from
+# MODEL_SETTINGS (JSON, {"stt": {...}}) overridden by STT_BACKEND, STT_MODEL,
+# STT_DEVICE, STT_COMPUTE_TYPE, STT_WARMUP_CLIP and STT_CPU_FALLBACK
+MODEL_SETTINGS_PATH = os.environ.get("MODEL_SETTINGS", "config/models.json")
+STT_LOAD_TIMEOUT_S = float(os.environ.get("STT_LOAD_TIMEOUT_S", 120))  # how long requests wait for the model
+STT_MAX_BATCH_SIZE = int(os.environ.get("STT_MAX_BATCH_SIZE", 8))
+STT_MAX_WAIT_MS = int(os.environ.get("STT_MAX_WAIT_MS", 50))
+# Streaming partial transcripts for clients with the "partials" capability; 0 disables
+STT_PARTIAL_INTERVAL_MS = int(os.environ.get("STT_PARTIAL_INTERVAL_MS", 0))
+STT_PARTIAL_WINDOW_S = float(os.environ.get("STT_PARTIAL_WINDOW_S", 15))
+
+# TTS_CACHE_MAX_MB and TTS_CACHE_DIR size the cache in modules/text_to_speech.py
+TTS_VOICE = os.environ.get("TTS_VOICE", "default")
+
+# TRANSLATION_MEMORY_* configure the memory in modules/translate.py
+
+if STT_MODE not in ("inprocess", "sidecar"):
+    raise ValueError("STT_MODE must be inprocess or sidecar")
+
+# Models load on a background thread; /ready reports when they can serve
+models = ModelRegistry()
+stt_model = None
+if STT_MODE == "sidecar":
+    # Same submit()/transcribe() as the scheduler; batching happens in the sidecar
+    scheduler = SidecarClient(STT_SIDECAR_SOCKET, STT_SIDECAR_SLOTS)
+    atexit.register(scheduler.close)  # unlink the shared memory arena
+else:
+    stt_model = models.register("stt", load_model_settings(MODEL_SETTINGS_PATH), STT_LOAD_TIMEOUT_S)
+    models.load()
+    # One scheduler shared by every AudioBuffer of every session
+    scheduler = InferenceScheduler(
+        stt_model,
+        max_batch_size=STT_MAX_BATCH_SIZE,
+        max_wait=STT_MAX_WAIT_MS / 1000,
+    )
+
+transcript_filter = TranscriptFilter(TRANSCRIPT_FILTER_CONFIG)
 
 #translator = Translator()  # Uncomment for deploy
 
+if PIPELINE_SHED_POLICY not in SHED_POLICIES:
+    raise ValueError(f"PIPELINE_SHED_POLICY must be one of {SHED_POLICIES}")
+
+dsp_pool = WorkerPool(DSP_WORKERS, DSP_POOL_MODE, name="dsp")
+sessions = SessionRegistry()
+
+# Roles a connection may carry, with their languages until the client sets them
+ROLE_LANGUAGES = {"user": ("vi", "ja"), "other": ("ja", "vi")}
+
+# Links a result's JSON metadata to its binary audio frame
+utterance_ids = itertools.count(1)
+
+
+def archive_utterance(raw_pcm: bytes, role: str, utterance_id: int, rate=WS_SAMPLE_RATE, channels=CHANNELS):
+    path = os.path.join(ARCHIVE_RAW_DIR, f"{role}_{utterance_id}.wav")
+    try:
+        os.makedirs(ARCHIVE_RAW_DIR, exist_ok=True)
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(BYTES_PER_SAMPLE)
+            wf.setframerate(rate)
+            wf.writeframes(raw_pcm)
+    except Exception as e:
+        print(f"[ARCHIVE ERROR] {path}: {e}")
+
 
 class AudioBuffer:
-    def __init__(self, role, vad, message_queue, loop):
+    def __init__(self, role, vad, message_queue, loop, session, partial_interval_ms=0):
         self.role = role
         self.vad = vad
         self.loop = loop
         self.message_queue = message_queue
-        self.frames = []
-        self.raw_frames = []
+        self.session = session
+        # Finished utterances go through the shared pipeline, delivered in order per role
+        self.utterance_lane = session.lane(
+            pipeline, "utterances", self.deliver, PIPELINE_MAX_PENDING,
+            PIPELINE_SHED_POLICY, PIPELINE_MAX_AGE_MS / 1000, merge_utterances,
+        )
+        self.endpointer = Endpointer(
+            FRAME_DURATION, VAD_PRE_ROLL_MS, VAD_HANGOVER_MS, VAD_MIN_SPEECH_MS,
+            MAX_UTTERANCE_MS, FORCE_CUT_SEARCH_MS, SAMPLE_RATE * FRAME_DURATION // 1000,
+        )
         self.speaking = False
-        self.last_voice_time = time.time()
         self.src_lang = "vi"
         self.tgt_lang = "jp"
-        self.queue = queue.Queue()
-        threading.Thread(target=self.audio_worker, daemon=True).start()
-
-    def add_frame(self, frame, raw_pcm):
-        int16_frame = (frame * 32768).clip(-32768, 32767).astype(np.int16)
-        pcm_bytes = int16_frame.tobytes()
+        # Uplink format of the frames being processed; set by to_mono_16k()
+        self.rate = WS_SAMPLE_RATE
+        self.channels = CHANNELS
+        self.decimator = None  # built on first use; a 16 kHz uplink never needs one
+        self.energy_gate = EnergyGate(
+            FRAME_DURATION, VAD_GATE_MARGIN_DB, max_dbfs=VAD_GATE_MAX_DBFS,
+        ) if VAD_ENERGY_GATE else None
+        self.utterance_id = None
+
+        # Streaming mode: re-decode the growing utterance every N frames
+        self.streaming = partial_interval_ms > 0
+        self.partial_interval_frames = partial_interval_ms // FRAME_DURATION
+        self.partial_window_samples = int(STT_PARTIAL_WINDOW_S * SAMPLE_RATE)
+        self.frames_since_partial = 0
+        self.partial_pending = False
+        self.partial = None
+        self.last_speech = 0.0
+        # Client send stamp of the block being processed, and of the last voiced one
+        self.block_timestamp = None
+        self.last_speech_timestamp = None
+
+    def to_mono_16k(self, frames, rate):
+        """int16 frames (n, samples, channels) at `rate` -> float32 (n, 320, 1) at SAMPLE_RATE."""
+        self.rate, self.channels = rate, frames.shape[2]
+        if rate == SAMPLE_RATE:
+            # Fast path: the client already low-passed, downmixed and resampled
+            mono = frames[..., 0] if self.channels == 1 else frames.mean(axis=2, dtype=np.float32)
+            return np.multiply(mono, 1 / 32768, dtype=np.float32).reshape(len(frames), -1, 1)
+        decimator = self.decimator
+        if decimator is None or decimator.in_rate != rate or decimator.channels != self.channels:
+            # Stateful low-pass + decimation over the whole block, per role
+            decimator = self.decimator = PolyphaseDecimator(rate, SAMPLE_RATE, self.channels, cutoff=LOW_PASS_CUTOFF)
+        return decimator.process(frames).reshape(len(frames), -1, 1)
+
+    def add_frame(self, frame, raw_pcm, energy, check_vad=True):
+        # Outside utterances, frames the energy gate marked as silent are
+        # non-speech without asking the VAD; inside one the VAD decides as before
+        is_speech = False
+        if check_vad or self.endpointer.speaking:
+            int16_frame = (frame * 32768).clip(-32768, 32767).astype(np.int16)
+            try:
+                is_speech = self.vad.is_speech(int16_frame.tobytes(), SAMPLE_RATE)
+            except Exception as e:
+                print(f"[VAD ERROR] ({self.role}):", e)
+                return
 
-        try:
-            is_speech = self.vad.is_speech(pcm_bytes, SAMPLE_RATE)
-        except Exception as e:
-            print(f"[VAD ERROR] ({self.role}):", e)
+        raw = raw_pcm.tobytes() if ARCHIVE_RAW_DIR else None
+        if is_speech:
+            self.last_speech = time.monotonic()
+            self.last_speech_timestamp = self.block_timestamp
+        for event, audio, raws in self.endpointer.push(frame, is_speech, energy, raw):
+            if event == START:
+                self.utterance_id = next(utterance_ids)
+                self.partial = PartialTranscript()
+                self.frames_since_partial = 0
+            elif event in (END, CUT):
+                self.session.metrics.observe(ENDPOINT, time.monotonic() - self.last_speech)
+                result = self.get_audio(audio, raws)
+                if result:
+                    self.utterance_lane.submit(Utterance(self, *result))
+        self.speaking = self.endpointer.speaking
+
+        if self.speaking and self.streaming:
+            self.frames_since_partial += 1
+            if self.frames_since_partial >= self.partial_interval_frames and not self.partial_pending:
+                self.request_partial()
+
+    def request_partial(self):
+        # Zero-copy: the arena is append-only while the utterance is open
+        audio = self.endpointer.arena.view()[-self.partial_window_samples:]
+        utterance_id = self.utterance_id
+        self.frames_since_partial = 0
+        self.partial_pending = True
+        future = scheduler.submit(audio, self.src_lang)
+        future.add_done_callback(lambda f: self.on_partial(utterance_id, f))
+
+    def on_partial(self, utterance_id, future):
+        self.partial_pending = False
+        # Drop hypotheses that arrive after the utterance has ended
+        if future.exception() or utterance_id != self.utterance_id or not self.speaking:
+            return
+        text = transcript_filter.apply(future.result(), count=False)
+        if not text:
             return
+        stable, unstable = self.partial.update(text)
+        self.push_message({
+            "type": MSG_PARTIAL,
+            "data": {
+                "role": self.role,
+                "utterance_id": utterance_id,
+                "stable": stable,
+                "unstable": unstable,
+            }
+        })
 
-        now = time.time()
-        if is_speech:
-            self.frames.append(frame.copy())
-            self.raw_frames.append(raw_pcm)
-            self.speaking = True
-            self.last_voice_time = now
-        elif self.speaking and now - self.last_voice_time < 0.1:
-            self.frames.append(frame.copy())
-            self.raw_frames.append(raw_pcm)
-        elif self.speaking and now - self.last_voice_time >= 0.1:
-            self.speaking = False
-            result = self.get_audio()
-            if result:
-                self.queue.put(result)
-
-    def get_audio(self):
-        if not self.frames or not self.raw_frames:
+    def push_message(self, package, audio_bytes=None):
+        self.loop.call_soon_threadsafe(self.enqueue_message, (package, audio_bytes))
+
+    def enqueue_message(self, message):
+        # Runs on the event loop. A client that can't keep up loses its oldest messages.
+        if self.message_queue.full():
+            self.message_queue.get_nowait()
+            self.session.count_shed("results", "drop_oldest")
+        self.message_queue.put_nowait((*message, time.monotonic()))
+
+    def get_audio(self, audio, raws):
+        if not len(audio):
             return None
-        audio = np.concatenate(self.frames, axis=0)
-        raw_pcm = b"".join(self.raw_frames)
-        self.frames = []
-        self.raw_frames = []
+        raw_pcm = b"".join(raws) if raws else None
         duration = len(audio) / SAMPLE_RATE
         energy = np.sqrt(np.mean(audio ** 2))
         #print(f"[DEBUG] Duration: {duration:.3f}s | Energy: {energy:.4f}")
         if duration < 0.1 or energy < 0.005:
             return None
-        return audio, raw_pcm
-
-    def audio_worker(self):
-        while True:
-            result = self.queue.get()
-            if result:
-                audio, raw_pcm = result
-                self.audio_process_pipeline(raw_pcm)
-            self.queue.task_done()
-
-    def audio_process_pipeline(self, raw_pcm):
-        samples = np.frombuffer(raw_pcm, dtype=np.int16).reshape(-1, CHANNELS)
-        mono = samples.mean(axis=1).astype(np.float32) / 32768.0
-        audio_16k = resampy.resample(mono, WS_SAMPLE_RATE, 16000)
-
-        if len(audio_16k) < 16000:
-            return
-
-        try:
-            # 1. Transribe audio -> text
-            result = whisper_model.transcribe(audio_16k, language=self.src_lang)
-            text = result['text'].strip()
-
-            if any(keyword.lower() in text.lower() for keyword in BLOCKED_KEYWORDS) or not text:
-                return
-
-            print(f"[WHISPER] Role: {self.role} | Language: {self.tgt_lang} | Text: {text}")
-
-            # DUMMY
-            with open("sample.wav", "rb") as f:
-                wav_bytes = f.read()
-
-            # ================   Uncomment for deploy ================
-            # 2. Translate text to self.tgt_lang -> output <translated text>
-            # texts_translated = translator.translate(texts=[text], src=self.src_lang, tgt=self.tgt_lang) 
-            # text_translated = ' '.join(texts_translated) 
-
-            # if self.tgt_lang == "ja":
-            #     audio_hex = tts.tts_japanese(text_translated) # TODO: translated_text
-            # else:
-            #     audio_hex = tts.tts_vietnamese(text_translated) # TODO: translated_text
-             # ================   Uncomment for deploy ================
-
-            # 3. TTS <translated text> -> output audio (WAV byte)
-            package = {
-                "type": "translate_with_audio",
-                "data": {
-                    "text": text, # -> replace <translated text>
-                    "role": self.role, # user or other
-                    "audio_bytes": wav_bytes.hex()
-                }
+        return audio, raw_pcm, self.utterance_id
+
+    def deliver(self, utterance):
+        # 3. TTS <translated text> -> output audio (WAV byte)
+        package = {
+            "type": MSG_RESULT,
+            "data": {
+                "text": utterance.translated, # <translated text>
+                "role": self.role, # user or other
+                "utterance_id": utterance.utterance_id,
             }
-            
-            # Push message to main loop's queue
-            print(f"[QUEUE PUSH] Role: {self.role} | Pushing message: {text}")
-            self.loop.call_soon_threadsafe(self.message_queue.put_nowait, package)
+        }
+        if utterance.speech_end_timestamp is not None:
+            # Client's own send stamp of the utterance's last voiced audio, for end-to-end latency
+            package["data"]["speech_end_ts"] = utterance.speech_end_timestamp
 
-        except Exception as e:
-            print(f"[ERROR] Whisper failed: {e}")
+        # Push message to main loop's queue; audio is encoded per client capabilities
+        print(f"[QUEUE PUSH] Role: {self.role} | Pushing message: {utterance.translated}")
+        self.push_message(package, utterance.wav_bytes)
 
 
-def process_audio_frame(frame_bytes: bytes, role: str, buffer_user: AudioBuffer, buffer_other: AudioBuffer):
-    samples = np.frombuffer(frame_bytes, dtype=np.int16).reshape(-1, CHANNELS)
-    audio_segment = AudioSegment(
-        samples.tobytes(),
-        frame_rate=WS_SAMPLE_RATE,
-        sample_width=2,
-        channels=CHANNELS
+class Utterance:
+    __slots__ = (
+        "buffer", "utterance_id", "audio", "raw_pcm", "src_lang", "tgt_lang",
+        "text", "translated", "wav_bytes", "speech_end_timestamp", "merged_ids",
     )
-    filtered_segment = low_pass_filter(audio_segment, cutoff=3000)
-    filtered_samples = np.frombuffer(filtered_segment.raw_data, dtype=np.int16).reshape(-1, CHANNELS)
-    float_samples = filtered_samples.astype(np.float32) / 32768.0
-    mono = float_samples.mean(axis=1)
-    resampled = resampy.resample(mono, WS_SAMPLE_RATE, SAMPLE_RATE)
-    frame_reshaped = resampled.reshape(-1, 1).astype(np.float32)
-    raw_pcm = filtered_samples.astype(np.int16).tobytes()
-
-    if role == "user":
-        buffer_user.add_frame(frame_reshaped, raw_pcm)
-    elif role == "other":
-        buffer_other.add_frame(frame_reshaped, raw_pcm)
 
-
-async def process_audio_stream(websocket: WebSocket, buffer_user: AudioBuffer, buffer_other: AudioBuffer):
-    frame_accum_user = b""
-    frame_accum_other = b""
-    recv_buffer = b""
+    def __init__(self, buffer, audio, raw_pcm, utterance_id):
+        self.buffer = buffer
+        self.utterance_id = utterance_id
+        self.audio = audio
+        self.raw_pcm = raw_pcm
+        self.src_lang = buffer.src_lang
+        self.tgt_lang = buffer.tgt_lang
+        self.speech_end_timestamp = buffer.last_speech_timestamp
+        self.merged_ids = []  # later utterances coalesced into this one
+        self.text = None
+        self.translated = None
+        self.wav_bytes = None
+
+
+def merge_utterances(older: Utterance, newer: Utterance):
+    """Coalesce two queued utterances of one role into one STT request, if they fit."""
+    if (older.src_lang, older.tgt_lang) != (newer.src_lang, newer.tgt_lang):
+        return None
+    if len(older.audio) + len(newer.audio) > COALESCE_MAX_S * SAMPLE_RATE:
+        return None
+    older.audio = np.concatenate((older.audio, newer.audio))
+    if older.raw_pcm and newer.raw_pcm:
+        older.raw_pcm += newer.raw_pcm
+    # The merged result ends where the newer one does; its id is retired with the final
+    if newer.speech_end_timestamp is not None:
+        older.speech_end_timestamp = newer.speech_end_timestamp
+    older.merged_ids += [newer.utterance_id, *newer.merged_ids]
+    return older
+
+
+def stt_stage(utterance: Utterance):
+    buffer = utterance.buffer
+    if utterance.raw_pcm:
+        archive_utterance(utterance.raw_pcm, buffer.role, utterance.utterance_id, buffer.rate, buffer.channels)
+    if len(utterance.audio) < 16000:
+        return None
+
+    # 1. Transribe audio -> text
+    result = scheduler.transcribe(utterance.audio, utterance.src_lang)
+    # Hallucinated and low-confidence segments stop here, before translate and TTS
+    text = transcript_filter.apply(result)
+    if not text:
+        return None
+
+    print(f"[WHISPER] Role: {buffer.role} | Language: {utterance.tgt_lang} | Text: {text}")
+
+    if buffer.streaming:
+        final = {"role": buffer.role, "utterance_id": utterance.utterance_id, "text": text}
+        if utterance.merged_ids:
+            # Their partial lines are replaced by this one
+            final["merged"] = utterance.merged_ids
+        buffer.push_message({"type": MSG_FINAL, "data": final})
+    utterance.text = text
+    return utterance
+
+
+def translate_stage(utterance: Utterance):
+    # DUMMY backend (text unchanged), behind the translation memory like the real one
+    utterance.translated = translation_memory.translate(
+        [utterance.text], utterance.src_lang, utterance.tgt_lang, lambda texts, src, tgt: texts,
+    )[0]
+
+    # ================   Uncomment for deploy ================
+    # 2. Translate text to utterance.tgt_lang -> output <translated text>
+    # texts_translated = translation_memory.translate(
+    #     [utterance.text], utterance.src_lang, utterance.tgt_lang,
+    #     lambda texts, src, tgt: translator.translate(texts=texts, src=src, tgt=tgt),
+    # )
+    # utterance.translated = ' '.join(texts_translated)
+    # ================   Uncomment for deploy ================
+    return utterance
+
+
+def tts_stage(utterance: Utterance):
+    # 3. TTS <translated text> -> output audio (WAV byte), cached per (text, language, voice)
+    utterance.wav_bytes = tts_cache.get_or_synthesize(utterance.translated, utterance.tgt_lang, TTS_VOICE, synthesize)
+    return utterance
+
+
+def observe_stage(utterance: Utterance, stage, seconds):
+    utterance.buffer.session.metrics.observe(stage, seconds)
+
+
+# Utterances overlap across stages; each role still gets its results in order
+pipeline = Pipeline([
+    Stage("stt", stt_stage, STT_WORKERS, PIPELINE_QUEUE_SIZE),
+    Stage("translate", translate_stage, TRANSLATE_WORKERS, PIPELINE_QUEUE_SIZE),
+    Stage("tts", tts_stage, TTS_WORKERS, PIPELINE_QUEUE_SIZE),
+], on_timing=observe_stage)
+
+
+def process_audio_frames(frames: np.ndarray, buffer: AudioBuffer, timestamp=None, rate=WS_SAMPLE_RATE):
+    """frames: int16 view of shape (n, 20 ms of samples, channels), only valid during this call.
+
+    timestamp: client send stamp of the last chunk in the block, if it had one.
+    rate: the role's declared uplink sample rate.
+    """
+    start = time.monotonic()
+    buffer.block_timestamp = timestamp
+    resampled = buffer.to_mono_16k(frames, rate)
+    energies = frame_energies(resampled)
+    if buffer.energy_gate is not None:
+        check_vad = buffer.energy_gate.process(energies)
+    else:
+        check_vad = np.ones(len(frames), dtype=bool)
+    for frame, raw_pcm, energy, check in zip(resampled, frames, energies.tolist(), check_vad.tolist()):
+        buffer.add_frame(frame, raw_pcm, energy, check)
+    buffer.session.metrics.observe(DSP, time.monotonic() - start)
+
+
+async def process_audio_stream(websocket: WebSocket, session, open_buffer, protocol=PROTOCOL_V1):
+    """Route the frames of every role on this connection to that role's buffer.
+
+    Per-role state is allocated when a role first shows up, so a connection
+    that carries one role pays for one, and one that multiplexes both roles
+    pays for both on a single socket. `open_buffer(role)` builds the buffer.
+
+    Each role's PCM is read in the format it declares (v1 header or v2
+    control message): 48 kHz stereo until told otherwise.
+    """
+    parser = FrameParser(protocol)
+    buffers = session.buffers
+    accumulators, lanes, ingress, next_seq, formats = {}, {}, {}, {}, {}
 
     prev_langs = {
         "user": {"src": "vi", "tgt": "transcript"},
         "other": {"src": "ja", "tgt": "transcript"}
     }
 
+    def open_role(role):
+        buffer = buffers.get(role)
+        if buffer is None and role in ROLE_LANGUAGES:
+            buffer = buffers[role] = open_buffer(role)
+            formats[role] = (WS_SAMPLE_RATE, CHANNELS)
+            accumulators[role] = FrameAccumulator(FRAME_SAMPLES, CHANNELS, BYTES_PER_SAMPLE)
+            lanes[role] = session.lane(dsp_pool, "frames", DSP_MAX_PENDING)
+            ingress[role] = IngressClock()
+            print(f"[SESSION] {session.id}: role {role} opened")
+        return buffer
+
+    def update_languages(role, header):
+        new_src = header.get("src_lang", prev_langs[role]["src"])
+        new_tgt = header.get("tgt_lang", prev_langs[role]["tgt"])
+        if new_src != prev_langs[role]["src"] or new_tgt != prev_langs[role]["tgt"]:
+            print(f"[LANGUAGE CHANGE] Role: {role} Source: {new_src}, Target: {new_tgt}")
+            prev_langs[role]["src"] = new_src
+            prev_langs[role]["tgt"] = new_tgt
+            buffers[role].src_lang = new_src
+            buffers[role].tgt_lang = new_tgt
+
+    def update_format(role, header):
+        declared = (header.get("rate", WS_SAMPLE_RATE), header.get("channels", CHANNELS))
+        if declared == formats[role]:
+            return
+        rate, channels = declared
+        supported = (
+            header.get("format", "pcm_s16le") == "pcm_s16le"
+            and header.get("sample_width", BYTES_PER_SAMPLE) == BYTES_PER_SAMPLE
+            and channels in (1, 2)
+            and isinstance(rate, int) and rate > 0 and rate % SAMPLE_RATE == 0
+        )
+        if not supported:
+            print(f"[FORMAT ERROR] Role: {role} unsupported uplink format {header.get('format')} {rate} Hz x {channels}")
+            return
+        print(f"[FORMAT CHANGE] Role: {role} {rate} Hz x {channels}")
+        formats[role] = declared
+        # A partial frame of the old format can't continue in the new one
+        accumulators[role] = FrameAccumulator(rate * FRAME_DURATION // 1000, channels, BYTES_PER_SAMPLE)
+
     while True:
         try:
-            chunk = await websocket.receive_bytes()
-            recv_buffer += chunk
-
-            while len(recv_buffer) >= 4:
-                header_len = struct.unpack("!I", recv_buffer[:4])[0]
-                if len(recv_buffer) < 4 + header_len:
-                    break
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
 
-                header_bytes = recv_buffer[4:4 + header_len]
+            if message.get("text") is not None:
+                # v2 control message: languages/format, sent only when they change
                 try:
-                    header = json.loads(header_bytes.decode("utf-8"))
-                    role = header.get("sender", "unknown")
-
-                    if role not in ["user", "other"]:
-                        recv_buffer = recv_buffer[4 + header_len:]
-                        continue
-
-                    new_src = header.get("src_lang", prev_langs[role]["src"])
-                    new_tgt = header.get("tgt_lang", prev_langs[role]["tgt"])
-                    if new_src != prev_langs[role]["src"] or new_tgt != prev_langs[role]["tgt"]:
-                        print(f"[LANGUAGE CHANGE] Role: {role} Source: {new_src}, Target: {new_tgt}")
-                        prev_langs[role]["src"] = new_src
-                        prev_langs[role]["tgt"] = new_tgt
-
-                        if role == "user":
-                            buffer_user.src_lang = new_src
-                            buffer_user.tgt_lang = new_tgt
-                        elif role == "other":
-                            buffer_other.src_lang = new_src
-                            buffer_other.tgt_lang = new_tgt
-
-                except Exception as e:
-                    print(f"[HEADER ERROR]: {e}")
-                    recv_buffer = recv_buffer[4 + header_len:]
+                    control = json.loads(message["text"])
+                except json.JSONDecodeError as e:
+                    print(f"[CONTROL ERROR]: {e}")
                     continue
-
-                full_len = 4 + header_len
-                remaining = recv_buffer[full_len:]
-                recv_buffer = b""
-
-                sample_align = CHANNELS * BYTES_PER_SAMPLE
-                valid_len = len(remaining) - (len(remaining) % sample_align)
-                pcm_bytes = remaining[:valid_len]
-
-                if role == "user":
-                    frame_accum_user += pcm_bytes
-                    while len(frame_accum_user) >= FRAME_BYTES:
-                        frame = frame_accum_user[:FRAME_BYTES]
-                        frame_accum_user = frame_accum_user[FRAME_BYTES:]
-                        process_audio_frame(frame, "user", buffer_user, buffer_other)
-
-                elif role == "other":
-                    frame_accum_other += pcm_bytes
-                    while len(frame_accum_other) >= FRAME_BYTES:
-                        frame = frame_accum_other[:FRAME_BYTES]
-                        frame_accum_other = frame_accum_other[FRAME_BYTES:]
-                        process_audio_frame(frame, "other", buffer_user, buffer_other)
-
-            await asyncio.sleep(0.01)
+                role = control.get("sender")
+                if control.get("type") == MSG_CONTROL and open_role(role) is not None:
+                    update_languages(role, control)
+                    update_format(role, control)
+                continue
+
+            arrival = time.monotonic()
+            for header, pcm in parser.feed(message["bytes"]):
+                role = header.get("sender", "unknown")
+                buffer = open_role(role)
+                if buffer is None:
+                    continue
+                if "timestamp" in header:
+                    session.metrics.observe(INGRESS, ingress[role].delay(arrival, header["timestamp"]))
+
+                if protocol == PROTOCOL_V1:
+                    update_languages(role, header)
+                    update_format(role, header)
+                else:
+                    expected = next_seq.get(role)
+                    if expected is not None and header["seq"] != expected:
+                        print(f"[SEQ GAP] Role: {role} expected {expected}, got {header['seq']}")
+                    next_seq[role] = (header["seq"] + 1) & 0xFFFFFFFF
+
+                accumulator = accumulators[role]
+                accumulator.write(pcm)
+                frames = accumulator.frames()
+                if frames is not None:
+                    # The view is only valid until the next write, so worker threads get a copy
+                    if dsp_pool.executor is not None:
+                        frames = frames.copy()
+                    lanes[role].submit(process_audio_frames, frames, buffer, header.get("timestamp"), formats[role][0])
 
         except Exception as e:
             print("[WebSocket Error]:", e)
@@ -261,18 +539,26 @@ async def process_audio_stream(websocket: WebSocket, buffer_user: AudioBuffer, b
 async def audio_socket(websocket: WebSocket):
     await websocket.accept()
 
-    vad_user = webrtcvad.Vad(2)
-    vad_other = webrtcvad.Vad(2)
+    requested = websocket.query_params.get("protocol")
+    requested_caps = websocket.query_params.get("caps")
+    protocol = negotiate(requested)
+    capabilities = negotiate_capabilities(requested_caps)
+    if not STT_PARTIAL_INTERVAL_MS and CAP_PARTIALS in capabilities:
+        capabilities.remove(CAP_PARTIALS)
+    binary_audio = CAP_BINARY_AUDIO in capabilities
+    partial_interval_ms = STT_PARTIAL_INTERVAL_MS if CAP_PARTIALS in capabilities else 0
+    if requested or requested_caps:
+        await websocket.send_text(hello_message(protocol, capabilities))
 
     loop = asyncio.get_running_loop()
-    message_queue = asyncio.Queue()
+    message_queue = asyncio.Queue(SEND_QUEUE_SIZE)
+
+    session = sessions.open()
 
-    buffer_user = AudioBuffer("user", vad_user, message_queue, loop)
-    buffer_user.src_lang = "vi"
-    buffer_user.tgt_lang = "ja"
-    buffer_other = AudioBuffer("other", vad_other, message_queue, loop)
-    buffer_other.src_lang = "ja"
-    buffer_other.tgt_lang = "vi"
+    def open_buffer(role):
+        buffer = AudioBuffer(role, webrtcvad.Vad(2), message_queue, loop, session, partial_interval_ms)
+        buffer.src_lang, buffer.tgt_lang = ROLE_LANGUAGES[role]
+        return buffer
 
     async def heartbeat():
         while True:
@@ -285,9 +571,18 @@ async def audio_socket(websocket: WebSocket):
 
     async def message_sender():
         while True:
-            package = await message_queue.get()
+            package, audio_bytes, queued_at = await message_queue.get()
             try:
-                await websocket.send_json(package)
+                if audio_bytes is None:
+                    await websocket.send_json(package)
+                    session.metrics.observe(SEND, time.monotonic() - queued_at)
+                    continue
+                for frame in encode_result(package, audio_bytes, binary_audio):
+                    if isinstance(frame, str):
+                        await websocket.send_text(frame)
+                    else:
+                        await websocket.send_bytes(frame)
+                session.metrics.observe(SEND, time.monotonic() - queued_at)
                 print(f"[SEND SUCCESS] Sent package to client")
             except Exception as e:
                 print(f"[SEND ERROR] {e}")
@@ -298,12 +593,97 @@ async def audio_socket(websocket: WebSocket):
     sender_task = asyncio.create_task(message_sender())
 
     try:
-        await process_audio_stream(websocket, buffer_user, buffer_other)
+        await process_audio_stream(websocket, session, open_buffer, protocol)
     except WebSocketDisconnect:
         pass
     finally:
         heartbeat_task.cancel()
         sender_task.cancel()
+        sessions.close(session)
+
+
+def model_status():
+    return scheduler.status() if STT_MODE == "sidecar" else models.status()
+
+
+@router.get("/ready")
+async def ready():
+    status = model_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/tts_cache")
+async def tts_cache_stats():
+    return tts_cache.stats()
+
+
+@router.get("/transcript_filter")
+async def transcript_filter_stats():
+    return transcript_filter.stats()
+
+
+@router.get("/translation_memory")
+async def translation_memory_stats():
+    return translation_memory.stats()
+
+
+def prometheus_metrics() -> str:
+    """Prometheus text exposition of latency histograms and load counters."""
+    series = [({"stage": stage}, h) for stage, h in sessions.metrics.histograms.items()]
+    lines = render_histograms(
+        "translator_stage_latency_seconds", "Latency of each processing stage, all sessions.", series,
+    )
+    if METRICS_PER_SESSION:
+        series = [
+            ({"session": session.id, "stage": stage}, h)
+            for session in sessions.live()
+            for stage, h in session.metrics.histograms.items()
+        ]
+        lines += render_histograms(
+            "translator_session_stage_latency_seconds", "Latency of each processing stage, per live session.", series,
+        )
+
+    stats = sessions.stats()
+    lines += render_values("translator_sessions", "gauge", "Live /ws/audio sessions.", [({}, stats["sessions"])])
+    lines += render_values(
+        "translator_role_buffers", "gauge", "Role audio buffers of live sessions; a multiplexed session has two.",
+        [({}, stats["role_buffers"])],
+    )
+    lines += render_values(
+        "translator_model_ready", "gauge", "1 once the model has loaded and warmed up.",
+        [({"model": name}, int(model["state"] == "ready")) for name, model in model_status()["models"].items()],
+    )
+    lines += render_values(
+        "translator_shed_total", "counter", "Work shed under load, by kind and reason.",
+        [({"kind": kind, "reason": reason}, n) for kind, counts in stats["shed"].items() for reason, n in counts.items()],
+    )
+    lines += render_values(
+        "translator_pipeline_queued", "gauge", "Utterances waiting in front of each pipeline stage.",
+        [({"stage": stage}, s["queued"]) for stage, s in pipeline.stats().items()],
+    )
+    lines += render_values(
+        "translator_transcript_segments_rejected_total", "counter", "STT segments dropped before translation, by reason.",
+        [({"reason": reason}, n) for reason, n in transcript_filter.stats()["rejected_segments"].items()],
+    )
+    tts, tm = tts_cache.stats(), translation_memory.stats()
+    lines += render_values(
+        "translator_cache_lookups_total", "counter", "TTS cache and translation memory lookups.",
+        [
+            ({"cache": "tts", "result": "hit"}, tts["hits"]),
+            ({"cache": "tts", "result": "miss"}, tts["misses"]),
+            ({"cache": "translation", "result": "hit"}, tm["hits"]),
+            ({"cache": "translation", "result": "miss"}, tm["misses"]),
+        ],
+    )
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/sessions")
+async def session_stats():
+    stats = sessions.stats()
+    stats["dsp_workers"] = dsp_pool.max_workers
+    stats["pipeline"] = pipeline.stats()
+    return stats
 
 
 app.include_router(router)
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+import sys
+import wave
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+DEFAULT_WAV = os.path.join(SERVER_DIR, "sample.wav")
+
+
+def load_pcm(path=DEFAULT_WAV, rate=48000, channels=2) -> np.ndarray:
+    """Load a 16-bit WAV as int16 of shape (n, channels) at `rate`.
+
+    Linear interpolation is good enough to produce benchmark input.
+    """
+    with wave.open(path, "rb") as wf:
+        src_rate = wf.getframerate()
+        src_channels = wf.getnchannels()
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    data = data.reshape(-1, src_channels).astype(np.float32)
+
+    if src_rate != rate:
+        t_src = np.arange(len(data)) / src_rate
+        t_dst = np.arange(int(len(data) * rate / src_rate)) / rate
+        data = np.stack([np.interp(t_dst, t_src, data[:, c]) for c in range(src_channels)], axis=1)
+
+    if src_channels != channels:
+        data = np.repeat(data.mean(axis=1, keepdims=True), channels, axis=1)
+
+    return data.astype(np.int16)
@@ -0,0 +1,106 @@
+"""Client-side cost of the /ws/audio transport, through the WebSocketPCMClient API.
+
+Starts the server (stub STT) like loadgen.py and connects `--sessions` pairs
+of WebSocketPCMClients. One feeder thread stands in for the audio
+callbacks: it hands each client a 1024-frame chunk every 21.3 ms, and every
+second it switches each client's languages. Reports:
+
+- threads the clients added
+- the time send_pcm_chunk() and update_language() took (the audio callback
+  and the GUI thread wait this long)
+- client CPU
+
+    python benchmarks/bench_client_transport.py [--sessions 10] [--seconds 15]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import _common
+from loadgen import CHUNK_FRAMES, start_server
+
+sys.path.insert(0, os.path.dirname(_common.SERVER_DIR))
+from stts.stream_sender import WebSocketPCMClient  # noqa: E402
+
+
+def us(values, q):
+    return round(float(np.percentile(values, q)) * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8792)
+    args = parser.parse_args()
+
+    pcm = _common.load_pcm()
+    chunks = [pcm[i:i + CHUNK_FRAMES].tobytes() for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES)]
+    server = start_server(args.port, {})
+    url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    try:
+        threads_before = threading.active_count()
+        clients = [WebSocketPCMClient(role, url) for _ in range(args.sessions) for role in ("user", "other")]
+        for client in clients:
+            client.connect()
+        deadline = time.monotonic() + 10
+        while not all(c.connected for c in clients):
+            if time.monotonic() > deadline:
+                raise RuntimeError("clients did not connect")
+            time.sleep(0.05)
+        threads = threading.active_count() - threads_before
+
+        submit, language = [], []
+        interval = CHUNK_FRAMES / 48000
+        cpu = time.process_time()
+        start = time.monotonic()
+        i = 0
+        while time.monotonic() - start < args.seconds:
+            chunk = chunks[i % len(chunks)]
+            for client in clients:
+                t = time.perf_counter()
+                client.send_pcm_chunk(chunk)
+                submit.append(time.perf_counter() - t)
+            if i % 47 == 46:
+                langs = ("vi", "ja") if (i // 47) % 2 else ("ja", "vi")
+                for client in clients:
+                    t = time.perf_counter()
+                    client.update_language(*langs)
+                    language.append(time.perf_counter() - t)
+            i += 1
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        wall = time.monotonic() - start
+        cpu = time.process_time() - cpu
+
+        t = time.perf_counter()
+        for client in clients:
+            client.disconnect()
+        disconnect_s = time.perf_counter() - t
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print(json.dumps({
+        "streams": len(clients),
+        "client_threads": threads,
+        "send_pcm_chunk_p50_us": us(submit, 50),
+        "send_pcm_chunk_p99_us": us(submit, 99),
+        "send_pcm_chunk_max_us": round(max(submit) * 1e6, 1),
+        "update_language_p50_us": us(language, 50),
+        "update_language_p99_us": us(language, 99),
+        "update_language_max_us": round(max(language) * 1e6, 1),
+        "disconnect_all_ms": round(disconnect_s * 1000, 1),
+        "client_cpu_percent": round(cpu / wall * 100, 1),
+        "messages_sent": sum(c.messages_sent for c in clients),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""CPU cost of the per-frame DSP path in audio_router.process_audio_frame.
+
+Compares the old pydub low_pass_filter + resampy path (if both are installed)
+with the streaming PolyphaseDecimator, reported as CPU seconds per
+session-second of 48 kHz stereo audio.
+
+    python benchmarks/bench_dsp.py [--wav sample.wav] [--repeat 5]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from _common import DEFAULT_WAV, load_pcm
+from modules.dsp import PolyphaseDecimator
+
+WS_SAMPLE_RATE = 48000
+SAMPLE_RATE = 16000
+CHANNELS = 2
+FRAME_SAMPLES = WS_SAMPLE_RATE * 20 // 1000
+
+
+def legacy_frame(frame_bytes):
+    from pydub import AudioSegment  # type: ignore
+    from pydub.effects import low_pass_filter  # type: ignore
+    import resampy  # type: ignore
+
+    segment = AudioSegment(frame_bytes, frame_rate=WS_SAMPLE_RATE, sample_width=2, channels=CHANNELS)
+    filtered = low_pass_filter(segment, cutoff=3000)
+    samples = np.frombuffer(filtered.raw_data, dtype=np.int16).reshape(-1, CHANNELS)
+    mono = (samples.astype(np.float32) / 32768.0).mean(axis=1)
+    return resampy.resample(mono, WS_SAMPLE_RATE, SAMPLE_RATE)
+
+
+def run(process, frames, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        for frame in frames:
+            process(frame)
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pcm = load_pcm(args.wav, WS_SAMPLE_RATE, CHANNELS)
+    n_frames = len(pcm) // FRAME_SAMPLES
+    frames = [pcm[i * FRAME_SAMPLES:(i + 1) * FRAME_SAMPLES].tobytes() for i in range(n_frames)]
+    audio_seconds = n_frames * FRAME_SAMPLES / WS_SAMPLE_RATE * args.repeat
+
+    results = {"audio_seconds": audio_seconds}
+
+    try:
+        legacy_frame(frames[0])
+        results["legacy_cpu_per_session_second"] = run(legacy_frame, frames, args.repeat) / audio_seconds
+    except ImportError as e:
+        print(f"[BENCH] Skipping legacy path: {e}")
+
+    decimator = PolyphaseDecimator(WS_SAMPLE_RATE, SAMPLE_RATE, CHANNELS)
+    results["decimator_cpu_per_session_second"] = run(decimator.process, frames, args.repeat) / audio_seconds
+
+    if "legacy_cpu_per_session_second" in results:
+        results["speedup"] = results["legacy_cpu_per_session_second"] / results["decimator_cpu_per_session_second"]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Per-frame DSP with and without the energy pre-gate ahead of webrtcvad.
+
+A call is mostly silence, so the input is built like one: `--wav` speech
+segments separated by room noise (`--noise-dbfs`) until speech makes up
+`--speech-ratio` of the audio. Pass a real call recording with
+`--speech-ratio 0` to use it unchanged. Both runs go through the
+server's per-block path (decimate, frame energies, VAD, Endpointer).
+Reported:
+
+- the fraction of frames the gate skips
+- CPU per second of audio
+- how closely the gated run's utterances match the VAD-only run: frames
+  inside utterances found by both (recall/precision), and utterance counts
+
+webrtcvad adapts to the noise it is shown. Skipping frames changes its state,
+so boundaries can move by a few frames even where both runs agree.
+
+    python benchmarks/bench_energy_gate.py [--seconds 120] [--speech-ratio 0.3] [--vad-mode 2]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import webrtcvad
+
+import _common
+from modules.dsp import PolyphaseDecimator, EnergyGate, frame_energies
+from modules.endpointer import Endpointer, START, END, CUT
+
+FRAME_48K = 960
+BLOCK_FRAMES = 3  # frames per received chunk after accumulation (1024-frame chunks ~ 1 frame; bursts more)
+
+
+def build_call(speech, seconds, speech_ratio, noise_dbfs, rng):
+    """Stereo int16 at 48 kHz: speech segments between stretches of room noise."""
+    if speech_ratio <= 0:
+        return speech
+    total = int(seconds * 48000)
+    noise_amp = 32768 * 10 ** (noise_dbfs / 20)
+    # Low-passed white noise: a stand-in for fan/room hum
+    noise = np.convolve(rng.standard_normal(total), np.ones(8) / 8, "same")
+    out = (noise / noise.std() * noise_amp).astype(np.float32)
+    out = np.repeat(out[:, None], 2, axis=1)
+    gap = int(len(speech) * (1 - speech_ratio) / speech_ratio)
+    pos = gap // 2
+    while pos + len(speech) < total:
+        out[pos:pos + len(speech)] += speech
+        pos += len(speech) + int(gap * rng.uniform(0.5, 1.5))
+    return out.clip(-32768, 32767).astype(np.int16)
+
+
+def run(pcm, vad_mode, gated):
+    decimator = PolyphaseDecimator(48000, 16000, 2, cutoff=3000)
+    gate = EnergyGate() if gated else None
+    vad = webrtcvad.Vad(vad_mode)
+    endpointer = Endpointer()
+    frames = pcm[:len(pcm) // FRAME_48K * FRAME_48K].reshape(-1, FRAME_48K, 2)
+    events = []
+    index = 0
+    skipped = 0
+
+    start = time.process_time()
+    for b in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[b:b + BLOCK_FRAMES]
+        resampled = decimator.process(block).reshape(len(block), -1, 1)
+        if gate is None:
+            # The old add_frame: VAD and an energy reduction for every frame
+            for frame in resampled:
+                int16_frame = (frame * 32768).clip(-32768, 32767).astype(np.int16)
+                is_speech = vad.is_speech(int16_frame.tobytes(), 16000)
+                energy = float(np.sqrt(np.mean(frame ** 2)))
+                for event, _, _ in endpointer.push(frame, is_speech, energy):
+                    events.append((event, index))
+                index += 1
+            continue
+
+        energies = frame_energies(resampled)
+        check_vad = gate.process(energies)
+        for frame, energy, check in zip(resampled, energies.tolist(), check_vad.tolist()):
+            is_speech = False
+            if check or endpointer.speaking:
+                int16_frame = (frame * 32768).clip(-32768, 32767).astype(np.int16)
+                is_speech = vad.is_speech(int16_frame.tobytes(), 16000)
+            else:
+                skipped += 1
+            for event, _, _ in endpointer.push(frame, is_speech, energy):
+                events.append((event, index))
+            index += 1
+    cpu = time.process_time() - start
+
+    return {
+        "cpu_ms_per_audio_s": cpu * 1000 / (index * 0.02),
+        "frames": index,
+        "skipped": skipped,
+        "utterances": sum(1 for event, _ in events if event in (END, CUT)),
+        "utterance_frames": utterance_frames(events, index),
+    }
+
+
+def utterance_frames(events, n):
+    """Boolean mask of frames inside kept (END/CUT) utterances."""
+    mask = np.zeros(n, dtype=bool)
+    start = None
+    for event, index in events:
+        if event == START:
+            start = index
+        elif event in (END, CUT) and start is not None:
+            mask[start:index] = True
+            start = None
+    return mask
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav", default=_common.DEFAULT_WAV)
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--speech-ratio", type=float, default=0.3)
+    parser.add_argument("--noise-dbfs", type=float, default=-60)
+    parser.add_argument("--vad-mode", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pcm = build_call(_common.load_pcm(args.wav).astype(np.float32), args.seconds, args.speech_ratio,
+                     args.noise_dbfs, rng)
+
+    results = {}
+    for name, gated in (("vad_only", False), ("energy_gate", True)):
+        runs = [run(pcm, args.vad_mode, gated) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["cpu_ms_per_audio_s"])
+        results[name] = best
+
+    base, gated = results["vad_only"], results["energy_gate"]
+    both = np.count_nonzero(base["utterance_frames"] & gated["utterance_frames"])
+    print(json.dumps({
+        "audio_s": round(base["frames"] * 0.02, 1),
+        "speech_ratio": args.speech_ratio,
+        "noise_dbfs": args.noise_dbfs,
+        "frames_skipped": round(gated["skipped"] / gated["frames"], 3),
+        "vad_only_cpu_ms_per_audio_s": round(base["cpu_ms_per_audio_s"], 2),
+        "energy_gate_cpu_ms_per_audio_s": round(gated["cpu_ms_per_audio_s"], 2),
+        "cpu_saved": round(1 - gated["cpu_ms_per_audio_s"] / base["cpu_ms_per_audio_s"], 3),
+        "utterances": {"vad_only": base["utterances"], "energy_gate": gated["utterances"]},
+        "utterance_frame_recall": round(both / max(1, np.count_nonzero(base["utterance_frames"])), 3),
+        "utterance_frame_precision": round(both / max(1, np.count_nonzero(gated["utterance_frames"])), 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Event-loop lag of the server with many simulated sessions.
+
+Starts the FastAPI app in-process (stub STT) on its own event-loop thread,
+with a probe task that sleeps 10 ms in a loop and records how late it wakes
+up. `--sessions` websocket clients, in a separate process so they don't
+compete for this one's GIL, then stream 48 kHz stereo speech in real time
+(v2 framing). Exits non-zero if p99 lag exceeds `--threshold-ms`.
+
+    DSP_POOL_MODE=thread python benchmarks/bench_event_loop_lag.py --sessions 50
+    DSP_POOL_MODE=inline python benchmarks/bench_event_loop_lag.py --sessions 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("STT_BACKEND", "stub")
+
+import numpy as np
+import uvicorn
+import websockets
+
+from _common import DEFAULT_WAV, load_pcm
+from modules.protocol import pack_v2
+
+PROBE_INTERVAL = 0.01
+CHUNK_FRAMES = 1024
+
+
+async def probe(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+def serve(port, lags, stop, ready):
+    from main import app
+
+    async def main():
+        server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+        probe_task = asyncio.create_task(probe(lags, stop))
+        serve_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        server.should_exit = True
+        await serve_task
+        probe_task.cancel()
+
+    asyncio.run(main())
+
+
+async def session(url, role, pcm, seconds):
+    # No permessage-deflate, like WebSocketPCMClient (websocket-client)
+    async with websockets.connect(url + "?protocol=2&caps=binary_audio", max_size=None, compression=None) as ws:
+        await ws.recv()  # hello
+        await ws.send(json.dumps({"type": "control", "sender": role, "src_lang": "vi", "tgt_lang": "ja"}))
+        n_chunks = int(seconds * 48000 / CHUNK_FRAMES)
+        start = time.perf_counter()
+        for seq in range(n_chunks):
+            offset = (seq * CHUNK_FRAMES) % (len(pcm) - CHUNK_FRAMES)
+            chunk = pcm[offset:offset + CHUNK_FRAMES].tobytes()
+            await ws.send(pack_v2(role, seq, time.monotonic_ns() // 1000, chunk))
+            delay = start + (seq + 1) * CHUNK_FRAMES / 48000 - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+async def run_sessions(url, sessions, pcm, seconds):
+    await asyncio.gather(*(
+        session(url, "user" if i % 2 else "other", pcm, seconds) for i in range(sessions)
+    ))
+
+
+def run_clients(url, sessions, wav, seconds):
+    asyncio.run(run_sessions(url, sessions, load_pcm(wav), seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--threshold-ms", type=float, default=50)
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    args = parser.parse_args()
+
+    lags, stop, ready = [], threading.Event(), threading.Event()
+    server_thread = threading.Thread(target=serve, args=(args.port, lags, stop, ready), daemon=True)
+    server_thread.start()
+    ready.wait()
+
+    lags.clear()
+    clients = multiprocessing.Process(
+        target=run_clients,
+        args=(f"ws://127.0.0.1:{args.port}/ws/audio", args.sessions, args.wav, args.seconds),
+    )
+    clients.start()
+    clients.join()
+    stop.set()
+    server_thread.join(timeout=5)
+
+    lag_ms = np.array(lags) * 1000
+    result = {
+        "dsp_pool_mode": os.environ.get("DSP_POOL_MODE", "thread"),
+        "sessions": args.sessions,
+        "lag_p50_ms": float(np.percentile(lag_ms, 50)),
+        "lag_p99_ms": float(np.percentile(lag_ms, 99)),
+        "lag_max_ms": float(lag_ms.max()),
+        "threshold_ms": args.threshold_ms,
+    }
+    result["passed"] = result["lag_p99_ms"] <= args.threshold_ms
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Parse throughput of the /ws/audio framing, in MB/s of websocket payload.
+
+Compares the old bytes-concatenation loop from process_audio_stream with
+FrameParser + FrameAccumulator for plain per-chunk messages (v1 JSON and v2 binary headers), large (256 KB) messages, bursts of
+coalesced records and fragmented messages. No DSP runs, frames are only
+counted.
+
+    python benchmarks/bench_frame_parser.py [--mb 64]
+"""
+import argparse
+import json
+import struct
+import time
+
+import _common  # noqa: F401
+from modules.frame_parser import FrameParser, FrameAccumulator
+from modules.protocol import PROTOCOL_V1, PROTOCOL_V2, pack_v2
+
+FRAME_BYTES = 960 * 2 * 2
+CHUNK_BYTES = 4096
+
+
+def record(pcm, length=False):
+    header = {
+        "sender": "user", "src_lang": "vi", "tgt_lang": "ja", "format": "pcm_s16le",
+        "rate": 48000, "channels": 2, "sample_width": 2, "timestamp": time.time(),
+    }
+    if length:
+        header["length"] = len(pcm)
+    header_bytes = json.dumps(header).encode("utf-8")
+    return struct.pack("!I", len(header_bytes)) + header_bytes + pcm
+
+
+def legacy_parse(messages):
+    frames = 0
+    frame_accum = b""
+    recv_buffer = b""
+    for chunk in messages:
+        recv_buffer += chunk
+        while len(recv_buffer) >= 4:
+            header_len = struct.unpack("!I", recv_buffer[:4])[0]
+            if len(recv_buffer) < 4 + header_len:
+                break
+            json.loads(recv_buffer[4:4 + header_len].decode("utf-8"))
+            remaining = recv_buffer[4 + header_len:]
+            recv_buffer = b""
+            frame_accum += remaining[:len(remaining) - len(remaining) % 4]
+            while len(frame_accum) >= FRAME_BYTES:
+                frame_accum = frame_accum[FRAME_BYTES:]
+                frames += 1
+    return frames
+
+
+def new_parse(messages, protocol=PROTOCOL_V1):
+    frames = 0
+    parser = FrameParser(protocol)
+    accumulator = FrameAccumulator()
+    for chunk in messages:
+        for header, pcm in parser.feed(chunk):
+            accumulator.write(pcm)
+            block = accumulator.frames()
+            if block is not None:
+                frames += len(block)
+    return frames
+
+
+def measure(fn, messages, *args):
+    total = sum(len(m) for m in messages)
+    start = time.perf_counter()
+    frames = fn(messages, *args)
+    elapsed = time.perf_counter() - start
+    return {"mb_per_s": total / elapsed / 1e6, "frames": frames}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=64)
+    args = parser.parse_args()
+
+    pcm = bytes(CHUNK_BYTES)
+    n = int(args.mb * 1e6 / CHUNK_BYTES)
+
+    plain = [record(pcm) for _ in range(n)]
+    plain_v2 = [pack_v2("user", seq, time.monotonic_ns() // 1000, pcm) for seq in range(n)]
+    large = [record(bytes(CHUNK_BYTES * 64))] * (n // 64)
+    burst = b"".join(record(pcm, length=True) for _ in range(16))
+    coalesced = [burst] * (n // 16)
+    stream = b"".join(record(pcm, length=True) for _ in range(64))
+    fragmented = [stream[i:i + 1500] for i in range(0, len(stream), 1500)] * (n // 64)
+
+    results = {
+        "plain": {"legacy": measure(legacy_parse, plain), "parser": measure(new_parse, plain)},
+        "plain_v2": {"parser": measure(new_parse, plain_v2, PROTOCOL_V2)},
+        "header_overhead": {
+            "v1": 1 - CHUNK_BYTES / len(plain[0]),
+            "v2": 1 - CHUNK_BYTES / len(plain_v2[0]),
+        },
+        "large": {"legacy": measure(legacy_parse, large), "parser": measure(new_parse, large)},
+        "coalesced": {"parser": measure(new_parse, coalesced)},
+        "fragmented": {"parser": measure(new_parse, fragmented)},
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Result latency under STT overload, per shed policy.
+
+`--roles` lanes each finish an utterance every `--interval-ms` for
+`--seconds`; a single stub STT worker needs `--stt-ms` per utterance plus
+`--stt-ms-per-s` per second of audio, so by default the offered load is
+about twice what it can serve. "unbounded" is the old behaviour (no limit on
+queued utterances). For each policy, reports delivered and shed counts,
+submit-to-result latency, and how long the backlog took to clear once the
+speakers stopped.
+
+    python benchmarks/bench_load_shedding.py [--seconds 10] [--max-pending 4] [--max-age-ms 1000]
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.pipeline import Pipeline, Stage, DROP_OLDEST, COALESCE, DEADLINE
+
+
+class Item:
+    def __init__(self, audio_s):
+        self.audio_s = audio_s
+        self.submitted = time.perf_counter()
+
+
+def merge(older, newer, max_audio_s=30):
+    if older.audio_s + newer.audio_s > max_audio_s:
+        return None
+    older.audio_s += newer.audio_s
+    return older
+
+
+def run(args, policy, max_pending):
+    def stt(item):
+        time.sleep((args.stt_ms + args.stt_ms_per_s * item.audio_s) / 1000)
+        return item
+
+    pipeline = Pipeline([Stage("stt", stt, 1, max_queue=100000)])
+    latencies = []
+    lock = threading.Lock()
+
+    def deliver(item):
+        with lock:
+            latencies.append(time.perf_counter() - item.submitted)
+
+    lanes = [
+        pipeline.lane(deliver, max_pending, policy, args.max_age_ms / 1000, merge)
+        for _ in range(args.roles)
+    ]
+    start = time.perf_counter()
+    n = int(args.seconds * 1000 / args.interval_ms)
+    for i in range(n):
+        for lane in lanes:
+            lane.submit(Item(args.audio_s))
+        delay = start + (i + 1) * args.interval_ms / 1000 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    stopped = time.perf_counter()
+    while any(len(lane) for lane in lanes):
+        time.sleep(0.01)
+    drain_s = time.perf_counter() - stopped
+    pipeline.shutdown()
+
+    shed = {}
+    for lane in lanes:
+        for reason, count in lane.shed.items():
+            shed[reason] = shed.get(reason, 0) + count
+    latency_ms = np.array(latencies) * 1000
+    return {
+        "submitted": n * args.roles,
+        "delivered": len(latencies),
+        "shed": shed,
+        "latency_p50_ms": round(float(np.percentile(latency_ms, 50)), 1),
+        "latency_p95_ms": round(float(np.percentile(latency_ms, 95)), 1),
+        "latency_max_ms": round(float(latency_ms.max()), 1),
+        "drain_after_stop_s": round(drain_s, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--roles", type=int, default=4)
+    parser.add_argument("--interval-ms", type=float, default=250)
+    parser.add_argument("--audio-s", type=float, default=1.0)
+    parser.add_argument("--stt-ms", type=float, default=80)
+    parser.add_argument("--stt-ms-per-s", type=float, default=40)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--max-pending", type=int, default=4)
+    parser.add_argument("--max-age-ms", type=float, default=1000)
+    args = parser.parse_args()
+
+    capacity = 1000 / (args.stt_ms + args.stt_ms_per_s * args.audio_s)
+    offered = args.roles * 1000 / args.interval_ms
+    result = {"offered_per_s": offered, "capacity_per_s": round(capacity, 2)}
+    result["unbounded"] = run(args, DROP_OLDEST, 10**9)
+    for policy in (DROP_OLDEST, COALESCE, DEADLINE):
+        result[policy] = run(args, policy, args.max_pending)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
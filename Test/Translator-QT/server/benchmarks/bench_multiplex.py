@@ -0,0 +1,94 @@
+"""Server footprint of one connection per role vs both roles multiplexed on one.
+
+Starts the server (stub STT) like loadgen.py. For each mode, connects
+`--sessions` clients, each a "user" and an "other" WebSocketPCMClient on a
+ClientTransport of its own, feeds every stream one 1024-frame chunk every
+21.3 ms for `--seconds`, and reports:
+
+- connections and role buffers the server holds (from /sessions)
+- heartbeats the server sends per second
+- server and client CPU, per second of wall time
+
+    python benchmarks/bench_multiplex.py [--sessions 10] [--seconds 15]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import _common
+from loadgen import CHUNK_FRAMES, cpu_seconds, fetch_stats, start_server
+
+sys.path.insert(0, os.path.dirname(_common.SERVER_DIR))
+from stts.stream_sender import WebSocketPCMClient  # noqa: E402
+from stts.transport import ClientTransport  # noqa: E402
+
+PING_INTERVAL = 2  # audio_router.PING_INTERVAL
+
+
+def run(url, base, server, multiplex, args, chunks):
+    transports = [ClientTransport(multiplex) for _ in range(args.sessions)]
+    clients = [WebSocketPCMClient(role, url, transport=t) for t in transports for role in ("user", "other")]
+    for client in clients:
+        client.connect()
+    deadline = time.monotonic() + 10
+    while not all(c.connected for c in clients):
+        if time.monotonic() > deadline:
+            raise RuntimeError("clients did not connect")
+        time.sleep(0.05)
+
+    interval = CHUNK_FRAMES / 48000
+    cpu_client = time.process_time()
+    cpu_server = cpu_seconds(server.pid)
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < args.seconds:
+        chunk = chunks[i % len(chunks)]
+        for client in clients:
+            client.send_pcm_chunk(chunk)
+        i += 1
+        delay = start + i * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    wall = time.monotonic() - start
+    cpu_client = time.process_time() - cpu_client
+    cpu_server = cpu_seconds(server.pid) - cpu_server
+    stats = fetch_stats(base)
+
+    for client in clients:
+        client.disconnect()
+    return {
+        "connections": stats["sessions"],
+        "role_buffers": stats["role_buffers"],
+        "heartbeats_per_s": round(stats["sessions"] / PING_INTERVAL, 1),
+        "server_cpu_percent": round(cpu_server / wall * 100, 1),
+        "client_cpu_percent": round(cpu_client / wall * 100, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8793)
+    args = parser.parse_args()
+
+    pcm = _common.load_pcm()
+    chunks = [pcm[i:i + CHUNK_FRAMES].tobytes() for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES)]
+    server = start_server(args.port, {})
+    base = f"http://127.0.0.1:{args.port}"
+    url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    try:
+        report = {"clients": args.sessions}
+        for name, multiplex in (("per_role", False), ("multiplexed", True)):
+            report[name] = run(url, base, server, multiplex, args, chunks)
+            time.sleep(1)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Time-to-first-text with and without streaming partial transcripts.
+
+Feeds a speech WAV through AudioBuffer at real-time pace (scaled by
+`--speed`) with the stub STT backend, and reports how long after speech
+onset the first text (partial or final) reaches the message queue.
+
+    python benchmarks/bench_partials.py [--interval-ms 300] [--stt-ms 150]
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("STT_BACKEND", "stub")
+
+import numpy as np
+import webrtcvad  # type: ignore
+
+from _common import DEFAULT_WAV, load_pcm
+import audio_router
+from audio_router import AudioBuffer, process_audio_frames, FRAME_SAMPLES, CHANNELS
+
+
+class DirectLoop:
+    """Stands in for the event loop: runs callbacks on the calling thread."""
+
+    def call_soon_threadsafe(self, fn, *args):
+        fn(*args)
+
+
+class Recorder:
+    def __init__(self):
+        self.first_text_at = None
+        self.messages = []
+
+    def full(self):
+        return False
+
+    def put_nowait(self, item):
+        package = item[0]
+        self.messages.append(package["type"])
+        if self.first_text_at is None:
+            self.first_text_at = time.perf_counter()
+
+
+def run(pcm, partial_interval_ms, speed):
+    recorder = Recorder()
+    session = audio_router.sessions.open()
+    buffer = AudioBuffer("user", webrtcvad.Vad(2), recorder, DirectLoop(), session, partial_interval_ms)
+    silence = np.zeros((FRAME_SAMPLES * 25, CHANNELS), dtype=np.int16)
+    audio = np.concatenate([silence, pcm, silence, silence])
+    n_frames = len(audio) // FRAME_SAMPLES
+    frames = audio[:n_frames * FRAME_SAMPLES].reshape(n_frames, FRAME_SAMPLES, CHANNELS)
+
+    onset = None
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        process_audio_frames(frame[np.newaxis], buffer)
+        if onset is None and buffer.speaking:
+            onset = time.perf_counter()
+        delay = start + (i + 1) * 0.02 / speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    deadline = time.perf_counter() + 5
+    while "translate_with_audio" not in recorder.messages and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    audio_router.sessions.close(session)
+    return {
+        "partial_interval_ms": partial_interval_ms,
+        "time_to_first_text_s": (recorder.first_text_at - onset) if recorder.first_text_at and onset else None,
+        "partials": recorder.messages.count("partial"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--interval-ms", type=int, default=300)
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    audio_router.stt_model.wait()
+    audio_router.stt_model.backend.batch_latency = args.stt_ms / 1000
+    audio_router.stt_model.backend.item_latency = 0
+    pcm = load_pcm(args.wav)
+
+    print(json.dumps([run(pcm, 0, args.speed), run(pcm, args.interval_ms, args.speed)], indent=2))
+
+
+if __name__ == "__main__":
+    main()
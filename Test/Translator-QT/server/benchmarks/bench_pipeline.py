@@ -0,0 +1,114 @@
+"""Throughput of the STT -> translate -> TTS pipeline against stage concurrency.
+
+Stub stages sleep for a configurable time. `--roles` lanes each submit
+`--utterances` utterances at once. The baseline is the old layout: one
+thread per role running the three steps in sequence. Every configuration
+also checks that each role got its results in submission order.
+
+    python benchmarks/bench_pipeline.py [--stt-ms 120 --translate-ms 40 --tts-ms 60]
+        [--configs 1:1:1,2:1:1,4:2:2,8:4:4]
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.pipeline import Pipeline, Stage
+
+
+def sleeper(ms):
+    def stage(item):
+        time.sleep(ms / 1000)
+        return item
+    return stage
+
+
+def run_sequential(args, steps):
+    latencies = []
+
+    def role():
+        start = time.perf_counter()
+        for _ in range(args.utterances):
+            for step in steps:
+                step(None)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=role) for _ in range(args.roles)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, True
+
+
+def run_pipeline(args, steps, workers):
+    pipeline = Pipeline([
+        Stage(name, step, n, max_queue=args.roles * args.utterances)
+        for name, step, n in zip(("stt", "translate", "tts"), steps, workers)
+    ])
+    total = args.roles * args.utterances
+    delivered = {role: [] for role in range(args.roles)}
+    latencies = []
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def deliver(item):
+        role, index, submitted = item
+        with lock:
+            delivered[role].append(index)
+            latencies.append(time.perf_counter() - submitted)
+            if len(latencies) == total:
+                done.set()
+
+    lanes = [pipeline.lane(deliver, max_pending=args.utterances) for _ in range(args.roles)]
+    start = time.perf_counter()
+    for index in range(args.utterances):
+        for role, lane in enumerate(lanes):
+            lane.submit((role, index, start))
+    done.wait()
+    elapsed = time.perf_counter() - start
+    pipeline.shutdown()
+    in_order = all(indices == list(range(args.utterances)) for indices in delivered.values())
+    return elapsed, latencies, in_order
+
+
+def summarize(elapsed, latencies, in_order, total):
+    latency_ms = np.array(latencies) * 1000
+    return {
+        "utterances_per_s": round(total / elapsed, 2),
+        "latency_p50_ms": round(float(np.percentile(latency_ms, 50)), 1),
+        "latency_p95_ms": round(float(np.percentile(latency_ms, 95)), 1),
+        "in_order": in_order,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stt-ms", type=float, default=120)
+    parser.add_argument("--translate-ms", type=float, default=40)
+    parser.add_argument("--tts-ms", type=float, default=60)
+    parser.add_argument("--roles", type=int, default=4)
+    parser.add_argument("--utterances", type=int, default=20)
+    parser.add_argument("--configs", default="1:1:1,2:1:1,4:2:2,8:4:4")
+    args = parser.parse_args()
+
+    steps = [sleeper(args.stt_ms), sleeper(args.translate_ms), sleeper(args.tts_ms)]
+    total = args.roles * args.utterances
+    result = {
+        "stage_ms": {"stt": args.stt_ms, "translate": args.translate_ms, "tts": args.tts_ms},
+        "roles": args.roles,
+        "utterances_per_role": args.utterances,
+        "sequential_per_role": summarize(*run_sequential(args, steps), total),
+    }
+    for config in args.configs.split(","):
+        workers = [int(n) for n in config.split(":")]
+        result[f"pipeline {config}"] = summarize(*run_pipeline(args, steps, workers), total)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
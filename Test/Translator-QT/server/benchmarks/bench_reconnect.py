@@ -0,0 +1,141 @@
+"""Client reconnects across a server restart: how they spread, and how much audio survives.
+
+For each client mode, starts the server (stub STT) like loadgen.py and connects
+`--sessions` clients. Each client is a "user" and an "other"
+WebSocketPCMClient on a ClientTransport of its own. A feeder thread hands
+every active client a 1024-frame chunk every 21.3 ms, as the audio callbacks
+do. After `--warmup` seconds the server is stopped, and `--downtime` seconds
+later it is started again on the same port. Reports:
+
+- connection attempts made while the server was down
+- time from the server being back to each connection being back (p50, max)
+- the most connections re-established within any 100 ms
+- chunks captured while disconnected, replayed, and dropped
+
+Modes:
+- "fixed": the old behaviour, a fixed 1.5 s delay and no spool
+- "backoff": the defaults in stts/transport.py
+
+    python benchmarks/bench_reconnect.py [--sessions 20] [--downtime 3]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import _common
+from loadgen import CHUNK_FRAMES, start_server
+
+sys.path.insert(0, os.path.dirname(_common.SERVER_DIR))
+from stts import transport as client_transport  # noqa: E402
+from stts.stream_sender import WebSocketPCMClient  # noqa: E402
+
+MODES = {
+    "fixed": {"RECONNECT_BASE_DELAY": 1.5, "RECONNECT_MAX_DELAY": 1.5, "RECONNECT_JITTER": 0, "SPOOL_SECONDS": 0},
+    "backoff": {},
+}
+
+
+def feed(clients, chunks, stop):
+    interval = CHUNK_FRAMES / 48000
+    start = time.monotonic()
+    i = 0
+    while not stop.is_set():
+        chunk = chunks[i % len(chunks)]
+        for client in clients:
+            if client.active:
+                client.send_pcm_chunk(chunk)
+        i += 1
+        delay = start + i * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def run(mode, args, chunks):
+    defaults = {name: getattr(client_transport, name) for name in MODES["fixed"]}
+    for name, value in MODES[mode].items():
+        setattr(client_transport, name, value)
+    url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    server = start_server(args.port, {})
+    stop = threading.Event()
+    try:
+        transports = [client_transport.ClientTransport() for _ in range(args.sessions)]
+        clients = [WebSocketPCMClient(role, url, transport=t) for t in transports for role in ("user", "other")]
+        for client in clients:
+            client.connect()
+        deadline = time.monotonic() + 10
+        while not all(c.connected for c in clients):
+            if time.monotonic() > deadline:
+                raise RuntimeError("clients did not connect")
+            time.sleep(0.05)
+        connections = [t.connections[0] for t in transports]
+
+        feeder = threading.Thread(target=feed, args=(clients, chunks, stop), daemon=True)
+        feeder.start()
+        time.sleep(args.warmup)
+
+        server.terminate()
+        server.wait(timeout=10)
+        attempts = sum(c.attempts for c in connections)
+        time.sleep(args.downtime)
+        server = start_server(args.port, {})
+        up = time.monotonic()
+        attempts = sum(c.attempts for c in connections) - attempts
+
+        back = {}
+        deadline = up + 60
+        while len(back) < len(connections) and time.monotonic() < deadline:
+            now = time.monotonic()
+            for i, connection in enumerate(connections):
+                if i not in back and connection.connected:
+                    back[i] = now - up
+            time.sleep(0.005)
+        time.sleep(2)
+        stop.set()
+        feeder.join()
+        for client in clients:
+            client.disconnect()
+    finally:
+        stop.set()
+        server.terminate()
+        server.wait(timeout=10)
+        for name, value in defaults.items():
+            setattr(client_transport, name, value)
+
+    delays = sorted(back.values())
+    peak = max(sum(1 for d in delays if t <= d < t + 0.1) for t in delays)
+    streams = [c.stream for c in clients]
+    return {
+        "attempts_while_down": attempts,
+        "reconnected": len(delays),
+        "reconnect_after_up_p50_s": round(float(np.percentile(delays, 50)), 2),
+        "reconnect_after_up_max_s": round(delays[-1], 2),
+        "peak_reconnects_per_100ms": peak,
+        "chunks_spooled": sum(s.chunks_spooled for s in streams),
+        "chunks_replayed": sum(s.chunks_replayed for s in streams),
+        "chunks_dropped": sum(s.chunks_dropped for s in streams),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--downtime", type=float, default=3)
+    parser.add_argument("--port", type=int, default=8794)
+    args = parser.parse_args()
+
+    pcm = _common.load_pcm()
+    chunks = [pcm[i:i + CHUNK_FRAMES].tobytes() for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES)]
+    report = {"clients": args.sessions}
+    for mode in MODES:
+        report[mode] = run(mode, args, chunks)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cost of sending one translated result: hex-in-JSON vs JSON + binary frame.
+
+For WAV clips of 1-10 s, measures server-side encode (encode_result) and
+client-side decode time plus bytes on the wire, for both result formats.
+
+    python benchmarks/bench_result_frames.py [--rate 24000] [--repeat 20]
+"""
+import argparse
+import io
+import json
+import time
+import wave
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.protocol import MSG_RESULT, RESULT_AUDIO_HEADER, encode_result
+
+
+def make_wav(seconds, rate):
+    samples = (np.sin(np.arange(int(seconds * rate)) * 0.05) * 8000).astype(np.int16)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+    return out.getvalue()
+
+
+def decode(frames):
+    data = json.loads(frames[0])["data"]
+    if "audio_bytes" in data:
+        return bytes.fromhex(data["audio_bytes"])
+    return frames[1][RESULT_AUDIO_HEADER.size:]
+
+
+def measure(wav_bytes, binary_audio, repeat):
+    package = {"type": MSG_RESULT, "data": {"text": "xin chào", "role": "user", "utterance_id": 1}}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        frames = encode_result(package, wav_bytes, binary_audio)
+    encode_ms = (time.perf_counter() - start) / repeat * 1000
+
+    frames = [f.encode("utf-8") if isinstance(f, str) else f for f in frames]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        audio = decode(frames)
+    decode_ms = (time.perf_counter() - start) / repeat * 1000
+    assert audio == wav_bytes
+
+    return {"encode_ms": encode_ms, "decode_ms": decode_ms, "wire_bytes": sum(len(f) for f in frames)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=24000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for seconds in (1, 2, 5, 10):
+        wav_bytes = make_wav(seconds, args.rate)
+        results.append({
+            "clip_seconds": seconds,
+            "wav_bytes": len(wav_bytes),
+            "hex_json": measure(wav_bytes, False, args.repeat),
+            "binary": measure(wav_bytes, True, args.repeat),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
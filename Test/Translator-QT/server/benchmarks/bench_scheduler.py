@@ -0,0 +1,76 @@
+"""Throughput and latency of InferenceScheduler against max batch size.
+
+Runs the stub backend (no GPU needed): `--sessions` producer threads each
+submit `--utterances` clips with random think time, for every batch size in
+`--batch-sizes`.
+
+    python benchmarks/bench_scheduler.py --sessions 32 --batch-sizes 1,2,4,8,16
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+import numpy as np
+
+import _common  # noqa: F401  (puts the server dir on sys.path)
+from modules.inference_scheduler import InferenceScheduler, StubBackend
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def run(batch_size, args):
+    backend = StubBackend(batch_latency=args.batch_latency, item_latency=args.item_latency)
+    scheduler = InferenceScheduler(backend, max_batch_size=batch_size, max_wait=args.max_wait_ms / 1000)
+    audio = np.zeros(16000 * 2, dtype=np.float32)
+    latencies = []
+    lock = threading.Lock()
+
+    def session(seed):
+        rng = random.Random(seed)
+        for _ in range(args.utterances):
+            time.sleep(rng.uniform(0, args.think_ms / 1000))
+            start = time.perf_counter()
+            scheduler.transcribe(audio, "vi")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stats = scheduler.stats()
+    scheduler.stop()
+
+    return {
+        "max_batch_size": batch_size,
+        "throughput_utt_per_s": len(latencies) / elapsed,
+        "avg_batch_size": stats["avg_batch_size"],
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--utterances", type=int, default=10)
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+    parser.add_argument("--max-wait-ms", type=float, default=50)
+    parser.add_argument("--think-ms", type=float, default=200)
+    parser.add_argument("--batch-latency", type=float, default=0.05)
+    parser.add_argument("--item-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    results = [run(int(b), args) for b in args.batch_sizes.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
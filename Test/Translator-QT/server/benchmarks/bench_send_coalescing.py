@@ -0,0 +1,93 @@
+"""Message rate and CPU of WebSocketPCMClient at several send coalescing budgets.
+
+Starts the server (stub STT) like loadgen.py. For each budget in `--budgets`
+(ms; 0 = one message per chunk, the old behaviour), runs `--sessions`
+pairs of real WebSocketPCMClients ("user" and "other"). A feeder thread
+hands each client one 1024-frame 48 kHz stereo chunk every 21.3 ms, like
+the audio callbacks. Reports:
+
+- messages/s per role stream
+- client CPU (this process: feeder, senders, receivers)
+- server CPU, both per second of wall time
+
+    python benchmarks/bench_send_coalescing.py [--sessions 10] [--seconds 15] [--budgets 0,20,40,80]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import _common
+from loadgen import CHUNK_FRAMES, cpu_seconds, start_server
+
+sys.path.insert(0, os.path.dirname(_common.SERVER_DIR))
+from stts.stream_sender import WebSocketPCMClient  # noqa: E402
+
+
+def run(url, server, budget_ms, args, chunks):
+    clients = [
+        WebSocketPCMClient(role, url, coalesce_ms=budget_ms)
+        for _ in range(args.sessions) for role in ("user", "other")
+    ]
+    for client in clients:
+        client.connect()
+    deadline = time.monotonic() + 10
+    while not all(c.connected for c in clients):
+        if time.monotonic() > deadline:
+            raise RuntimeError("clients did not connect")
+        time.sleep(0.05)
+
+    interval = CHUNK_FRAMES / 48000
+    cpu_client = time.process_time()
+    cpu_server = cpu_seconds(server.pid)
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < args.seconds:
+        chunk = chunks[i % len(chunks)]
+        for client in clients:
+            client.send_pcm_chunk(chunk)
+        i += 1
+        delay = start + i * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    for client in clients:
+        client.disconnect()
+    wall = time.monotonic() - start
+    cpu_client = time.process_time() - cpu_client
+    cpu_server = cpu_seconds(server.pid) - cpu_server
+
+    messages = sum(c.messages_sent for c in clients)
+    return {
+        "messages_per_s_per_stream": round(messages / wall / len(clients), 1),
+        "chunks_per_message": round(sum(c.chunks_sent for c in clients) / max(1, messages), 2),
+        "client_cpu_percent": round(cpu_client / wall * 100, 1),
+        "server_cpu_percent": round(cpu_server / wall * 100, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--budgets", default="0,20,40,80")
+    parser.add_argument("--port", type=int, default=8791)
+    args = parser.parse_args()
+
+    pcm = _common.load_pcm()
+    chunks = [pcm[i:i + CHUNK_FRAMES].tobytes() for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES)]
+    server = start_server(args.port, {})
+    url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    try:
+        report = {"streams": args.sessions * 2}
+        for budget in (int(b) for b in args.budgets.split(",")):
+            report[f"{budget}ms"] = run(url, server, budget, args, chunks)
+            time.sleep(1)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
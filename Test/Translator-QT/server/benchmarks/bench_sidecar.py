@@ -0,0 +1,152 @@
+"""Cost of handing utterances to the inference sidecar instead of an in-process scheduler.
+
+1. Round trip of one request at a time with a zero-latency stub model, for
+   clips of each of `--clip-seconds`: in-process scheduler, sidecar over
+   shared memory, and sidecar with the audio inline on the socket
+   (no slots). The difference is the handoff cost.
+2. `--workers` client processes (standing in for uvicorn workers), each
+   with `--threads` STT threads, sharing one sidecar with the default stub
+   latency. Reports throughput and the sidecar's batch size, i.e. whether
+   batches mix requests from different processes.
+
+    python benchmarks/bench_sidecar.py [--requests 500] [--workers 4] [--threads 8]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.inference_scheduler import InferenceScheduler, StubBackend
+from modules.inference_sidecar import InferenceSidecar, SidecarClient
+from modules.model_registry import ModelRegistry, load_model_settings
+
+
+def run_sidecar(socket_path, batch_latency, item_latency, max_wait):
+    os.environ["STT_BACKEND"] = "stub"
+    models = ModelRegistry()
+    handle = models.register("stt", load_model_settings(""))
+    models.load(background=False)
+    handle.backend.batch_latency = batch_latency
+    handle.backend.item_latency = item_latency
+    scheduler = InferenceScheduler(handle, max_batch_size=8, max_wait=max_wait)
+    InferenceSidecar(scheduler, models, socket_path).serve_forever()
+
+
+def start_sidecar(socket_path, batch_latency=0.0, item_latency=0.0, max_wait=0.0):
+    # A separate interpreter, like the real sidecar: forked children would share
+    # this process's resource tracker and fight over the shared memory segments
+    process = subprocess.Popen([
+        sys.executable, __file__, "--serve", socket_path, str(batch_latency), str(item_latency), str(max_wait),
+    ], stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("sidecar did not start")
+        time.sleep(0.05)
+    return process
+
+
+def round_trips(scheduler, audio, n):
+    scheduler.transcribe(audio, "vi")
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        scheduler.transcribe(audio, "vi")
+        times.append(time.perf_counter() - start)
+    return round(float(np.median(times)) * 1e6, 1)
+
+
+def worker(socket_path, threads, requests, results):
+    client = SidecarClient(socket_path, slots=threads)
+    audio = np.zeros(16000 * 3, dtype=np.float32)
+
+    def loop():
+        for _ in range(requests):
+            client.transcribe(audio, "vi")
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(client.stats())
+    client.close()
+
+
+def main():
+    if sys.argv[1:2] == ["--serve"]:
+        path, batch_latency, item_latency, max_wait = sys.argv[2:6]
+        return run_sidecar(path, float(batch_latency), float(item_latency), float(max_wait))
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--clip-seconds", default="1,5,15")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests-per-thread", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    report = {"round_trip_us": {}}
+
+    socket_path = os.path.join(tmp, "rtt.sock")
+    sidecar = start_sidecar(socket_path)
+    in_process = InferenceScheduler(StubBackend(0, 0), max_batch_size=8, max_wait=0)
+    shared = SidecarClient(socket_path)
+    inline = SidecarClient(socket_path, slots=0)
+    for seconds in (float(s) for s in args.clip_seconds.split(",")):
+        audio = np.random.default_rng(0).standard_normal(int(seconds * 16000)).astype(np.float32)
+        report["round_trip_us"][f"{seconds:g}s"] = {
+            "in_process": round_trips(in_process, audio, args.requests),
+            "sidecar_shared_memory": round_trips(shared, audio, args.requests),
+            "sidecar_inline": round_trips(inline, audio, args.requests),
+        }
+    in_process.stop()
+    shared.close()
+    inline.close()
+    sidecar.kill()
+
+    socket_path = os.path.join(tmp, "load.sock")
+    sidecar = start_sidecar(socket_path, batch_latency=0.05, item_latency=0.01, max_wait=0.01)
+    results = multiprocessing.Queue()
+    start = time.perf_counter()
+    workers = [
+        multiprocessing.Process(target=worker, args=(socket_path, args.threads, args.requests_per_thread, results))
+        for _ in range(args.workers)
+    ]
+    for w in workers:
+        w.start()
+    client_stats = [results.get() for _ in workers]
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    status = SidecarClient(socket_path)
+    status.status()
+    time.sleep(0.2)
+    scheduler_stats = status.status()["scheduler"]
+    status.close()
+    sidecar.kill()
+
+    total = args.workers * args.threads * args.requests_per_thread
+    report["shared_sidecar"] = {
+        "worker_processes": args.workers,
+        "requests": total,
+        "requests_per_s": round(total / elapsed, 1),
+        "avg_batch_size": round(scheduler_stats["avg_batch_size"], 2),
+        "max_batch_size": 8,
+        "inline_requests": sum(s["inline_requests"] for s in client_stats),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
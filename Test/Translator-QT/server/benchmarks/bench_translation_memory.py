@@ -0,0 +1,102 @@
+"""Translation memory hit rate and latency for a call-center-like phrase mix.
+
+Utterances are drawn from `--phrases` distinct phrases with a Zipf
+distribution (a few phrases repeat constantly). The backend is a stub that
+sleeps `--backend-ms` per batch. Reports:
+
+- hit rate for several LRU sizes, to help pick TRANSLATION_MEMORY_ENTRIES
+- per-utterance latency without and with the memory
+- hit rate right after a restart with the SQLite store warm-loaded
+- one batched lookup vs one lookup per text, against SQLite
+
+    python benchmarks/bench_translation_memory.py [--calls 20000] [--phrases 5000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.translation_memory import TranslationMemory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--phrases", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--backend-ms", type=float, default=2)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ranks = np.minimum(rng.zipf(args.zipf, args.calls), args.phrases)
+    calls = [f"câu số {rank}" for rank in ranks]
+    backend_calls = 0
+
+    def translate_batch(texts, src, tgt):
+        nonlocal backend_calls
+        backend_calls += 1
+        time.sleep(args.backend_ms / 1000)
+        return [f"{text} [{src}->{tgt}]" for text in texts]
+
+    result = {"calls": args.calls, "distinct_phrases": len(set(calls)), "hit_rate_by_size": {}}
+
+    start = time.perf_counter()
+    for text in calls[:2000]:
+        translate_batch([text], "vi", "ja")
+    result["uncached_ms_per_call"] = round((time.perf_counter() - start) / 2000 * 1000, 3)
+
+    for size in map(int, args.sizes.split(",")):
+        memory = TranslationMemory(max_entries=size)
+        backend_calls = 0
+        start = time.perf_counter()
+        for text in calls:
+            memory.translate([text], "vi", "ja", translate_batch)
+        elapsed = time.perf_counter() - start
+        result["hit_rate_by_size"][size] = {
+            "hit_rate": round(memory.stats()["hit_rate"], 4),
+            "ms_per_call": round(elapsed / len(calls) * 1000, 3),
+            "backend_calls": backend_calls,
+        }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tm.sqlite3")
+        first = TranslationMemory(path, max_entries=1000)
+        for text in calls[:len(calls) // 2]:
+            first.translate([text], "vi", "ja", translate_batch)
+        first.close()
+
+        start = time.perf_counter()
+        restarted = TranslationMemory(path, max_entries=1000)
+        warm_ms = (time.perf_counter() - start) * 1000
+        for text in calls[len(calls) // 2:]:
+            restarted.translate([text], "vi", "ja", translate_batch)
+        stats = restarted.stats()
+        result["restart"] = {
+            "warm_load_ms": round(warm_ms, 1),
+            "hit_rate": round(stats["hit_rate"], 4),
+            "disk_hits": stats["disk_hits"],
+            "rows": stats["rows"],
+        }
+
+        cold = TranslationMemory(path, max_entries=1000, warm_entries=0)
+        texts = list(dict.fromkeys(calls))[:500]
+        start = time.perf_counter()
+        for text in texts:
+            cold.get(text, "vi", "ja")
+        single_ms = (time.perf_counter() - start) * 1000
+        cold = TranslationMemory(path, max_entries=1000, warm_entries=0)
+        start = time.perf_counter()
+        cold.get_many(texts, "vi", "ja")
+        batch_ms = (time.perf_counter() - start) * 1000
+        result["sqlite_lookup_500"] = {"single_ms": round(single_ms, 2), "batch_ms": round(batch_ms, 2)}
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
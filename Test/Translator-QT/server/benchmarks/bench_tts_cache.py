@@ -0,0 +1,94 @@
+"""Cached vs uncached TTS round trips.
+
+The phrase stream mimics a call: a few short phrases ("yes", "thank you",
+greetings) repeat often (Zipf-distributed), the rest are one-offs. The
+dummy synthesizer reads a `--clip-seconds` 24 kHz mono WAV from disk, like
+the server's sample.wav stand-in; the uncached path reads and base64s it on
+every call, as the server did before. Also measures a restart that is
+served from the on-disk cache.
+
+    python benchmarks/bench_tts_cache.py [--calls 5000] [--phrases 200] [--clip-seconds 1.5]
+"""
+import argparse
+import base64
+import json
+import os
+import shutil
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.tts_cache import TTSCache
+
+
+def write_clip(path, seconds, rate=24000):
+    samples = (np.sin(np.arange(int(seconds * rate)) * 0.05) * 8000).astype(np.int16)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+
+
+def run(calls, fn):
+    start = time.perf_counter()
+    for text in calls:
+        fn(text)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--phrases", type=int, default=200)
+    parser.add_argument("--zipf", type=float, default=1.3)
+    parser.add_argument("--clip-seconds", type=float, default=1.5)
+    parser.add_argument("--max-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    clip = os.path.join(work_dir, "clip.wav")
+    write_clip(clip, args.clip_seconds)
+
+    def synthesize(text, language, voice):
+        with open(clip, "rb") as f:
+            return f.read()
+
+    rng = np.random.default_rng(0)
+    ranks = np.minimum(rng.zipf(args.zipf, args.calls), args.phrases)
+    calls = [f"phrase {rank}" for rank in ranks]
+
+    uncached_us = run(calls, lambda text: base64.b64encode(synthesize(text, "ja", "")).decode("utf-8"))
+
+    cache = TTSCache(args.max_mb * 2**20)
+    cached_us = run(calls, lambda text: cache.get_encoded(text, "ja", "", synthesize))
+    memory_stats = cache.stats()
+
+    cache_dir = os.path.join(work_dir, "cache")
+    try:
+        warm = TTSCache(args.max_mb * 2**20, cache_dir)
+        for text in set(calls):
+            warm.get_or_synthesize(text, "ja", "", synthesize)
+        restarted = TTSCache(args.max_mb * 2**20, cache_dir)
+        disk_us = run(calls, lambda text: restarted.get_encoded(text, "ja", "", synthesize))
+        disk_stats = restarted.stats()
+    finally:
+        shutil.rmtree(work_dir)
+
+    print(json.dumps({
+        "calls": args.calls,
+        "distinct_phrases": len(set(calls)),
+        "uncached_us_per_call": round(uncached_us, 1),
+        "cached_us_per_call": round(cached_us, 1),
+        "speedup": round(uncached_us / cached_us, 1),
+        "cache": memory_stats,
+        "restart_from_disk_us_per_call": round(disk_us, 1),
+        "restart_from_disk": disk_stats,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
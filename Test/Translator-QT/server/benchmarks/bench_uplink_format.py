@@ -0,0 +1,115 @@
+"""Uplink bandwidth and server DSP cost: 48 kHz stereo vs client-resampled mono 16 kHz.
+
+First checks that the client's Downsampler (stts/dsp.py) followed by the
+server's 16 kHz fast path gives the same signal as the server's own 48 kHz
+path (PolyphaseDecimator). Then starts the server (stub STT) like loadgen.py
+once per uplink mode and connects `--sessions` clients, each with a "user"
+and an "other" WebSocketPCMClient on a ClientTransport of its own. Every
+stream gets one 1024-frame 48 kHz stereo chunk every 21.3 ms. Reports:
+
+- PCM bytes sent per second per stream
+- server CPU, per second of wall time
+- the server's DSP stage latency
+- client CPU, per second of wall time
+
+    python benchmarks/bench_uplink_format.py [--sessions 10] [--seconds 15]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import _common
+from loadgen import CHUNK_FRAMES, cpu_seconds, fetch_stats, start_server
+from modules.dsp import PolyphaseDecimator
+
+sys.path.insert(0, os.path.dirname(_common.SERVER_DIR))
+from stts import transport as client_transport  # noqa: E402
+from stts.dsp import Downsampler  # noqa: E402
+from stts.stream_sender import WebSocketPCMClient  # noqa: E402
+
+MODES = {"48k_stereo": None, "16k_mono": 16000}
+
+
+def signal_difference(pcm):
+    """Largest difference, in int16 steps, between the two paths to 16 kHz float."""
+    server_path = PolyphaseDecimator(48000, 16000, 2, cutoff=3000)
+    client_path = Downsampler(48000, 16000, 2, cutoff=3000)
+    expected, got = [], []
+    for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES):
+        expected.append(server_path.process(pcm[i:i + CHUNK_FRAMES]))
+        got.append(client_path.process(pcm[i:i + CHUNK_FRAMES]) / 32768)
+    expected, got = np.concatenate(expected), np.concatenate(got)
+    return float(np.abs(expected - got).max() * 32768)
+
+
+def run(mode, args, chunks):
+    default = client_transport.UPLINK_RATE
+    client_transport.UPLINK_RATE = MODES[mode]
+    server = start_server(args.port, {})
+    base = f"http://127.0.0.1:{args.port}"
+    url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    try:
+        transports = [client_transport.ClientTransport() for _ in range(args.sessions)]
+        clients = [WebSocketPCMClient(role, url, transport=t) for t in transports for role in ("user", "other")]
+        for client in clients:
+            client.connect()
+        deadline = time.monotonic() + 10
+        while not all(c.connected for c in clients):
+            if time.monotonic() > deadline:
+                raise RuntimeError("clients did not connect")
+            time.sleep(0.05)
+
+        interval = CHUNK_FRAMES / 48000
+        cpu_client = time.process_time()
+        cpu_server = cpu_seconds(server.pid)
+        start = time.monotonic()
+        i = 0
+        while time.monotonic() - start < args.seconds:
+            chunk = chunks[i % len(chunks)]
+            for client in clients:
+                client.send_pcm_chunk(chunk)
+            i += 1
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        for client in clients:
+            client.disconnect()
+        wall = time.monotonic() - start
+        cpu_client = time.process_time() - cpu_client
+        cpu_server = cpu_seconds(server.pid) - cpu_server
+        dsp = fetch_stats(base)["latency"].get("dsp", {})
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        client_transport.UPLINK_RATE = default
+
+    return {
+        "bytes_per_s_per_stream": round(sum(c.bytes_sent for c in clients) / wall / len(clients)),
+        "server_cpu_percent": round(cpu_server / wall * 100, 1),
+        "server_dsp_mean_ms": dsp.get("mean_ms"),
+        "client_cpu_percent": round(cpu_client / wall * 100, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8797)
+    args = parser.parse_args()
+
+    pcm = _common.load_pcm()
+    chunks = [pcm[i:i + CHUNK_FRAMES].tobytes() for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES)]
+    report = {"streams": args.sessions * 2, "max_signal_difference_lsb": round(signal_difference(pcm), 2)}
+    for mode in MODES:
+        report[mode] = run(mode, args, chunks)
+        time.sleep(1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
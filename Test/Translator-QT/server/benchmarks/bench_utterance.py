@@ -0,0 +1,81 @@
+"""Memory per active speaker and CPU per utterance for utterance accumulation.
+
+"legacy" mirrors the old AudioBuffer: every speech frame kept twice (16 kHz
+float frame list + 48 kHz stereo bytes), then concatenated, joined and the
+raw PCM downmixed and resampled again with resampy for STT. "arena" is the
+Endpointer + UtteranceArena path, handing a zero-copy 16 kHz view to STT.
+
+    python benchmarks/bench_utterance.py [--seconds 10] [--repeat 5]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+import _common  # noqa: F401
+from modules.endpointer import Endpointer, END
+
+FRAME_SAMPLES_16K = 320
+FRAME_SAMPLES_48K = 960
+
+
+def legacy(frames_16k, frames_48k):
+    import resampy  # type: ignore
+
+    frames, raw_frames = [], []
+    for frame, raw in zip(frames_16k, frames_48k):
+        frames.append(frame.reshape(-1, 1).copy())
+        raw_frames.append(raw.tobytes())
+    audio = np.concatenate(frames, axis=0)
+    raw_pcm = b"".join(raw_frames)
+    samples = np.frombuffer(raw_pcm, dtype=np.int16).reshape(-1, 2)
+    mono = samples.mean(axis=1).astype(np.float32) / 32768.0
+    return audio, resampy.resample(mono, 48000, 16000)
+
+
+def arena(frames_16k, frames_48k, endpointer=None):
+    endpointer = endpointer or Endpointer(hangover_ms=20)
+    for frame in frames_16k:
+        endpointer.push(frame, True, 0.1)
+    for event, audio, _ in endpointer.push(frames_16k[0], False, 0.0):
+        if event == END:
+            return audio
+
+
+def measure(fn, frames_16k, frames_48k, repeat):
+    fn(frames_16k, frames_48k)
+    tracemalloc.start()
+    fn(frames_16k, frames_48k)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(frames_16k, frames_48k)
+    cpu = (time.process_time() - start) / repeat
+    return {"peak_bytes_per_speaker": peak, "cpu_ms_per_utterance": cpu * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    n = int(args.seconds * 50)
+    rng = np.random.default_rng(0)
+    frames_16k = list(rng.standard_normal((n, FRAME_SAMPLES_16K)).astype(np.float32) * 0.1)
+    frames_48k = list((rng.standard_normal((n, FRAME_SAMPLES_48K, 2)) * 3000).astype(np.int16))
+
+    results = {"utterance_seconds": args.seconds, "arena": measure(arena, frames_16k, frames_48k, args.repeat)}
+    try:
+        results["legacy"] = measure(legacy, frames_16k, frames_48k, args.repeat)
+    except ImportError as e:
+        print(f"[BENCH] Skipping legacy path: {e}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
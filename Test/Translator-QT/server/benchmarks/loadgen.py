@@ -0,0 +1,366 @@
+"""Load generator and capacity benchmark for /ws/audio.
+
+Starts server/main.py (uvicorn, STT_BACKEND=stub) as a subprocess, unless
+`--url` points at a running server. With `--sidecar` STT runs in an
+inference sidecar process shared by the `--workers` uvicorn workers. It then opens `--sessions` sessions.
+Each session is a "user" and an "other" stream multiplexed on one
+connection, like the desktop app's ClientTransport. With `--per-role`
+each stream gets a connection of its own instead (the client with
+MULTIPLEX off). Streams speak the client's framing: stts/protocol.py, the
+same negotiation query and hello, v2 records with a control message per
+role, or v1 JSON headers with `--protocol 1`.
+
+Each stream replays `--wav` as 1024-frame 48 kHz stereo chunks (the mic
+block size) at `--speed` times real time. Chunks go through a bounded send
+queue like WebSocketPCMClient's. A chunk that finds the queue full is
+dropped and counted. With `--uplink-format`, streams whose server grants
+the uplink_format capability send each chunk as the client does: resampled
+to mono 16 kHz by stts/dsp.py, with the format declared per role.
+
+End-to-end latency is measured on the client clock: results carry
+`speech_end_ts`, the client's send stamp of the utterance's last voiced
+chunk. A result's latency is its arrival time minus that stamp.
+
+One JSON object goes to stdout:
+
+- sessions per server core
+- message rates
+- latency p50/p95/p99
+- dropped frames on both the client and server side
+
+    python benchmarks/loadgen.py --sessions 20 --seconds 30
+    python benchmarks/loadgen.py --sessions 50 --speed 2 --procs 2 > run.json
+    python benchmarks/loadgen.py --sessions 50 --sidecar --workers 2
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+
+from _common import DEFAULT_WAV, SERVER_DIR, load_pcm
+
+sys.path.insert(0, os.path.dirname(SERVER_DIR))
+from stts.protocol import (  # noqa: E402
+    PROTOCOL_V1, PROTOCOL_V2, MSG_HELLO, MSG_RESULT, RESULT_AUDIO_HEADER, CAP_UPLINK_FORMAT,
+    pack_v1, pack_v2, control_message, protocol_query,
+)
+from stts.dsp import Downsampler  # noqa: E402
+from stts.transport import UPLINK_CUTOFF, UPLINK_RATE  # noqa: E402
+
+CHUNK_FRAMES = 1024
+SEND_QUEUE_SIZE = 500  # WebSocketPCMClient.send_queue
+LANGUAGES = {"user": ("vi", "ja"), "other": ("ja", "vi")}
+
+
+def cpu_seconds(pid):
+    """CPU time of `pid` and its live descendants (uvicorn workers)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        total = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                total += sum(cpu_seconds(int(child)) or 0 for child in f.read().split())
+        return total
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def server_cpu_seconds(server, sidecar):
+    if not server:
+        return None
+    total = cpu_seconds(server.pid)
+    if sidecar and total is not None:
+        total += cpu_seconds(sidecar.pid) or 0
+    return total
+
+
+def fetch_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/sessions", timeout=5) as response:
+        return json.load(response)
+
+
+def start_sidecar(socket_path, env_overrides):
+    env = {**os.environ, "STT_BACKEND": "stub", **env_overrides}
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    sidecar = subprocess.Popen(
+        [sys.executable, "-m", "modules.inference_sidecar", "--socket", socket_path],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while not os.path.exists(socket_path):
+        if sidecar.poll() is not None or time.monotonic() > deadline:
+            sidecar.kill()
+            raise RuntimeError("sidecar did not start")
+        time.sleep(0.2)
+    return sidecar
+
+
+def start_server(port, env_overrides, workers=1):
+    env = {**os.environ, "STT_BACKEND": "stub", **env_overrides}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+         "--workers", str(workers)],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            fetch_stats(f"http://127.0.0.1:{port}")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+class Stream:
+    def __init__(self, role, protocol):
+        self.role = role
+        self.protocol = protocol
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.latencies = []
+        self.errors = 0
+        self.uplink = "48k_stereo"
+        self.bytes_sent = 0
+
+
+async def run_connection(url, roles, requested_protocol, uplinks, args, t_end):
+    """One connection carrying the streams of `roles`; returns their Streams.
+
+    `uplinks` maps an uplink name to (rate, channels, chunks).
+    """
+    streams = {role: Stream(role, requested_protocol) for role in roles}
+    query = protocol_query() if requested_protocol == PROTOCOL_V2 else ""
+    clock = time.monotonic if requested_protocol == PROTOCOL_V2 else time.time
+    try:
+        ws = await websockets.connect(f"{url}?{query}" if query else url, max_size=None, compression=None)
+    except Exception:
+        for stream in streams.values():
+            stream.errors += 1
+        return list(streams.values())
+
+    protocol = PROTOCOL_V1
+    capabilities = []
+    if query:
+        hello = json.loads(await ws.recv())
+        if hello.get("type") == MSG_HELLO:
+            protocol = hello["protocol"]
+            capabilities = hello.get("capabilities", [])
+    uplink = "16k_mono" if "16k_mono" in uplinks and CAP_UPLINK_FORMAT in capabilities else "48k_stereo"
+    rate, channels, chunks = uplinks[uplink]
+    for stream in streams.values():
+        stream.protocol = protocol
+        stream.uplink = uplink
+
+    async def producer(stream, send_queue):
+        # The audio device: one chunk every CHUNK_FRAMES / 48000 / speed seconds
+        interval = CHUNK_FRAMES / 48000 / args.speed
+        start = time.monotonic()
+        i = 0
+        while time.monotonic() < t_end:
+            try:
+                send_queue.put_nowait(chunks[i % len(chunks)])
+            except asyncio.QueueFull:
+                stream.dropped += 1
+            i += 1
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await send_queue.put(None)
+
+    async def sender(stream, send_queue):
+        role = stream.role
+        src_lang, tgt_lang = LANGUAGES[role]
+        seq = 0
+        if protocol == PROTOCOL_V2:
+            await ws.send(control_message(role, src_lang, tgt_lang, "pcm_s16le", rate, channels, 2))
+        while True:
+            pcm = await send_queue.get()
+            if pcm is None:
+                return
+            if protocol == PROTOCOL_V2:
+                message = pack_v2(role, seq, time.monotonic_ns() // 1000, pcm)
+            else:
+                message = pack_v1({
+                    "sender": role, "src_lang": src_lang, "tgt_lang": tgt_lang, "format": "pcm_s16le",
+                    "rate": rate, "channels": channels, "sample_width": 2, "timestamp": time.time(),
+                }, pcm)
+            await ws.send(message)
+            seq += 1
+            stream.sent += 1
+            stream.bytes_sent += len(pcm)
+
+    async def receiver():
+        audio_roles = {}  # utterance id -> role of a result whose audio follows as a binary frame
+        async for message in ws:
+            if isinstance(message, bytes):
+                role = audio_roles.pop(RESULT_AUDIO_HEADER.unpack_from(message)[0], roles[0])
+                streams[role].received += 1
+                continue
+            try:
+                data = json.loads(message)
+            except ValueError:
+                # "ping" is per connection; counted once, on the first role
+                streams[roles[0]].received += 1
+                continue
+            result = data.get("data", {})
+            stream = streams.get(result.get("role"), streams[roles[0]])
+            stream.received += 1
+            if data.get("type") == MSG_RESULT:
+                if "audio_length" in result:
+                    audio_roles[result["utterance_id"]] = stream.role
+                if "speech_end_ts" in result:
+                    stream.latencies.append(clock() - result["speech_end_ts"])
+
+    receive_task = asyncio.create_task(receiver())
+    try:
+        tasks = []
+        for stream in streams.values():
+            send_queue = asyncio.Queue(SEND_QUEUE_SIZE)
+            tasks += [producer(stream, send_queue), sender(stream, send_queue)]
+        await asyncio.gather(*tasks)
+        # Let results of the last utterances arrive
+        await asyncio.sleep(args.drain)
+    except Exception:
+        for stream in streams.values():
+            stream.errors += 1
+    finally:
+        receive_task.cancel()
+        await ws.close()
+    return list(streams.values())
+
+
+async def run_sessions(url, sessions, protocol, uplinks, args, t_end):
+    connections = [("user",), ("other",)] if args.per_role else [("user", "other")]
+    results = await asyncio.gather(*(
+        run_connection(url, roles, protocol, uplinks, args, t_end)
+        for _ in range(sessions) for roles in connections
+    ))
+    return [stream for streams in results for stream in streams]
+
+
+def client_process(url, sessions, protocol, args, t_end, results):
+    pcm = load_pcm(args.wav)
+    chunks = [pcm[i:i + CHUNK_FRAMES].tobytes() for i in range(0, len(pcm) - CHUNK_FRAMES + 1, CHUNK_FRAMES)]
+    uplinks = {"48k_stereo": (48000, 2, chunks)}
+    if args.uplink_format:
+        # Resampled once up front: the server sees the client's output without
+        # the client's DSP cost landing in every stream of this process
+        downsampler = Downsampler(48000, UPLINK_RATE, 2, cutoff=UPLINK_CUTOFF)
+        uplinks["16k_mono"] = (UPLINK_RATE, 1, [downsampler.process(chunk).tobytes() for chunk in chunks])
+    streams = asyncio.run(run_sessions(url, sessions, protocol, uplinks, args, t_end))
+    results.put([s.__dict__ for s in streams])
+
+
+def percentile_ms(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 1 = real time")
+    parser.add_argument("--protocol", type=int, choices=(PROTOCOL_V1, PROTOCOL_V2), default=PROTOCOL_V2)
+    parser.add_argument("--per-role", action="store_true", help="one connection per stream instead of per session")
+    parser.add_argument("--uplink-format", action="store_true", help="send mono 16 kHz where the server accepts it")
+    parser.add_argument("--procs", type=int, default=1, help="client processes")
+    parser.add_argument("--drain", type=float, default=3, help="seconds to wait for late results")
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--url", help="existing server, e.g. ws://host:8000/ws/audio")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--server-env", action="append", default=[], help="KEY=VALUE for the started server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the started server")
+    parser.add_argument("--sidecar", action="store_true", help="run STT in a shared inference sidecar")
+    args = parser.parse_args()
+
+    server = sidecar = None
+    if args.url:
+        url = args.url
+    else:
+        env = dict(item.split("=", 1) for item in args.server_env)
+        if args.sidecar:
+            socket_path = f"/tmp/loadgen-stt-{args.port}.sock"
+            sidecar = start_sidecar(socket_path, env)
+            env.update(STT_MODE="sidecar", STT_SIDECAR_SOCKET=socket_path)
+        server = start_server(args.port, env, args.workers)
+        url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    base_url = url.replace("ws://", "http://").replace("wss://", "https://").rsplit("/ws/audio", 1)[0]
+
+    try:
+        before = fetch_stats(base_url)
+        cpu_before = server_cpu_seconds(server, sidecar)
+        wall_start = time.monotonic()
+        t_end = time.monotonic() + args.seconds
+
+        results = multiprocessing.Queue()
+        per_proc = [args.sessions // args.procs + (i < args.sessions % args.procs) for i in range(args.procs)]
+        procs = [
+            multiprocessing.Process(target=client_process, args=(url, n, args.protocol, args, t_end, results))
+            for n in per_proc if n
+        ]
+        for proc in procs:
+            proc.start()
+        streams = [s for _ in procs for s in results.get()]
+        for proc in procs:
+            proc.join()
+
+        wall = time.monotonic() - wall_start
+        cpu_after = server_cpu_seconds(server, sidecar)
+        after = fetch_stats(base_url)
+    finally:
+        for process in (server, sidecar):
+            if process:
+                process.terminate()
+                process.wait(timeout=10)
+
+    latencies = [v for s in streams for v in s["latencies"]]
+    sent = sum(s["sent"] for s in streams)
+    server_dropped = {
+        kind: {reason: n - before["shed"].get(kind, {}).get(reason, 0) for reason, n in reasons.items()}
+        for kind, reasons in after["shed"].items()
+    }
+    cores = None
+    if cpu_before is not None and cpu_after is not None:
+        cores = (cpu_after - cpu_before) / wall
+
+    print(json.dumps({
+        "sessions": args.sessions,
+        "streams": len(streams),
+        "protocol": sorted({s["protocol"] for s in streams}),
+        "multiplexed": not args.per_role,
+        "uplink": sorted({s["uplink"] for s in streams}),
+        "speed": args.speed,
+        "seconds": args.seconds,
+        "cpu_count": os.cpu_count(),
+        "server_cpu_cores_used": round(cores, 3) if cores is not None else None,
+        "sessions_per_core": round(args.sessions / cores, 1) if cores else None,
+        "messages_sent_per_s": round(sent / args.seconds, 1),
+        "pcm_bytes_sent_per_s": round(sum(s["bytes_sent"] for s in streams) / args.seconds),
+        "messages_received_per_s": round(sum(s["received"] for s in streams) / args.seconds, 1),
+        "results": len(latencies),
+        "latency_p50_ms": percentile_ms(latencies, 50),
+        "latency_p95_ms": percentile_ms(latencies, 95),
+        "latency_p99_ms": percentile_ms(latencies, 99),
+        "client_dropped_frames": sum(s["dropped"] for s in streams),
+        "server_dropped": server_dropped,
+        "connection_errors": sum(s["errors"] for s in streams),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Open and close many /ws/audio sessions and check that nothing leaks.
+
+Starts the app in-process (stub STT) on its own event-loop thread, then
+runs `--sessions` short websocket sessions, `--concurrency` at a time. Each
+one streams `--audio-seconds` of speech as fast as it can and disconnects.
+Every `--sample-every` sessions the /sessions stats, thread count and RSS
+are recorded. Exits non-zero if, once everything is closed, sessions are
+still registered, threads grew, or RSS grew by more than `--max-rss-growth-mb`
+compared to the first sample.
+
+    python benchmarks/soak_sessions.py --sessions 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+os.environ.setdefault("STT_BACKEND", "stub")
+
+import uvicorn
+import websockets
+
+from _common import DEFAULT_WAV, load_pcm
+from modules.protocol import pack_v2
+
+CHUNK_FRAMES = 1024
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def serve(port, stop, ready):
+    from main import app
+
+    async def main():
+        server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+        serve_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        server.should_exit = True
+        await serve_task
+
+    asyncio.run(main())
+
+
+def fetch_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/sessions") as response:
+        return json.load(response)
+
+
+async def session(url, role, chunks):
+    async with websockets.connect(url + "?protocol=2&caps=binary_audio", max_size=None, compression=None) as ws:
+        await ws.recv()  # hello
+        for seq, chunk in enumerate(chunks):
+            await ws.send(pack_v2(role, seq, time.monotonic_ns() // 1000, chunk))
+
+
+async def soak(args, chunks):
+    url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+    done = 0
+
+    async def one(i):
+        nonlocal done
+        async with semaphore:
+            try:
+                await session(url, "user" if i % 2 else "other", chunks)
+            except Exception as e:
+                print(f"[SOAK] session {i} failed: {e}")
+        done += 1
+        if done % args.sample_every == 0:
+            n = done
+            stats = await loop.run_in_executor(None, fetch_stats, args.port)
+            samples.append({"done": n, "rss_mb": rss_mb(), **stats})
+            print(json.dumps(samples[-1]))
+
+    await asyncio.gather(*(one(i) for i in range(args.sessions)))
+
+    # Let in-flight pipeline work and closing handshakes finish
+    deadline = time.monotonic() + args.settle
+    while True:
+        stats = await loop.run_in_executor(None, fetch_stats, args.port)
+        if (stats["sessions"] == 0 and stats["queued_utterances"] == 0) or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.2)
+    await asyncio.sleep(0.5)
+    stats = await loop.run_in_executor(None, fetch_stats, args.port)
+    return samples, {"done": done, "rss_mb": rss_mb(), **stats}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--audio-seconds", type=float, default=2)
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--settle", type=float, default=10)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=30)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    args = parser.parse_args()
+
+    pcm = load_pcm(args.wav)
+    n_chunks = int(args.audio_seconds * 48000 / CHUNK_FRAMES)
+    chunks = [pcm[i * CHUNK_FRAMES:(i + 1) * CHUNK_FRAMES].tobytes() for i in range(n_chunks)]
+
+    stop, ready = threading.Event(), threading.Event()
+    server_thread = threading.Thread(target=serve, args=(args.port, stop, ready), daemon=True)
+    server_thread.start()
+    ready.wait()
+
+    samples, final = asyncio.run(soak(args, chunks))
+    stop.set()
+    server_thread.join(timeout=5)
+
+    first = samples[0] if samples else final
+    failures = []
+    if final["sessions"]:
+        failures.append(f"{final['sessions']} sessions still registered")
+    if final["threads"] > first["threads"]:
+        failures.append(f"threads grew from {first['threads']} to {final['threads']}")
+    if first["rss_mb"] is not None and final["rss_mb"] - first["rss_mb"] > args.max_rss_growth_mb:
+        failures.append(f"RSS grew by {final['rss_mb'] - first['rss_mb']:.1f} MB")
+
+    result = {"first": first, "final": final, "failures": failures, "passed": not failures}
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 from fastapi import FastAPI
-from audio_router import router
+from fastapi.responses import PlainTextResponse
+from audio_router import router, prometheus_metrics
 
 app = FastAPI()
 app.include_router(router)
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return prometheus_metrics()
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+def design_lowpass(num_taps: int, cutoff: float, sample_rate: int) -> np.ndarray:
+    """Windowed-sinc (Hamming) low-pass FIR with unity DC gain."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    fc = cutoff / sample_rate
+    taps = 2 * fc * np.sinc(2 * fc * n) * np.hamming(num_taps)
+    return taps / taps.sum()
+
+
+class PolyphaseDecimator:
+    """Streaming anti-alias low-pass + integer decimator for int16 PCM.
+
+    Takes interleaved int16 blocks of any length at `in_rate` and returns mono
+    float32 in [-1, 1) at `out_rate`. Filter history and decimation phase are
+    carried across calls, so consecutive frames are filtered as one continuous
+    signal instead of being reset at every frame edge.
+    """
+
+    def __init__(self, in_rate=48000, out_rate=16000, channels=2, cutoff=3000.0, num_taps=96):
+        if in_rate % out_rate:
+            raise ValueError(f"in_rate {in_rate} is not a multiple of out_rate {out_rate}")
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.factor = in_rate // out_rate
+
+        # Round up so every polyphase branch has the same length
+        num_taps += -num_taps % self.factor
+        taps = design_lowpass(num_taps, cutoff, in_rate)[::-1]
+        # Channel averaging and int16 -> float scaling are folded into the taps
+        taps = (taps / (channels * 32768.0)).astype(np.float32)
+        self.num_taps = num_taps
+        self._branches = [taps[q::self.factor].copy() for q in range(self.factor)]
+        self._branch_len = num_taps // self.factor
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(self.num_taps - 1, dtype=np.float32)
+        self._phase = 0
+
+    def process(self, pcm) -> np.ndarray:
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            pcm = np.frombuffer(pcm, dtype=np.int16)
+        samples = pcm.reshape(-1, self.channels)
+        mono = samples.sum(axis=1, dtype=np.float32) if self.channels > 1 else samples[:, 0].astype(np.float32)
+
+        x = np.concatenate((self._history, mono))
+        n_windows = len(x) - self.num_taps + 1
+        n_out = max(0, -(-(n_windows - self._phase) // self.factor))
+
+        out = np.zeros(n_out, dtype=np.float32)
+        if n_out:
+            span = n_out + self._branch_len - 1
+            for q, branch in enumerate(self._branches):
+                start = self._phase + q
+                out += np.correlate(x[start:start + span * self.factor:self.factor], branch, "valid")
+
+        self._phase = (self._phase - n_windows) % self.factor
+        self._history = x[len(x) - (self.num_taps - 1):]
+        return out
+
+
+def frame_energies(frames: np.ndarray) -> np.ndarray:
+    """RMS of each frame of a (n, samples, ...) float block."""
+    flat = frames.reshape(len(frames), -1)
+    return np.sqrt(np.einsum("ij,ij->i", flat, flat) / flat.shape[1])
+
+
+class EnergyGate:
+    """Adaptive noise-floor gate that marks clearly silent frames, ahead of the VAD.
+
+    The noise floor follows the quietest frame of each block: it drops to a
+    quieter block minimum at once and otherwise rises by `rise_db_per_s`,
+    so it tracks background noise rather than speech. A frame is silent
+    when its RMS is below the floor plus `margin_db`. The threshold is kept
+    between `min_dbfs` and `max_dbfs`, so loud frames always reach the VAD.
+    """
+
+    def __init__(self, frame_ms=20, margin_db=6.0, rise_db_per_s=3.0, min_dbfs=-70.0, max_dbfs=-46.0):
+        self.margin = 10 ** (margin_db / 20)
+        self.rise_per_frame = 10 ** (rise_db_per_s * frame_ms / 1000 / 20)
+        self.min_threshold = 10 ** (min_dbfs / 20)
+        self.max_threshold = 10 ** (max_dbfs / 20)
+        # Lower floors all give the min_dbfs threshold; clamping also keeps a block
+        # of digital silence from pinning the floor at 0, where it could never rise
+        self.min_floor = self.min_threshold / self.margin
+        self.floor = None
+
+    @property
+    def threshold(self):
+        if self.floor is None:
+            return self.min_threshold
+        return min(max(self.floor * self.margin, self.min_threshold), self.max_threshold)
+
+    def process(self, energies: np.ndarray) -> np.ndarray:
+        """Per-frame mask for a block of frame energies: True where the VAD should run."""
+        if not len(energies):
+            return np.zeros(0, dtype=bool)
+        block_min = float(energies.min())
+        if self.floor is None:
+            self.floor = block_min
+        else:
+            self.floor = min(block_min, self.floor * self.rise_per_frame ** len(energies))
+        self.floor = max(self.floor, self.min_floor)
+        return energies >= self.threshold
@@ -0,0 +1,148 @@
+from collections import deque
+
+import numpy as np
+
+START = "start"
+END = "end"
+CUT = "cut"
+DISCARD = "discard"
+
+
+class UtteranceArena:
+    """Growable float32 buffer holding one utterance's 16 kHz audio.
+
+    Samples are only ever appended, so views of the filled part stay valid.
+    `take()` hands the filled part over as a view, so STT can read it without
+    a copy; the next `append()` starts a fresh buffer of the same capacity.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buf = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, samples):
+        if self._buf is None:
+            self._buf = np.empty(self.capacity, dtype=np.float32)
+        end = self.size + len(samples)
+        if end > len(self._buf):
+            grown = np.empty(max(end, 2 * len(self._buf)), dtype=np.float32)
+            grown[:self.size] = self._buf[:self.size]
+            self._buf = grown
+        self._buf[self.size:end] = samples
+        self.size = end
+        self.capacity = len(self._buf)
+
+    def view(self):
+        if self._buf is None:
+            return np.empty(0, dtype=np.float32)
+        return self._buf[:self.size]
+
+    def take(self):
+        audio = self.view()
+        self._buf = None
+        self.size = 0
+        return audio
+
+
+class Endpointer:
+    """Utterance endpointing driven by frame counts instead of the wall clock.
+
+    `push()` takes one mono 16 kHz frame, the VAD decision, the frame energy
+    and an optional `raw` item (e.g. the 48 kHz input, kept only for
+    archiving), and returns a list of `(event, audio, raws)`:
+
+    - `(START, None, None)`     speech onset; the utterance begins with up to
+                                `pre_roll_ms` of the frames before it
+    - `(END, audio, raws)`      `hangover_ms` of non-speech after speech
+    - `(DISCARD, audio, raws)`  same, but with less than `min_speech_ms` of speech
+    - `(CUT, audio, raws)`      the utterance reached `max_utterance_ms`; it is
+                                cut after the quietest frame of the last
+                                `cut_search_ms`, and the rest starts the next
+                                utterance (a `START` follows)
+
+    `audio` is a zero-copy view of the utterance arena; `raws` is the list of
+    raw items, or None if none were given. Because time is counted in frames,
+    network bursts don't change where utterances split, and memory per
+    utterance is bounded.
+    """
+
+    def __init__(self, frame_ms=20, pre_roll_ms=200, hangover_ms=100, min_speech_ms=100,
+                 max_utterance_ms=15000, cut_search_ms=1000, frame_samples=320):
+        self.frame_samples = frame_samples
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = min_speech_ms // frame_ms
+        self.max_utterance_frames = max_utterance_ms // frame_ms
+        self.cut_search_frames = max(1, cut_search_ms // frame_ms)
+
+        self.pre_roll = deque(maxlen=self.pre_roll_frames or 1)
+        self.speaking = False
+        self.arena = UtteranceArena(frame_samples * self.max_utterance_frames)
+        self.raws = []
+        self._voiced = []
+        self._energies = []
+        self._silence_run = 0
+
+    def push(self, frame, is_speech, energy, raw=None):
+        if not self.speaking:
+            if not is_speech:
+                if self.pre_roll_frames:
+                    self.pre_roll.append((frame, energy, raw))
+                return []
+            self._start()
+            self._append(frame, True, energy, raw)
+            return [(START, None, None)]
+
+        if is_speech:
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+            if self._silence_run >= self.hangover_frames:
+                return [self._end()]
+
+        self._append(frame, is_speech, energy, raw)
+        if len(self._voiced) >= self.max_utterance_frames:
+            return self._cut()
+        return []
+
+    def flush(self):
+        """End the current utterance now (e.g. when the stream closes)."""
+        return [self._end()] if self.speaking else []
+
+    def _start(self):
+        self.speaking = True
+        self._silence_run = 0
+        for frame, energy, raw in self.pre_roll:
+            self._append(frame, False, energy, raw)
+        self.pre_roll.clear()
+
+    def _append(self, frame, is_speech, energy, raw):
+        self.arena.append(frame.reshape(-1))
+        self._voiced.append(is_speech)
+        self._energies.append(energy)
+        if raw is not None:
+            self.raws.append(raw)
+
+    def _end(self):
+        voiced = sum(self._voiced)
+        raws = self.raws or None
+        self.speaking = False
+        self.raws, self._voiced, self._energies = [], [], []
+        return (END if voiced >= self.min_speech_frames else DISCARD, self.arena.take(), raws)
+
+    def _cut(self):
+        n = len(self._voiced)
+        search = min(self.cut_search_frames, n)
+        cut = n - search + int(np.argmin(self._energies[-search:])) + 1
+
+        audio = self.arena.take()
+        self.arena.append(audio[cut * self.frame_samples:])
+        raws = self.raws[:cut] or None
+        self.raws = self.raws[cut:]
+        self._voiced = self._voiced[cut:]
+        self._energies = self._energies[cut:]
+        return [(CUT, audio[:cut * self.frame_samples], raws), (START, None, None)]
@@ -0,0 +1,146 @@
+import json
+import struct
+
+import numpy as np
+
+from modules.protocol import PROTOCOL_V1, PROTOCOL_V2, HEADER_V2, ROLE_NAMES
+
+HEADER_LEN = struct.Struct("!I")
+
+
+class FrameParser:
+    """Incremental parser for /ws/audio binary messages.
+
+    v1: a record is `!I header_len | JSON header | PCM`. Without a `length` field in
+    the header the PCM runs to the end of the websocket message (what the
+    client sends today). With `length`, several records may be coalesced into
+    one message, and a payload may continue into the following messages.
+
+    v2: a record is `HEADER_V2 | PCM` and always carries its length. The
+    binary header is turned into a small dict with the same `sender` and
+    `timestamp` keys as v1, plus `seq` and `flags`.
+
+    `feed()` yields `(header, payload)` pairs where payload is a memoryview
+    into the message; it is only valid until the next `feed()`.
+    """
+
+    def __init__(self, protocol=PROTOCOL_V1):
+        self.protocol = protocol
+        self._pending = b""
+        self._header = None
+        self._payload_left = 0
+        self.header_errors = 0
+
+    def feed(self, message):
+        if self._pending:
+            message = self._pending + bytes(message)
+            self._pending = b""
+
+        view = memoryview(message)
+        end = len(view)
+        pos = 0
+
+        while pos < end:
+            if self._payload_left:
+                n = min(self._payload_left, end - pos)
+                self._payload_left -= n
+                if self._header is not None:
+                    yield self._header, view[pos:pos + n]
+                pos += n
+                continue
+
+            if self.protocol == PROTOCOL_V2:
+                if end - pos < HEADER_V2.size:
+                    self._pending = bytes(view[pos:])
+                    return
+                version, role_id, flags, seq, timestamp_us, length = HEADER_V2.unpack_from(view, pos)
+                pos += HEADER_V2.size
+                header = {
+                    "sender": ROLE_NAMES.get(role_id, "unknown"),
+                    "seq": seq,
+                    "timestamp": timestamp_us / 1e6,
+                    "flags": flags,
+                }
+                if version != PROTOCOL_V2:
+                    self.header_errors += 1
+                    print(f"[HEADER ERROR]: unexpected version {version}")
+                    header = None
+            else:
+                if end - pos < HEADER_LEN.size:
+                    self._pending = bytes(view[pos:])
+                    return
+                header_len = HEADER_LEN.unpack_from(view, pos)[0]
+                body = pos + HEADER_LEN.size
+                if end - body < header_len:
+                    self._pending = bytes(view[pos:])
+                    return
+
+                pos = body + header_len
+                try:
+                    header = json.loads(str(view[body:pos], "utf-8"))
+                    length = header.get("length")
+                except Exception as e:
+                    self.header_errors += 1
+                    print(f"[HEADER ERROR]: {e}")
+                    header, length = None, None
+
+            n = end - pos if length is None else min(length, end - pos)
+            if length is not None:
+                self._payload_left = length - n
+                self._header = header
+            if header is not None:
+                yield header, view[pos:pos + n]
+            pos += n
+
+        if self._payload_left == 0:
+            self._header = None
+
+
+class FrameAccumulator:
+    """Per-role PCM accumulator that hands out complete frames as numpy views.
+
+    `frames()` returns a `(n, frame_samples, channels)` int16 view straight
+    into the accumulator's bytearray. Consumed bytes are only compacted on the
+    next `write()`, so the view stays valid until then. Any partial frame
+    (including a partial sample) is carried over to the next write.
+    """
+
+    def __init__(self, frame_samples=960, channels=2, sample_width=2, capacity_frames=16):
+        self.frame_samples = frame_samples
+        self.channels = channels
+        self.frame_bytes = frame_samples * channels * sample_width
+        self._buf = bytearray(self.frame_bytes * capacity_frames)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def write(self, data):
+        tail = self._end - self._start
+        if self._start:
+            self._buf[:tail] = self._buf[self._start:self._end]
+            self._start = 0
+            self._end = tail
+
+        need = tail + len(data)
+        if need > len(self._buf):
+            # Fresh allocation: the old buffer may still be exported to a view
+            grown = bytearray(max(need, 2 * len(self._buf)))
+            grown[:tail] = self._buf[:tail]
+            self._buf = grown
+
+        self._buf[tail:need] = data
+        self._end = need
+
+    def frames(self):
+        n = (self._end - self._start) // self.frame_bytes
+        if not n:
+            return None
+        frames = np.frombuffer(self._buf, dtype=np.int16, count=n * self.frame_bytes // 2, offset=self._start)
+        self._start += n * self.frame_bytes
+        return frames.reshape(n, self.frame_samples, self.channels)
+
+    def reset(self):
+        self._start = 0
+        self._end = 0
@@ -0,0 +1,197 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class StubBackend:
+    """Fake STT model for tests and benchmarks on CPU-only boxes.
+
+    A batch costs `batch_latency + item_latency * len(batch)` seconds of
+    sleep, which roughly matches how a GPU amortizes a padded batch.
+    """
+
+    def __init__(self, batch_latency=0.05, item_latency=0.01, text="This is STT output", load_latency=0.0):
+        self.batch_latency = batch_latency
+        self.item_latency = item_latency
+        self.text = text
+        self.device = "cpu"
+        # Pretend model loading takes a while, to exercise readiness handling
+        time.sleep(load_latency)
+
+    def transcribe_batch(self, audios, languages):
+        time.sleep(self.batch_latency + self.item_latency * len(audios))
+        return [
+            {
+                "text": self.text,
+                "language": language,
+                "segments": [{
+                    "text": self.text,
+                    "avg_logprob": -0.2,
+                    "no_speech_prob": 0.01,
+                    "compression_ratio": 1.2,
+                }],
+            }
+            for language in languages
+        ]
+
+
+class WhisperBackend:
+    """Batched Whisper decoding.
+
+    Clips up to 30 s are padded to Whisper's fixed input window, stacked into
+    one mel batch per language and decoded together. Longer clips fall back
+    to `model.transcribe`, which handles its own windowing.
+
+    `device="auto"` picks CUDA when available. `compute_type` is "float16",
+    "float32" or "auto" (float16 on CUDA only; Whisper can't decode in
+    float16 on CPU).
+    """
+
+    def __init__(self, model_name="large", device="auto", compute_type="auto"):
+        import torch
+        import whisper
+        self.torch = torch
+        self.whisper = whisper
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        elif device.startswith("cuda") and not torch.cuda.is_available():
+            raise RuntimeError(f"device {device} requested but CUDA is not available")
+        self.model = whisper.load_model(model_name, device=device)
+        self.device = device
+        self.fp16 = device.startswith("cuda") and compute_type in ("auto", "float16")
+
+    def transcribe_batch(self, audios, languages):
+        whisper = self.whisper
+        results = [None] * len(audios)
+        by_language = {}
+
+        for i, (audio, language) in enumerate(zip(audios, languages)):
+            if len(audio) > whisper.audio.N_SAMPLES:
+                results[i] = self.model.transcribe(audio, language=language, fp16=self.fp16)
+            else:
+                by_language.setdefault(language, []).append(i)
+
+        for language, indices in by_language.items():
+            mels = [
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(np.asarray(audios[i], dtype=np.float32)),
+                    n_mels=self.model.dims.n_mels,
+                )
+                for i in indices
+            ]
+            mel_batch = self.torch.stack(mels).to(self.model.device)
+            options = whisper.DecodingOptions(language=language, fp16=self.fp16)
+            for i, decoded in zip(indices, whisper.decode(self.model, mel_batch, options)):
+                results[i] = {
+                    "text": decoded.text,
+                    "language": decoded.language,
+                    "segments": [{
+                        "text": decoded.text,
+                        "avg_logprob": decoded.avg_logprob,
+                        "no_speech_prob": decoded.no_speech_prob,
+                        "compression_ratio": decoded.compression_ratio,
+                    }],
+                }
+
+        return results
+
+
+def create_backend(name="whisper", **kwargs):
+    if name == "stub":
+        return StubBackend(**kwargs)
+    if name == "whisper":
+        return WhisperBackend(**kwargs)
+    raise ValueError(f"Unknown STT backend: {name}")
+
+
+class _Request:
+    __slots__ = ("audio", "language", "future", "enqueued")
+
+    def __init__(self, audio, language):
+        self.audio = audio
+        self.language = language
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class InferenceScheduler:
+    """Collects utterances from every session and runs them as batches.
+
+    A batch is dispatched when it reaches `max_batch_size` or when its oldest
+    request has waited `max_wait` seconds, whichever comes first. Each caller
+    gets a Future, so results go back to whichever session submitted them.
+    """
+
+    def __init__(self, backend, max_batch_size=8, max_wait=0.05):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio, language) -> Future:
+        request = _Request(audio, language)
+        self._queue.put(request)
+        return request.future
+
+    def transcribe(self, audio, language):
+        return self.submit(audio, language).result()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "pending": self._queue.qsize(),
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = first.enqueued + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        try:
+            results = self.backend.transcribe_batch(
+                [request.audio for request in batch],
+                [request.language for request in batch],
+            )
+        except Exception as e:
+            print(f"[SCHEDULER ERROR] Batch of {len(batch)} failed: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
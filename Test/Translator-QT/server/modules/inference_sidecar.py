@@ -0,0 +1,369 @@
+"""STT in a separate process, shared by every web worker.
+
+The sidecar owns the model and one InferenceScheduler, so utterances from
+all uvicorn workers are batched together and the model is loaded once.
+Web workers talk to it through `SidecarClient`, a drop-in for the
+scheduler's `submit()`/`transcribe()`:
+
+- audio goes through a `multiprocessing.shared_memory` arena that the
+  client creates and the sidecar maps once per connection. A request only
+  carries a slot offset and a sample count. Audio that doesn't fit a free
+  slot is sent inline on the socket instead.
+- control messages go over a Unix stream socket, each a 4-byte big-endian
+  length followed by JSON (and, for inline audio, the raw float32 bytes).
+
+Run from the server directory, with the same STT_* / MODEL_SETTINGS
+environment as the web server:
+
+    python -m modules.inference_sidecar [--socket /tmp/translator-stt.sock]
+"""
+import argparse
+import itertools
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from modules.inference_scheduler import InferenceScheduler
+from modules.model_registry import ModelRegistry, load_model_settings
+
+DEFAULT_SOCKET = "/tmp/translator-stt.sock"
+SAMPLE_RATE = 16000
+
+_LENGTH = struct.Struct("!I")
+
+
+def _json_default(value):
+    # numpy scalars in Whisper results
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def send_message(sock, message, payload=b""):
+    data = json.dumps(message, default=_json_default).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(data)) + data + payload)
+
+
+def recv_message(rfile):
+    """(message, payload) from a socket file, or (None, None) at EOF."""
+    header = rfile.read(_LENGTH.size)
+    if len(header) < _LENGTH.size:
+        return None, None
+    message = json.loads(rfile.read(_LENGTH.unpack(header)[0]))
+    payload = rfile.read(message["bytes"]) if message.get("bytes") else None
+    return message, payload
+
+
+class SharedAudioArena:
+    """Fixed-size float32 slots in one shared memory segment, owned by the client."""
+
+    def __init__(self, slots=32, slot_samples=30 * SAMPLE_RATE):
+        self.slots = slots
+        self.slot_samples = slot_samples
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, slots * slot_samples * 4))
+        self._samples = np.ndarray((slots * slot_samples,), dtype=np.float32, buffer=self.shm.buf)
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def put(self, audio):
+        """Copy `audio` into a free slot; its sample offset, or None if none fits."""
+        if len(audio) > self.slot_samples:
+            return None
+        with self._lock:
+            if not self._free:
+                return None
+            slot = self._free.pop()
+        offset = slot * self.slot_samples
+        self._samples[offset:offset + len(audio)] = audio
+        return offset
+
+    def release(self, offset):
+        with self._lock:
+            self._free.append(offset // self.slot_samples)
+
+    def close(self):
+        del self._samples
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SidecarClient:
+    """InferenceScheduler stand-in that forwards requests to the inference sidecar.
+
+    `submit()` and `status()` never touch the socket: they queue the
+    request for a sender thread, which connects when needed and writes it,
+    so neither waits on the sidecar or on another thread's send. `submit()`
+    copies the audio into the shared arena (or hands it to the sender to
+    send inline) and returns a Future that the reader thread resolves. If
+    the sidecar goes away, pending Futures fail with ConnectionError and
+    the next request reconnects.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, slots=32, slot_seconds=30, status_interval=1.0):
+        self.socket_path = socket_path
+        self.status_interval = status_interval
+        self.arena = SharedAudioArena(slots, int(slot_seconds * SAMPLE_RATE))
+        self.shared = 0
+        self.inline = 0
+        self.connects = 0
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._status = {"ready": False, "models": {}, "error": "no status from the sidecar yet"}
+        self._status_requested = 0.0
+        self._outbox = queue.Queue()
+        threading.Thread(target=self._send_requests, name="sidecar-sender", daemon=True).start()
+
+    def submit(self, audio, language) -> Future:
+        audio = np.asarray(audio, dtype=np.float32)
+        future = Future()
+        offset = self.arena.put(audio)
+        message = {"type": "transcribe", "language": language, "samples": len(audio)}
+        payload = b""
+        if offset is None:
+            payload = audio.tobytes()
+            message["bytes"] = len(payload)
+            self.inline += 1
+        else:
+            message["offset"] = offset
+            self.shared += 1
+        self._request(message, future, offset, payload)
+        return future
+
+    def transcribe(self, audio, language):
+        return self.submit(audio, language).result()
+
+    def status(self):
+        """Last model status reported by the sidecar, refreshed every `status_interval`.
+
+        Only queues the refresh, so it is safe to call from the event loop;
+        the reply shows up in a later call.
+        """
+        now = time.monotonic()
+        if now - self._status_requested >= self.status_interval:
+            self._status_requested = now
+            future = Future()
+            future.add_done_callback(self._on_status)
+            self._request({"type": "status"}, future)
+        return self._status
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "shared_memory_requests": self.shared,
+            "inline_requests": self.inline,
+            "connects": self.connects,
+        }
+
+    def close(self):
+        self._outbox.put(None)
+        with self._send_lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+        self.arena.close()
+
+    def _on_status(self, future):
+        if future.exception():
+            self._status = {"ready": False, "models": {}, "error": str(future.exception())}
+        else:
+            self._status = future.result()
+
+    def _request(self, message, future, offset=None, payload=b""):
+        request_id = next(self._ids)
+        message["id"] = request_id
+        with self._lock:
+            self._pending[request_id] = (future, offset, None)
+        self._outbox.put((request_id, message, payload))
+
+    def _send_requests(self):
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                return
+            request_id, message, payload = item
+            try:
+                with self._send_lock:
+                    if self._sock is None:
+                        self._connect()
+                    # Tagged with the socket it goes out on: only that socket's reader may fail it
+                    with self._lock:
+                        if request_id not in self._pending:
+                            continue
+                        future, offset, _ = self._pending[request_id]
+                        self._pending[request_id] = (future, offset, self._sock)
+                    send_message(self._sock, message, payload)
+            except OSError as e:
+                self._fail(request_id, ConnectionError(f"inference sidecar at {self.socket_path}: {e}"))
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        send_message(sock, {"type": "hello", "shm": self.arena.name, "pid": os.getpid()})
+        self.connects += 1
+        self._sock = sock
+        threading.Thread(target=self._read, args=(sock,), name="sidecar-client", daemon=True).start()
+
+    def _read(self, sock):
+        rfile = sock.makefile("rb")
+        try:
+            while True:
+                message, _ = recv_message(rfile)
+                if message is None:
+                    break
+                with self._lock:
+                    future, offset, _ = self._pending.pop(message["id"], (None, None, None))
+                if offset is not None:
+                    self.arena.release(offset)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(RuntimeError(message["error"]))
+                else:
+                    future.set_result(message["result"])
+        except (OSError, ValueError) as e:
+            print(f"[SIDECAR] Connection lost: {e}")
+        finally:
+            with self._send_lock:
+                if self._sock is sock:
+                    self._sock = None
+            sock.close()
+            with self._lock:
+                lost = [request_id for request_id, (_, _, owner) in self._pending.items() if owner is sock]
+            for request_id in lost:
+                self._fail(request_id, ConnectionError("inference sidecar closed the connection"))
+
+    def _fail(self, request_id, error):
+        with self._lock:
+            future, offset, _ = self._pending.pop(request_id, (None, None, None))
+        if offset is not None:
+            self.arena.release(offset)
+        if future is not None:
+            future.set_exception(error)
+
+
+class InferenceSidecar:
+    """Serves a scheduler to SidecarClients on a Unix socket, one thread per connection."""
+
+    def __init__(self, scheduler, models, socket_path=DEFAULT_SOCKET):
+        self.scheduler = scheduler
+        self.models = models
+        self.socket_path = socket_path
+        self.connections = 0
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        print(f"[SIDECAR] Listening on {self.socket_path}")
+        try:
+            while True:
+                conn, _ = server.accept()
+                threading.Thread(target=self._serve, args=(conn,), name="sidecar-conn", daemon=True).start()
+        finally:
+            server.close()
+            os.unlink(self.socket_path)
+
+    def status(self):
+        return {**self.models.status(), "scheduler": self.scheduler.stats(), "connections": self.connections}
+
+    def _serve(self, conn):
+        rfile = conn.makefile("rb")
+        send_lock = threading.Lock()
+        shm = None
+        samples = None
+        futures = []
+        self.connections += 1
+
+        def respond(message):
+            try:
+                with send_lock:
+                    send_message(conn, message)
+            except OSError:
+                pass  # the client is gone; its pending requests fail on its side
+
+        def on_done(request_id, future):
+            if future.exception():
+                respond({"id": request_id, "error": str(future.exception())})
+            else:
+                respond({"id": request_id, "result": future.result()})
+
+        try:
+            while True:
+                message, payload = recv_message(rfile)
+                if message is None:
+                    break
+                kind = message["type"]
+                if kind == "hello":
+                    shm = shared_memory.SharedMemory(name=message["shm"])
+                    # The client owns the segment; don't let this process unlink it at exit
+                    resource_tracker.unregister(shm._name, "shared_memory")
+                    samples = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+                    print(f"[SIDECAR] Client pid {message.get('pid')} connected")
+                elif kind == "status":
+                    respond({"id": message["id"], "result": self.status()})
+                elif kind == "transcribe":
+                    if payload is not None:
+                        audio = np.frombuffer(payload, dtype=np.float32)
+                    else:
+                        # Zero-copy: the client doesn't reuse the slot until it has our reply
+                        audio = samples[message["offset"]:message["offset"] + message["samples"]]
+                    future = self.scheduler.submit(audio, message["language"])
+                    request_id = message["id"]
+                    future.add_done_callback(lambda f, request_id=request_id: on_done(request_id, f))
+                    futures = [f for f in futures if not f.done()] + [future]
+        except (OSError, ValueError) as e:
+            print(f"[SIDECAR] Connection error: {e}")
+        finally:
+            self.connections -= 1
+            # Requests still decoding read from the segment; let them finish before unmapping it
+            wait(futures)
+            conn.close()
+            audio = samples = None
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:
+                    pass  # a view is still referenced; the mapping goes when it is collected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", default=os.environ.get("STT_SIDECAR_SOCKET", DEFAULT_SOCKET))
+    args = parser.parse_args()
+
+    models = ModelRegistry()
+    stt_model = models.register(
+        "stt",
+        load_model_settings(os.environ.get("MODEL_SETTINGS", "config/models.json")),
+        float(os.environ.get("STT_LOAD_TIMEOUT_S", 120)),
+    )
+    models.load()
+    scheduler = InferenceScheduler(
+        stt_model,
+        max_batch_size=int(os.environ.get("STT_MAX_BATCH_SIZE", 8)),
+        max_wait=int(os.environ.get("STT_MAX_WAIT_MS", 50)) / 1000,
+    )
+    InferenceSidecar(scheduler, models, args.socket).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
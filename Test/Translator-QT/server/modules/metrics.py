@@ -0,0 +1,134 @@
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds, from sub-millisecond DSP blocks to slow STT
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+INGRESS = "ingress"   # network: arrival time minus client send stamp, above the lowest seen
+DSP = "dsp"           # decimation + VAD + endpointing of one received block
+ENDPOINT = "endpoint" # last voiced frame received -> utterance closed
+QUEUE = "queue"       # time an utterance waited in pipeline queues
+STT = "stt"
+TRANSLATE = "translate"
+TTS = "tts"
+SEND = "send"         # result queued for the client -> websocket send done
+STAGES = (INGRESS, DSP, ENDPOINT, QUEUE, STT, TRANSLATE, TTS, SEND)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, Prometheus style.
+
+    `observe()` is a bisect and three additions under a lock, so it can stay
+    on in the hot path.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile `q` (inf past the last bucket)."""
+        counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class StageMetrics:
+    """One histogram per stage; observations also go to `parent` (the global set)."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.histograms = {stage: Histogram() for stage in STAGES}
+
+    def observe(self, stage, seconds):
+        self.histograms[stage].observe(seconds)
+        if self.parent is not None:
+            self.parent.observe(stage, seconds)
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms}} for JSON stats."""
+        summary = {}
+        for stage, histogram in self.histograms.items():
+            _, total, count = histogram.snapshot()
+            if count:
+                summary[stage] = {
+                    "count": count,
+                    "mean_ms": round(total / count * 1000, 2),
+                    "p50_ms": histogram.quantile(0.5) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                }
+        return summary
+
+
+class IngressClock:
+    """One-way network delay from client send stamps, without synchronized clocks.
+
+    The client stamps chunks with its own clock, so `arrival - stamp` is the
+    delay plus an unknown offset. The lowest value seen stands in for the
+    offset, leaving the delay above the best case (queueing, retransmits,
+    client-side send stalls).
+    """
+
+    def __init__(self):
+        self.offset = None
+
+    def delay(self, arrival, stamp):
+        raw = arrival - stamp
+        if self.offset is None or raw < self.offset:
+            self.offset = raw
+        return raw - self.offset
+
+
+def _labels(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_histograms(name, help_text, series):
+    """Prometheus text for `series`: a list of (labels dict, Histogram)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        counts, total, count = histogram.snapshot()
+        base = _labels(labels)
+        sep = "," if base else ""
+        cumulative = 0
+        for bound, n in zip(histogram.buckets, counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{base}{sep}le="+Inf"}} {count}')
+        lines.append(f"{name}_sum{{{base}}} {total}")
+        lines.append(f"{name}_count{{{base}}} {count}")
+    return lines
+
+
+def render_values(name, metric_type, help_text, series):
+    """Prometheus text for gauges/counters: a list of (labels dict, value)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in series:
+        base = _labels(labels)
+        lines.append(f"{name}{{{base}}} {value}" if base else f"{name} {value}")
+    return lines
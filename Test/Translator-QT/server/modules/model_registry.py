@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+from modules.dsp import PolyphaseDecimator
+from modules.inference_scheduler import create_backend
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+# Settings keys, with the environment variable that overrides each
+MODEL_SETTINGS = {
+    "backend": ("STT_BACKEND", "whisper"),  # whisper or stub
+    "model": ("STT_MODEL", "large"),
+    "device": ("STT_DEVICE", "auto"),  # auto, cuda, cuda:N or cpu
+    "compute_type": ("STT_COMPUTE_TYPE", "auto"),  # auto, float16 or float32
+    "warmup_clip": ("STT_WARMUP_CLIP", ""),  # WAV decoded once after loading; "" = 1 s of silence
+    "cpu_fallback": ("STT_CPU_FALLBACK", "1"),
+    "stub_load_seconds": ("STT_STUB_LOAD_S", "0"),  # stub backend only: simulated load time
+}
+
+
+def load_model_settings(path, name="stt"):
+    """Settings for model `name`: defaults, then `path` (JSON, {name: {...}}) if present, then env."""
+    settings = {key: default for key, (_, default) in MODEL_SETTINGS.items()}
+    try:
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                settings.update(json.load(f).get(name, {}))
+    except Exception as e:
+        print(f"[MODEL] Failed to load {path}: {e}")
+    for key, (env, _) in MODEL_SETTINGS.items():
+        if env in os.environ:
+            settings[key] = os.environ[env]
+    settings["cpu_fallback"] = str(settings["cpu_fallback"]).lower() in ("1", "true", "yes")
+    return settings
+
+
+def load_warmup_clip(path, seconds=1.0, rate=16000):
+    """Mono float32 at `rate` from a 16-bit WAV (rate must divide its rate), or silence."""
+    if not path:
+        return np.zeros(int(seconds * rate), dtype=np.float32)
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        src_rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return PolyphaseDecimator(src_rate, rate, channels).process(pcm)
+
+
+class ModelHandle:
+    """A model that may still be loading; usable as a scheduler backend right away.
+
+    `transcribe_batch()` waits up to `wait_timeout` seconds for the model
+    to be ready, so requests made during startup are served once it is,
+    rather than failing.
+    """
+
+    def __init__(self, name, settings, wait_timeout=120.0):
+        self.name = name
+        self.settings = settings
+        self.wait_timeout = wait_timeout
+        self.state = PENDING
+        self.error = None
+        self.backend = None
+        self.device = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._ready = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def transcribe_batch(self, audios, languages):
+        if not self._ready.wait(self.wait_timeout):
+            raise RuntimeError(f"model {self.name} not ready after {self.wait_timeout:.0f}s")
+        if self.state != READY:
+            raise RuntimeError(f"model {self.name} failed to load: {self.error}")
+        return self.backend.transcribe_batch(audios, languages)
+
+    def load(self):
+        self.state = LOADING
+        settings = self.settings
+        start = time.monotonic()
+        try:
+            try:
+                self.backend = self._create(settings["device"])
+            except Exception as e:
+                if not settings["cpu_fallback"] or settings["device"] == "cpu" or settings["backend"] == "stub":
+                    raise
+                print(f"[MODEL] {self.name}: loading on {settings['device']} failed ({e}), falling back to CPU")
+                self.backend = self._create("cpu")
+            self.device = getattr(self.backend, "device", None)
+            self.load_seconds = time.monotonic() - start
+
+            start = time.monotonic()
+            self.backend.transcribe_batch([load_warmup_clip(settings["warmup_clip"])], [None])
+            self.warmup_seconds = time.monotonic() - start
+        except Exception as e:
+            self.state = FAILED
+            self.error = str(e)
+            print(f"[MODEL ERROR] {self.name}: {e}")
+        else:
+            self.state = READY
+            print(
+                f"[MODEL] {self.name} ready: {settings['backend']} {settings['model']} on {self.device}"
+                f" (load {self.load_seconds:.1f}s, warm-up {self.warmup_seconds:.1f}s)"
+            )
+        finally:
+            self._ready.set()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "backend": self.settings["backend"],
+            "model": self.settings["model"],
+            "device": self.device,
+            "compute_type": self.settings["compute_type"],
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+    def _create(self, device):
+        if self.settings["backend"] == "stub":
+            return create_backend("stub", load_latency=float(self.settings["stub_load_seconds"]))
+        return create_backend(
+            self.settings["backend"],
+            model_name=self.settings["model"],
+            device=device,
+            compute_type=self.settings["compute_type"],
+        )
+
+
+class ModelRegistry:
+    """Named models of this process, loaded on a background thread.
+
+    Nothing is loaded at import time: `load()` returns at once, the server
+    starts accepting connections, and `ready()` turns true once every
+    registered model has loaded and decoded its warm-up clip.
+    """
+
+    def __init__(self):
+        self.models = {}
+
+    def register(self, name, settings, wait_timeout=120.0) -> ModelHandle:
+        handle = ModelHandle(name, settings, wait_timeout)
+        self.models[name] = handle
+        return handle
+
+    def get(self, name) -> ModelHandle:
+        return self.models[name]
+
+    def load(self, background=True):
+        pending = [handle for handle in self.models.values() if handle.state == PENDING]
+        if not background:
+            for handle in pending:
+                handle.load()
+            return
+        for handle in pending:
+            threading.Thread(target=handle.load, name=f"model-load-{handle.name}", daemon=True).start()
+
+    def ready(self):
+        return all(handle.ready for handle in self.models.values())
+
+    def status(self):
+        return {"ready": self.ready(), "models": {name: h.status() for name, h in self.models.items()}}
@@ -0,0 +1,231 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DEADLINE = "deadline"
+SHED_POLICIES = (DROP_OLDEST, COALESCE, DEADLINE)
+
+
+class Stage:
+    """One step of a Pipeline: `fn(item) -> item`, run by `workers` threads.
+
+    `fn` returning None drops the item (e.g. an empty transcript). Up to
+    `max_queue` items wait in front of the stage; when it is full, the stage
+    before it blocks, so backpressure travels upstream.
+    """
+
+    def __init__(self, name, fn, workers=1, max_queue=64):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue = queue.Queue(max_queue)
+        self.busy = 0
+        self.processed = 0
+        self.errors = 0
+
+
+class _Job:
+    __slots__ = ("lane", "seq", "item", "submitted", "enqueued", "waited", "started", "cancelled")
+
+    def __init__(self, lane, seq, item):
+        self.lane = lane
+        self.seq = seq
+        self.item = item
+        self.submitted = self.enqueued = time.monotonic()
+        self.waited = 0.0
+        self.started = False
+        self.cancelled = False
+
+
+class Pipeline:
+    """Stage graph shared by every session, e.g. STT -> translate -> TTS.
+
+    Each stage has its own threads and bounded queue, so different
+    utterances overlap: utterance N can be in TTS while N+1 is in STT.
+    Work is submitted through lanes (one per role), and each lane delivers
+    its results in submission order whatever order they finish in.
+
+    `on_timing(item, name, seconds)`, if given, gets the run time of every
+    stage by stage name, and once per item the total time it spent waiting
+    in stage queues as "queue".
+    """
+
+    def __init__(self, stages, name="pipeline", on_timing=None):
+        self.stages = stages
+        self.name = name
+        self.on_timing = on_timing
+        self._threads = []
+        for index, stage in enumerate(stages):
+            for i in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._run, args=(index,), name=f"{name}-{stage.name}-{i}", daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def lane(self, deliver, max_pending=10, policy=DROP_OLDEST, max_age=0, merge=None):
+        return OrderedLane(self, deliver, max_pending, policy, max_age, merge)
+
+    def shutdown(self):
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                stage.queue.put(None)
+
+    def stats(self):
+        return {
+            stage.name: {
+                "workers": stage.workers,
+                "busy": stage.busy,
+                "queued": stage.queue.qsize(),
+                "processed": stage.processed,
+                "errors": stage.errors,
+            }
+            for stage in self.stages
+        }
+
+    def _run(self, index):
+        stage = self.stages[index]
+        last = index == len(self.stages) - 1
+        while True:
+            job = stage.queue.get()
+            if job is None:
+                return
+            if job.cancelled or (index == 0 and not job.lane._begin(job)):
+                job.lane._complete(job, None)
+                continue
+
+            started = time.monotonic()
+            job.waited += started - job.enqueued
+            stage.busy += 1
+            try:
+                item = stage.fn(job.item)
+            except Exception as e:
+                stage.errors += 1
+                print(f"[PIPELINE ERROR] {stage.name}: {e}")
+                item = None
+            finally:
+                stage.busy -= 1
+                stage.processed += 1
+            if self.on_timing is not None:
+                self._timing(job.item, stage.name, time.monotonic() - started)
+
+            if item is None or last or job.cancelled:
+                if self.on_timing is not None:
+                    self._timing(job.item, "queue", job.waited)
+                job.lane._complete(job, None if job.cancelled else item)
+            else:
+                job.item = item
+                job.enqueued = time.monotonic()
+                self.stages[index + 1].queue.put(job)
+
+    def _timing(self, item, name, seconds):
+        try:
+            self.on_timing(item, name, seconds)
+        except Exception as e:
+            print(f"[PIPELINE ERROR] on_timing: {e}")
+
+
+class OrderedLane:
+    """Submits to a Pipeline and hands results to `deliver(item)` in order.
+
+    At most `max_pending` items are in flight. What happens to one more
+    depends on `policy`:
+
+    - DROP_OLDEST: the oldest item is cancelled; it is skipped by the stages
+      it hasn't reached yet and never delivered.
+    - COALESCE: the new item is folded into the newest one that hasn't
+      started yet with `merge(older, newer)`; if there is none, or `merge`
+      returns None, the oldest is dropped instead.
+    - DEADLINE: like DROP_OLDEST, and items that waited longer than
+      `max_age` seconds are dropped before they reach the first stage.
+
+    Every shed item is counted in `shed` by reason.
+    """
+
+    def __init__(self, pipeline, deliver, max_pending=10, policy=DROP_OLDEST, max_age=0, merge=None):
+        if policy not in SHED_POLICIES:
+            raise ValueError(f"Unknown shed policy: {policy}")
+        if policy == COALESCE and merge is None:
+            raise ValueError("The coalesce policy needs a merge function")
+        self.pipeline = pipeline
+        self.deliver = deliver
+        self.max_pending = max_pending
+        self.policy = policy
+        self.max_age = max_age
+        self.merge = merge
+        self.shed = {DROP_OLDEST: 0, COALESCE: 0, DEADLINE: 0}
+        self.closed = False
+        self._seq = itertools.count()
+        self._next = 0
+        self._inflight = deque()
+        self._finished = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._inflight)
+
+    @property
+    def dropped(self):
+        return sum(self.shed.values())
+
+    def submit(self, item):
+        if self.closed:
+            return
+        with self._lock:
+            live = [j for j in self._inflight if not j.cancelled]
+            if len(live) >= self.max_pending:
+                if self.policy == COALESCE and self._coalesce(live, item):
+                    return
+                oldest = next((j for j in live if not j.started), live[0])
+                oldest.cancelled = True
+                self.shed[DROP_OLDEST] += 1
+            job = _Job(self, next(self._seq), item)
+            self._inflight.append(job)
+        self.pipeline.stages[0].queue.put(job)
+
+    def _coalesce(self, live, item):
+        newest = live[-1]
+        if newest.started:
+            return False
+        merged = self.merge(newest.item, item)
+        if merged is None:
+            return False
+        newest.item = merged
+        self.shed[COALESCE] += 1
+        return True
+
+    def _begin(self, job):
+        """Called before the first stage; False sheds the job."""
+        with self._lock:
+            if job.cancelled:
+                return False
+            if self.policy == DEADLINE and self.max_age and time.monotonic() - job.submitted > self.max_age:
+                job.cancelled = True
+                self.shed[DEADLINE] += 1
+                return False
+            job.started = True
+            return True
+
+    def close(self):
+        """Cancel everything in flight; nothing more is delivered."""
+        self.closed = True
+        with self._lock:
+            for job in self._inflight:
+                job.cancelled = True
+
+    def _complete(self, job, item):
+        with self._lock:
+            self._finished[job.seq] = item
+            while self._next in self._finished:
+                item = self._finished.pop(self._next)
+                self._inflight.popleft()
+                self._next += 1
+                if item is not None and not self.closed:
+                    try:
+                        self.deliver(item)
+                    except Exception as e:
+                        print(f"[PIPELINE ERROR] deliver: {e}")
@@ -0,0 +1,88 @@
+"""Wire protocol of /ws/audio.
+
+v1: every binary message is `!I header_len | JSON header | PCM`, with the
+    languages and PCM format repeated in every header.
+v2: every binary record is a fixed 20-byte HEADER_V2 followed by `length`
+    bytes of PCM. Languages and format travel in text control messages,
+    sent only when they change.
+
+The client asks for a version with `?protocol=2,1` (and optional features
+with `?caps=binary_audio`) and the server answers with a `hello` text
+message carrying the version and capabilities it picked. Clients that ask
+for neither get v1, no hello, and hex audio inside JSON results.
+
+Every record names its role, so one connection may carry both "user" and
+"other" audio; results name the role they belong to.
+
+Keep in sync with stts/protocol.py on the client side.
+"""
+import json
+import struct
+
+PROTOCOL_V1 = 1
+PROTOCOL_V2 = 2
+SUPPORTED_PROTOCOLS = (PROTOCOL_V2, PROTOCOL_V1)
+
+ROLE_IDS = {"user": 1, "other": 2}
+ROLE_NAMES = {role_id: role for role, role_id in ROLE_IDS.items()}
+
+# version, role id, flags, sequence, monotonic timestamp (us), payload length
+HEADER_V2 = struct.Struct("!BBHIQI")
+
+FLAG_DISCONTINUITY = 0x0001  # client dropped audio right before this chunk
+
+MSG_HELLO = "hello"
+MSG_CONTROL = "control"
+MSG_RESULT = "translate_with_audio"
+MSG_PARTIAL = "partial"
+MSG_FINAL = "final"
+
+# Result audio sent as its own binary frame, prefixed with the utterance id,
+# instead of hex inside the JSON result
+CAP_BINARY_AUDIO = "binary_audio"
+RESULT_AUDIO_HEADER = struct.Struct("!I")
+# `partial` transcripts while the speaker is still talking, then `final`
+# (whose optional `merged` lists the utterance ids folded into it)
+CAP_PARTIALS = "partials"
+# The server reads PCM in the rate/channels each role declares, so the client
+# may send mono 16 kHz (already low-passed) instead of 48 kHz stereo
+CAP_UPLINK_FORMAT = "uplink_format"
+SUPPORTED_CAPABILITIES = (CAP_BINARY_AUDIO, CAP_PARTIALS, CAP_UPLINK_FORMAT)
+
+
+def negotiate(requested) -> int:
+    """Pick the highest version both sides speak from a `?protocol=` value."""
+    if not requested:
+        return PROTOCOL_V1
+    try:
+        offered = {int(v) for v in requested.split(",")}
+    except ValueError:
+        return PROTOCOL_V1
+    for version in SUPPORTED_PROTOCOLS:
+        if version in offered:
+            return version
+    return PROTOCOL_V1
+
+
+def negotiate_capabilities(requested) -> list:
+    if not requested:
+        return []
+    offered = set(requested.split(","))
+    return [cap for cap in SUPPORTED_CAPABILITIES if cap in offered]
+
+
+def hello_message(protocol: int, capabilities=()) -> str:
+    return json.dumps({"type": MSG_HELLO, "protocol": protocol, "capabilities": list(capabilities)})
+
+
+def encode_result(package: dict, audio_bytes: bytes, binary_audio: bool) -> list:
+    """Websocket frames (str for text, bytes for binary) for one result package."""
+    data = package["data"]
+    if not binary_audio:
+        return [json.dumps({**package, "data": {**data, "audio_bytes": audio_bytes.hex()}})]
+    text = json.dumps({**package, "data": {**data, "audio_length": len(audio_bytes)}})
+    return [text, RESULT_AUDIO_HEADER.pack(data["utterance_id"]) + audio_bytes]
+
+
+def pack_v2(role: str, seq: int, timestamp_us: int, pcm, flags=0) -> bytes:
+    return HEADER_V2.pack(PROTOCOL_V2, ROLE_IDS[role], flags, seq & 0xFFFFFFFF, timestamp_us, len(pcm)) + bytes(pcm)
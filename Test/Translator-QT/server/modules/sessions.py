@@ -0,0 +1,122 @@
+import itertools
+import threading
+import time
+
+from modules.metrics import StageMetrics
+
+
+class Session:
+    """Per-connection state: the role buffers and every lane they submit to.
+
+    A buffer exists only for the roles the connection has sent, one or both.
+
+    Lanes are grouped by kind ("frames", "utterances", ...) so the registry
+    can report how much work is queued and shed of each kind. Work shed
+    outside a lane (e.g. results the client can't take fast enough) is
+    counted with `count_shed()`. `close()` drops queued work; whatever is
+    already running on the pool finishes on its own.
+    """
+
+    def __init__(self, session_id, metrics=None):
+        self.id = session_id
+        self.opened = time.monotonic()
+        # Per-session latency histograms, also feeding the registry-wide ones
+        self.metrics = StageMetrics(metrics)
+        self.buffers = {}
+        self.lanes = {}
+        self.shed = {}
+        self.closed = False
+
+    def lane(self, pool, kind, *args, **kwargs):
+        """A lane of `pool` (WorkerPool or Pipeline) owned by this session."""
+        lane = pool.lane(*args, **kwargs)
+        self.lanes.setdefault(kind, []).append(lane)
+        return lane
+
+    def queued(self, kind):
+        return sum(len(lane) for lane in self.lanes.get(kind, ()))
+
+    def count_shed(self, kind, reason, n=1):
+        counts = self.shed.setdefault(kind, {})
+        counts[reason] = counts.get(reason, 0) + n
+
+    def shed_counts(self):
+        """{kind: {reason: count}} over this session's lanes and count_shed()."""
+        totals = {kind: dict(counts) for kind, counts in self.shed.items()}
+        for kind, lanes in self.lanes.items():
+            counts = totals.setdefault(kind, {})
+            for lane in lanes:
+                for reason, n in lane.shed.items():
+                    counts[reason] = counts.get(reason, 0) + n
+        return totals
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for kind, counts in self.shed_counts().items():
+            if any(counts.values()):
+                print(f"[SESSION] {self.id}: shed {kind} under load: {counts}")
+        for lanes in self.lanes.values():
+            for lane in lanes:
+                lane.close()
+
+
+class SessionRegistry:
+    """Live sessions of this server process, plus process-wide latency metrics."""
+
+    def __init__(self):
+        self.metrics = StageMetrics()
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.closed = 0
+        self._shed_closed = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def open(self) -> Session:
+        session = Session(next(self._ids), self.metrics)
+        with self._lock:
+            self._sessions[session.id] = session
+            self.opened += 1
+        return session
+
+    def close(self, session):
+        session.close()
+        with self._lock:
+            if self._sessions.pop(session.id, None) is not None:
+                self.closed += 1
+                _add_counts(self._shed_closed, session.shed_counts())
+
+    def live(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            opened, closed = self.opened, self.closed
+            shed = {kind: dict(counts) for kind, counts in self._shed_closed.items()}
+        for session in sessions:
+            _add_counts(shed, session.shed_counts())
+        return {
+            "sessions": len(sessions),
+            "sessions_opened": opened,
+            "sessions_closed": closed,
+            "threads": threading.active_count(),
+            "role_buffers": sum(len(s.buffers) for s in sessions),
+            "queued_frames": sum(s.queued("frames") for s in sessions),
+            "queued_utterances": sum(s.queued("utterances") for s in sessions),
+            "shed": shed,
+            "latency": self.metrics.summary(),
+        }
+
+
+def _add_counts(totals, counts):
+    for kind, reasons in counts.items():
+        target = totals.setdefault(kind, {})
+        for reason, n in reasons.items():
+            target[reason] = target.get(reason, 0) + n
@@ -0,0 +1,42 @@
+def common_prefix(a: str, b: str) -> str:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return a[:n]
+
+
+class PartialTranscript:
+    """Splits successive hypotheses for one utterance into stable + unstable text.
+
+    Text becomes stable once two consecutive hypotheses agree on it (local
+    agreement), cut back to a word boundary for space-separated languages.
+    `stable + unstable` is always the latest hypothesis. Stable text grows
+    while hypotheses extend it; one that rewrites part of it cuts stable
+    back to what they still share, and the client replaces its line.
+    """
+
+    def __init__(self):
+        self.previous = ""
+        self.stable = ""
+
+    def update(self, text: str):
+        if not text.startswith(self.stable):
+            self.stable = word_prefix(common_prefix(self.stable, text), text)
+        agreed = common_prefix(self.previous, text)
+        if agreed != text and " " in agreed:
+            agreed = agreed[:agreed.rindex(" ") + 1]
+        elif agreed != text and " " in text:
+            agreed = ""
+        if len(agreed) > len(self.stable) and agreed.startswith(self.stable):
+            self.stable = agreed
+        self.previous = text
+        return self.stable, text[len(self.stable):]
+
+
+def word_prefix(prefix: str, text: str) -> str:
+    """`prefix` of `text` cut back to its last whole word, if `text` has spaces."""
+    if prefix == text or " " not in text:
+        return prefix
+    return prefix[:prefix.rindex(" ") + 1] if " " in prefix else ""
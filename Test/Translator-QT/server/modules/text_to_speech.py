@@ -1,5 +1,28 @@
-from modules.utils import load_wav_base64
+import os
 
-def text_to_speech(text: str) -> str:
+from modules.tts_cache import TTSCache
+# from modules.synthesizer import tts # Uncomment for deploy
+
+# Synthesized audio cache; TTS_CACHE_DIR also keeps it on disk across restarts
+TTS_CACHE_MAX_MB = int(os.environ.get("TTS_CACHE_MAX_MB", 64))
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "")
+
+# The one cache of this process, shared with audio_router: repeated phrases
+# skip synthesis and base64 encoding
+cache = TTSCache(TTS_CACHE_MAX_MB * 2**20, TTS_CACHE_DIR)
+
+
+def synthesize(text: str, language: str = "", voice: str = "") -> bytes:
     """Dummy TTS: giả lập TTS bằng cách load sample.wav"""
-    return load_wav_base64("sample.wav")
+    with open("sample.wav", "rb") as f:
+        return f.read()
+
+    # ================   Uncomment for deploy ================
+    # if language == "ja":
+    #     return bytes.fromhex(tts.tts_japanese(text))
+    # return bytes.fromhex(tts.tts_vietnamese(text))
+    # ================   Uncomment for deploy ================
+
+
+def text_to_speech(text: str, language: str = "", voice: str = "") -> str:
+    return cache.get_encoded(text, language, voice, synthesize)
@@ -0,0 +1,160 @@
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+# Phrases Whisper tends to hallucinate on silence and noise (video outros, subtitles credits)
+DEFAULT_BLOCKED_PHRASES = [
+    "Hãy subscribe cho kênh",
+    "Ghiền Mì Gõ",
+    "Cảm ơn các bạn.",
+    "Hẹn gặp lại ở video tiếp theo",
+    "Chào mừng quý vị đến với bộ phim",
+    "Chúc các bạn đừng quên đăng ký",
+    "ご視聴ありがとうございました",
+    "Cảm ơn các bạn đã xem video hấp dẫn",
+]
+
+DEFAULT_SETTINGS = {
+    "blocked_phrases": DEFAULT_BLOCKED_PHRASES,
+    # Whisper's own silence rule: likely no speech and not confident about the text either
+    "max_no_speech_prob": 0.6,
+    "no_speech_logprob": -1.0,
+    "min_avg_logprob": -1.5,
+    # Repetition loops ("ありがとう ありがとう ありがとう ...") compress unusually well
+    "max_compression_ratio": 2.4,
+}
+
+NO_SPEECH = "no_speech"
+LOW_LOGPROB = "low_logprob"
+REPETITION = "repetition"
+BLOCKED_PHRASE = "blocked_phrase"
+EMPTY = "empty"
+REASONS = (NO_SPEECH, LOW_LOGPROB, REPETITION, BLOCKED_PHRASE, EMPTY)
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold + collapsed whitespace: full-width/half-width kana and
+    composed/decomposed Vietnamese diacritics compare equal."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def compile_phrases(phrases):
+    """One regex alternation over the normalized phrases, longest first; None if empty."""
+    normalized = sorted({normalize(p) for p in phrases if normalize(p)}, key=len, reverse=True)
+    if not normalized:
+        return None
+    return re.compile("|".join(re.escape(p) for p in normalized))
+
+
+class TranscriptFilter:
+    """Drops hallucinated or low-confidence STT segments before translation and TTS.
+
+    A segment is rejected for the first matching reason: Whisper's
+    no-speech rule, a low average log-probability, a high compression
+    ratio (repetition loops), or a blocked phrase. `apply()` returns the
+    text of the segments that pass, "" when none do, and counts rejections
+    per reason.
+
+    Settings come from DEFAULT_SETTINGS overridden by the JSON file at
+    `path`, which is re-read when its mtime changes (checked at most every
+    `reload_interval` seconds), so the phrase list can be edited without a
+    restart.
+    """
+
+    def __init__(self, path="", reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.counts = {reason: 0 for reason in REASONS}
+        self.checked = 0
+        self.reloads = 0
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._settings, self._pattern = self._compile(DEFAULT_SETTINGS)
+        self.reload()
+
+    def reload(self):
+        """Re-read the config file if it changed; True if new settings took effect."""
+        try:
+            mtime = os.path.getmtime(self.path) if self.path else None
+        except OSError:
+            mtime = None
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                settings = {**DEFAULT_SETTINGS, **json.load(f)}
+            compiled = self._compile(settings)
+        except Exception as e:
+            print(f"[FILTER] Failed to load {self.path}: {e}")
+            return False
+        # One assignment, so concurrent apply() calls see either the old or the new pair
+        self._settings, self._pattern = compiled
+        self.reloads += 1
+        print(f"[FILTER] Loaded {len(settings['blocked_phrases'])} blocked phrases from {self.path}")
+        return True
+
+    def rejection(self, segment):
+        """Reason `segment` (a result segment dict) is rejected, or None."""
+        settings = self._settings
+        no_speech_prob = segment.get("no_speech_prob")
+        avg_logprob = segment.get("avg_logprob")
+        compression_ratio = segment.get("compression_ratio")
+        if (no_speech_prob is not None and avg_logprob is not None
+                and no_speech_prob > settings["max_no_speech_prob"]
+                and avg_logprob < settings["no_speech_logprob"]):
+            return NO_SPEECH
+        if avg_logprob is not None and avg_logprob < settings["min_avg_logprob"]:
+            return LOW_LOGPROB
+        if compression_ratio is not None and compression_ratio > settings["max_compression_ratio"]:
+            return REPETITION
+        pattern = self._pattern
+        if pattern is not None and pattern.search(normalize(segment.get("text", ""))):
+            return BLOCKED_PHRASE
+        return None
+
+    def apply(self, result, count=True):
+        """Text of the segments of an STT `result` that pass the filter ("" if none)."""
+        if self.path and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.reload_interval
+            self.reload()
+
+        segments = result.get("segments") or [{"text": result.get("text", "")}]
+        kept = []
+        reasons = []
+        for segment in segments:
+            reason = self.rejection(segment)
+            if reason is None:
+                kept.append(segment.get("text", "").strip())
+            else:
+                reasons.append(reason)
+        text = " ".join(t for t in kept if t)
+        if not text and not reasons:
+            reasons.append(EMPTY)
+
+        if count:
+            with self._lock:
+                self.checked += 1
+                for reason in reasons:
+                    self.counts[reason] += 1
+        return text
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            checked = self.checked
+        return {
+            "checked": checked,
+            "rejected_segments": counts,
+            "blocked_phrases": len(self._settings["blocked_phrases"]),
+            "reloads": self.reloads,
+            "config": self.path,
+        }
+
+    @staticmethod
+    def _compile(settings):
+        return settings, compile_phrases(settings["blocked_phrases"])
@@ -1,3 +1,27 @@
-def translate_text(text: str, src_lang: str, tgt_lang: str) -> str:
+import os
+
+from modules.translation_memory import TranslationMemory
+
+# Translation memory; TRANSLATION_MEMORY_PATH is a SQLite file kept across restarts
+TRANSLATION_MEMORY_PATH = os.environ.get("TRANSLATION_MEMORY_PATH", "")
+TRANSLATION_MEMORY_ENTRIES = int(os.environ.get("TRANSLATION_MEMORY_ENTRIES", 10000))
+TRANSLATION_MEMORY_ROWS = int(os.environ.get("TRANSLATION_MEMORY_ROWS", 200000))
+TRANSLATION_MEMORY_TTL_DAYS = float(os.environ.get("TRANSLATION_MEMORY_TTL_DAYS", 30))
+
+# The one memory of this process, shared with audio_router: repeated phrases
+# skip the translation backend
+memory = TranslationMemory(
+    TRANSLATION_MEMORY_PATH,
+    max_entries=TRANSLATION_MEMORY_ENTRIES,
+    max_rows=TRANSLATION_MEMORY_ROWS,
+    ttl=TRANSLATION_MEMORY_TTL_DAYS * 86400,
+)
+
+
+def translate_batch(texts: list, src_lang: str, tgt_lang: str) -> list:
     """Dummy Translate: thêm hậu tố chỉ ngôn ngữ"""
-    return f"{text} [Translated {src_lang} -> {tgt_lang}]"
+    return [f"{text} [Translated {src_lang} -> {tgt_lang}]" for text in texts]
+
+
+def translate_text(text: str, src_lang: str, tgt_lang: str) -> str:
+    return memory.translate([text], src_lang, tgt_lang, translate_batch)[0]
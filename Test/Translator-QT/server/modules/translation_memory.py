@@ -0,0 +1,211 @@
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize(text: str) -> str:
+    """NFKC + collapsed whitespace, so trivially different STT output shares an entry."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TranslationMemory:
+    """Translation cache: an in-process LRU in front of an optional SQLite store.
+
+    Entries are keyed on (src_lang, tgt_lang, normalized text). Entries
+    older than `ttl` seconds count as misses. `max_entries` bounds the
+    LRU, and `max_rows` bounds the SQLite table; `evict()` trims it
+    (least recently used first) and drops expired rows, and runs on its own
+    every `evict_every` writes. On startup the `warm_entries` most recently
+    used rows are loaded into the LRU.
+
+    With `path=""` there is no SQLite store, only the LRU.
+    """
+
+    def __init__(self, path="", max_entries=10000, max_rows=200000, ttl=30 * 86400, warm_entries=None,
+                 evict_every=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rows_evicted = 0
+        self._writes = 0
+        self._entries = OrderedDict()
+        self._touched = set()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " src TEXT, tgt TEXT, text TEXT, translation TEXT,"
+                " created REAL, last_used REAL,"
+                " PRIMARY KEY (src, tgt, text))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+            self._db.commit()
+            self.warm(max_entries if warm_entries is None else warm_entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text, src_lang, tgt_lang):
+        return self.get_many([text], src_lang, tgt_lang)[0]
+
+    def get_many(self, texts, src_lang, tgt_lang):
+        """Translations for `texts` (None where missing), with one SQLite query for all LRU misses."""
+        now = time.time()
+        keys = [(src_lang, tgt_lang, normalize(text)) for text in texts]
+        results = [None] * len(keys)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                if self._db is not None:
+                    self._touched.add(key)
+                results[i] = entry[0]
+                self.hits += 1
+
+        if missing and self._db is not None:
+            found = self._select(src_lang, tgt_lang, [key[2] for key in missing], now - self.ttl)
+            with self._lock:
+                for text, (translation, created) in found.items():
+                    key = (src_lang, tgt_lang, text)
+                    for i in missing.pop(key):
+                        results[i] = translation
+                        self.hits += 1
+                        self.disk_hits += 1
+                    self._store(key, translation, created)
+
+        with self._lock:
+            self.misses += sum(len(indices) for indices in missing.values())
+        return results
+
+    def put(self, text, src_lang, tgt_lang, translation):
+        self.put_many([text], [translation], src_lang, tgt_lang)
+
+    def put_many(self, texts, translations, src_lang, tgt_lang):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, translation in zip(texts, translations):
+                key = (src_lang, tgt_lang, normalize(text))
+                self._store(key, translation, now)
+                rows.append((*key, translation, now, now))
+        if self._db is not None:
+            with self._lock:
+                self._db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._db.commit()
+                self._writes += len(rows)
+                due = self._writes >= self.evict_every
+            if due:
+                self.evict()
+
+    def translate(self, texts, src_lang, tgt_lang, translate_batch):
+        """Translate `texts`, calling `translate_batch(texts, src, tgt)` only for the misses."""
+        results = self.get_many(texts, src_lang, tgt_lang)
+        misses = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        if misses:
+            translated = dict(zip(misses, translate_batch(misses, src_lang, tgt_lang)))
+            self.put_many(list(translated), list(translated.values()), src_lang, tgt_lang)
+            results = [translated[text] if result is None else result for text, result in zip(texts, results)]
+        return results
+
+    def warm(self, limit):
+        """Load the `limit` most recently used, unexpired rows into the LRU."""
+        if self._db is None or limit <= 0:
+            return 0
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT src, tgt, text, translation, created FROM translations"
+                " WHERE created >= ? ORDER BY last_used DESC LIMIT ?",
+                (time.time() - self.ttl, limit),
+            ).fetchall()
+            for src, tgt, text, translation, created in reversed(rows):
+                self._store((src, tgt, text), translation, created)
+        return len(rows)
+
+    def evict(self):
+        """Flush LRU usage to SQLite, drop expired rows and trim to `max_rows`."""
+        if self._db is None:
+            return 0
+        now = time.time()
+        with self._lock:
+            self._writes = 0
+            self._flush_touched(now)
+            deleted = self._db.execute("DELETE FROM translations WHERE created < ?", (now - self.ttl,)).rowcount
+            deleted += self._db.execute(
+                "DELETE FROM translations WHERE rowid IN ("
+                " SELECT rowid FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            ).rowcount
+            self._db.commit()
+            self.rows_evicted += deleted
+        return deleted
+
+    def close(self):
+        if self._db is not None:
+            self.evict()
+            self._db.close()
+            self._db = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rows_evicted": self.rows_evicted,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+        if self._db is not None:
+            with self._lock:
+                stats["rows"] = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        return stats
+
+    def _select(self, src_lang, tgt_lang, texts, min_created):
+        found = {}
+        with self._lock:
+            # Stay under SQLite's default limit of 999 bound parameters
+            for start in range(0, len(texts), 900):
+                chunk = texts[start:start + 900]
+                marks = ",".join("?" * len(chunk))
+                for text, translation, created in self._db.execute(
+                    f"SELECT text, translation, created FROM translations"
+                    f" WHERE src = ? AND tgt = ? AND created >= ? AND text IN ({marks})",
+                    (src_lang, tgt_lang, min_created, *chunk),
+                ):
+                    found[text] = (translation, created)
+        return found
+
+    def _store(self, key, translation, created):
+        self._entries[key] = (translation, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _flush_touched(self, now):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE translations SET last_used = ? WHERE src = ? AND tgt = ? AND text = ?",
+                [(now, *key) for key in self._touched],
+            )
+            self._touched.clear()
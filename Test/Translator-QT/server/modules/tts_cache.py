@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ("audio", "encoded", "size")
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.encoded = {}
+        self.size = len(audio)
+
+
+class TTSCache:
+    """LRU cache of synthesized audio keyed by (text, language, voice).
+
+    Memory use is bounded by `max_bytes`, counting the audio plus any
+    encoded forms kept with it (e.g. base64 for JSON). With `cache_dir`,
+    every synthesized clip is also written there and read back on a memory
+    miss, so the cache survives restarts; the directory itself is not
+    size-bounded.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20, cache_dir=""):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(text, language, voice=""):
+        return " ".join(text.split()), language, voice
+
+    def get(self, text, language, voice=""):
+        entry = self._lookup(self.key(text, language, voice))
+        return entry.audio if entry else None
+
+    def put(self, text, language, voice, audio):
+        key = self.key(text, language, voice)
+        self._store(key, _Entry(audio))
+        if self.cache_dir:
+            self._write_disk(key, audio)
+
+    def get_or_synthesize(self, text, language, voice, synthesize):
+        """Cached audio, or `synthesize(text, language, voice)` stored on a miss."""
+        return self._get_entry(text, language, voice, synthesize).audio
+
+    def get_encoded(self, text, language, voice, synthesize, encoding="base64"):
+        """Like get_or_synthesize, but also keeps the encoded form (base64 or hex)."""
+        entry = self._get_entry(text, language, voice, synthesize)
+        encoded = entry.encoded.get(encoding)
+        if encoded is None:
+            if encoding == "base64":
+                encoded = base64.b64encode(entry.audio).decode("utf-8")
+            elif encoding == "hex":
+                encoded = entry.audio.hex()
+            else:
+                raise ValueError(f"Unknown encoding: {encoding}")
+            with self._lock:
+                if encoding not in entry.encoded:
+                    entry.encoded[encoding] = encoded
+                    entry.size += len(encoded)
+                    if self._entries.get(self.key(text, language, voice)) is entry:
+                        self.bytes += len(encoded)
+                        self._evict()
+        return encoded
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _get_entry(self, text, language, voice, synthesize):
+        key = self.key(text, language, voice)
+        entry = self._lookup(key)
+        if entry is None:
+            audio = synthesize(key[0], language, voice)
+            entry = _Entry(audio)
+            self._store(key, entry)
+            if self.cache_dir:
+                self._write_disk(key, audio)
+        return entry
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        audio = self._read_disk(key) if self.cache_dir else None
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+        entry = _Entry(audio)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict()
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+
+    def _path(self, key):
+        digest = hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".wav")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"[TTS CACHE ERROR] read: {e}")
+            return None
+
+    def _write_disk(self, key, audio):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[TTS CACHE ERROR] write: {e}")
@@ -1,6 +0,0 @@
-import base64
-
-def load_wav_base64(path: str) -> str:
-    with open(path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode("utf-8")
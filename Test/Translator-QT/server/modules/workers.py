@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WorkerPool:
+    """Fixed-size pool shared by every session.
+
+    Work is submitted through lanes: each lane runs its items one at a time and
+    in order (per-role DSP state is not thread-safe), while different lanes run
+    in parallel. `mode="inline"` runs everything on the caller's thread, which
+    is the old behaviour and handy for debugging.
+    """
+
+    def __init__(self, max_workers=None, mode="thread", name="worker"):
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = None
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=name)
+        elif mode != "inline":
+            raise ValueError(f"Unknown worker pool mode: {mode}")
+
+    def lane(self, max_pending=50, batch=8):
+        return SerialLane(self, max_pending, batch)
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SerialLane:
+    """Ordered queue of callables drained on a WorkerPool.
+
+    At most `max_pending` items wait; beyond that the oldest is dropped and
+    counted. A lane gives its worker back after `batch` items so one busy
+    session can't starve the others.
+    """
+
+    def __init__(self, pool, max_pending=50, batch=8):
+        self.pool = pool
+        self.max_pending = max_pending
+        self.batch = batch
+        self.dropped = 0
+        self.closed = False
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def shed(self):
+        return {"drop_oldest": self.dropped}
+
+    def submit(self, fn, *args):
+        if self.closed:
+            return
+        if self.pool.executor is None:
+            self._call(fn, args)
+            return
+
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append((fn, args))
+            if self._running:
+                return
+            self._running = True
+        self.pool.executor.submit(self._drain)
+
+    def close(self):
+        """Drop queued work; items already running finish."""
+        self.closed = True
+        with self._lock:
+            self._pending.clear()
+
+    def _drain(self):
+        for _ in range(self.batch):
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                fn, args = self._pending.popleft()
+            self._call(fn, args)
+
+        with self._lock:
+            if not self._pending:
+                self._running = False
+                return
+        try:
+            self.pool.executor.submit(self._drain)
+        except RuntimeError:
+            # Pool shut down
+            self._running = False
+
+    def _call(self, fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[WORKER ERROR] {fn.__name__}: {e}")
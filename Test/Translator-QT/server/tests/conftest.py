@@ -0,0 +1,92 @@
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+
+import pytest
+
+# Tests import server code as `modules.x`, the way the server itself runs
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+
+class LiveServer:
+    """The app served in-process on its own event-loop thread.
+
+    A probe task on that loop sleeps PROBE_INTERVAL at a time and records
+    how late it wakes up in `lags` (seconds).
+    """
+
+    PROBE_INTERVAL = 0.01
+
+    def __init__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.url = f"ws://127.0.0.1:{self.port}/ws/audio"
+        self.lags = []
+        self.loop = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True)
+
+    async def _probe(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.PROBE_INTERVAL)
+            self.lags.append(time.perf_counter() - start - self.PROBE_INTERVAL)
+
+    async def _serve(self):
+        import uvicorn
+        # By path: the desktop client's main.py shadows it once stts tests put the repo root on sys.path
+        spec = importlib.util.spec_from_file_location("server_main", os.path.join(SERVER_DIR, "main.py"))
+        main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(main)
+        app = main.app
+        self.loop = asyncio.get_running_loop()
+
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        serve_task = asyncio.create_task(server.serve())
+        probe_task = asyncio.create_task(self._probe())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        self._ready.set()
+        while not self._stop.is_set():
+            await asyncio.sleep(0.1)
+        server.should_exit = True
+        await serve_task
+        probe_task.cancel()
+
+    def task_count(self):
+        """Tasks alive on the server's loop, the probe's included."""
+        async def count():
+            return len(asyncio.all_tasks())
+        return asyncio.run_coroutine_threadsafe(count(), self.loop).result(5)
+
+    def stats(self):
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/sessions", timeout=5) as response:
+            return json.load(response)
+
+    def start(self):
+        self._thread.start()
+        if not self._ready.wait(60):
+            raise RuntimeError("server did not start")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=10)
+
+
+@pytest.fixture(scope="session")
+def live_server():
+    os.environ.setdefault("STT_BACKEND", "stub")
+    server = LiveServer()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,44 @@
+"""Client-side reconnect spool (stts/transport.py RoleStream)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from stts.transport import RoleStream  # noqa: E402
+
+
+def make_stream():
+    stream = RoleStream(transport=None, role="user", url="ws://unused")
+    stream.running = True
+    return stream
+
+
+def wire_stamp(stamp_ns):
+    """speech_end_ts as the server echoes it: the v2 header's microseconds, in seconds."""
+    return (stamp_ns // 1000) / 1e6
+
+
+def test_acknowledging_the_last_sent_chunk_empties_the_spool():
+    stream = make_stream()
+    stamps = [1_234_567_890_123_456_789 + i * 21_333_333 for i in range(3)]
+    for stamp in stamps:
+        stream._spool_chunk(b"\0" * 4096, stamp, sent=True)
+
+    stream._acknowledge(wire_stamp(stamps[1]))
+    assert [entry[1] for entry in stream._spool] == stamps[2:]
+
+    stream._acknowledge(wire_stamp(stamps[2]))
+    assert not stream._spool
+    assert stream._spool_bytes == 0
+
+
+def test_evicting_sent_audio_is_not_a_drop():
+    stream = make_stream()
+    for i in range(stream._spool_limit // 4096 + 10):
+        stream._spool_chunk(b"\0" * 4096, i, sent=True)
+    assert stream.chunks_dropped == 0
+    assert not stream._dropped
+
+    for i in range(stream._spool_limit // 4096 + 10):
+        stream._spool_chunk(b"\0" * 4096, i)
+    assert stream.chunks_dropped == 10
+    assert stream._dropped
@@ -0,0 +1,64 @@
+"""The client's Downsampler (stts/dsp.py) must filter exactly like PolyphaseDecimator.
+
+The client ships without the server code, so the two keep their own copy
+of the filter design and polyphase core; these tests catch them drifting.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from modules import dsp as server_dsp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from stts import dsp as client_dsp  # noqa: E402
+
+CONFIGS = [
+    # in_rate, out_rate, channels, cutoff, num_taps
+    (48000, 16000, 2, 3000.0, 96),
+    (48000, 16000, 1, 3000.0, 96),
+    (48000, 16000, 2, 7000.0, 64),
+    (32000, 16000, 2, 3000.0, 95),
+]
+
+
+@pytest.mark.parametrize("num_taps,cutoff,rate", [(96, 3000.0, 48000), (64, 7000.0, 48000), (95, 3000.0, 32000)])
+def test_design_lowpass_matches(num_taps, cutoff, rate):
+    np.testing.assert_array_equal(
+        client_dsp.design_lowpass(num_taps, cutoff, rate),
+        server_dsp.design_lowpass(num_taps, cutoff, rate),
+    )
+
+
+@pytest.mark.parametrize("in_rate,out_rate,channels,cutoff,num_taps", CONFIGS)
+def test_polyphase_taps_match(in_rate, out_rate, channels, cutoff, num_taps):
+    client = client_dsp.Downsampler(in_rate, out_rate, channels, cutoff, num_taps)
+    server = server_dsp.PolyphaseDecimator(in_rate, out_rate, channels, cutoff, num_taps)
+    assert client.num_taps == server.num_taps
+    assert len(client._branches) == len(server._branches)
+    for client_branch, server_branch in zip(client._branches, server._branches):
+        # The server also folds the int16 -> float scaling into its taps
+        np.testing.assert_allclose(client_branch / 32768.0, server_branch, rtol=1e-6)
+
+
+@pytest.mark.parametrize("in_rate,out_rate,channels,cutoff,num_taps", CONFIGS)
+def test_streaming_output_matches(in_rate, out_rate, channels, cutoff, num_taps):
+    client = client_dsp.Downsampler(in_rate, out_rate, channels, cutoff, num_taps)
+    server = server_dsp.PolyphaseDecimator(in_rate, out_rate, channels, cutoff, num_taps)
+    rng = np.random.default_rng(0)
+    pcm = (rng.standard_normal(in_rate * channels) * 4000).clip(-32768, 32767).astype(np.int16)
+
+    got, expected = [], []
+    start = 0
+    # Uneven chunk sizes, so the decimation phase carries over differently each call
+    for frames in (1, 1023, 1024, 7, 960, 4096):
+        chunk = pcm[start * channels:(start + frames) * channels]
+        got.append(client.process(chunk.tobytes()))
+        expected.append(server.process(chunk.tobytes()))
+        start += frames
+    got, expected = np.concatenate(got), np.concatenate(expected)
+
+    assert len(got) == len(expected)
+    # The client rounds to int16; allow that rounding and float32 noise
+    assert np.abs(got - expected * 32768).max() <= 0.51
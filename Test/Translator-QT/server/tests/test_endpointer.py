@@ -0,0 +1,86 @@
+import numpy as np
+
+from modules.endpointer import CUT, DISCARD, END, START, Endpointer
+
+FRAME_SAMPLES = 4
+
+
+class Feed:
+    """Pushes numbered synthetic frames: every sample of frame i is i."""
+
+    def __init__(self, **kwargs):
+        self.endpointer = Endpointer(frame_ms=20, frame_samples=FRAME_SAMPLES, **kwargs)
+        self.n = 0
+        self.events = []
+
+    def push(self, pattern, energy=0.5, energies=None):
+        """pattern: string of "s" (speech) and "." (silence), one per frame."""
+        for i, c in enumerate(pattern):
+            frame = np.full(FRAME_SAMPLES, self.n, dtype=np.float32)
+            e = energies[i] if energies is not None else energy
+            for event, audio, raws in self.endpointer.push(frame, c == "s", e, raw=self.n):
+                frames = None if audio is None else audio.reshape(-1, FRAME_SAMPLES)[:, 0].astype(int).tolist()
+                self.events.append((event, frames, raws))
+            self.n += 1
+        return self
+
+
+def test_pre_roll_keeps_the_frames_before_onset():
+    feed = Feed(pre_roll_ms=60, hangover_ms=40, min_speech_ms=20).push("....." + "sss" + "..")
+    (start, _, _), (end, frames, raws) = feed.events
+    assert (start, end) == (START, END)
+    # 3 frames of pre-roll (2, 3, 4), the speech (5-7), and one hangover frame (8)
+    assert frames == [2, 3, 4, 5, 6, 7, 8]
+    assert raws == frames
+
+
+def test_no_pre_roll():
+    feed = Feed(pre_roll_ms=0, hangover_ms=40, min_speech_ms=20).push("...ss..")
+    assert feed.events[1][1] == [3, 4, 5]
+
+
+def test_hangover_merges_bursts_separated_by_a_shorter_pause():
+    # hangover 100 ms = 5 frames; a 4-frame pause doesn't end the utterance
+    feed = Feed(pre_roll_ms=0, hangover_ms=100, min_speech_ms=20).push("sss" + "...." + "sss" + ".....")
+    assert [e for e, _, _ in feed.events] == [START, END]
+    assert feed.events[1][1] == list(range(0, 14))
+
+
+def test_pause_as_long_as_hangover_splits_bursts():
+    feed = Feed(pre_roll_ms=0, hangover_ms=100, min_speech_ms=20).push("sss" + "....." + "sss" + ".....")
+    assert [e for e, _, _ in feed.events] == [START, END, START, END]
+    assert feed.events[1][1] == [0, 1, 2, 3, 4, 5, 6]
+    assert feed.events[3][1] == [8, 9, 10, 11, 12, 13, 14]
+
+
+def test_burst_shorter_than_min_speech_is_discarded():
+    # min speech 100 ms = 5 voiced frames
+    feed = Feed(pre_roll_ms=0, hangover_ms=40, min_speech_ms=100).push("ssss..")
+    assert [e for e, _, _ in feed.events] == [START, DISCARD]
+    feed = Feed(pre_roll_ms=0, hangover_ms=40, min_speech_ms=100).push("sssss..")
+    assert [e for e, _, _ in feed.events] == [START, END]
+
+
+def test_force_cut_lands_after_the_quietest_frame_in_the_search_window():
+    # 20 frames max; the cut searches the last 5 (frames 15-19)
+    energies = [0.5] * 20
+    energies[3] = 0.01  # quieter, but outside the search window
+    energies[17] = 0.1
+    feed = Feed(pre_roll_ms=0, hangover_ms=100, min_speech_ms=20,
+                max_utterance_ms=400, cut_search_ms=100)
+    feed.push("s" * 20, energies=energies)
+    assert [e for e, _, _ in feed.events] == [START, CUT, START]
+    assert feed.events[1][1] == list(range(0, 18))
+    assert feed.events[1][2] == list(range(0, 18))
+
+    # Frames after the cut start the next utterance
+    feed.push("s" + ".....")
+    assert feed.events[-1][0] == END
+    assert feed.events[-1][1] == [18, 19, 20, 21, 22, 23, 24]
+
+
+def test_flush_ends_an_open_utterance():
+    feed = Feed(pre_roll_ms=0, hangover_ms=100, min_speech_ms=20).push("sss")
+    (event, audio, _), = feed.endpointer.flush()
+    assert event == END and len(audio) == 3 * FRAME_SAMPLES
+    assert feed.endpointer.flush() == []
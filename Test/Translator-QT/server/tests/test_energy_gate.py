@@ -0,0 +1,44 @@
+import numpy as np
+
+from modules.dsp import EnergyGate
+
+FRAME_MS = 20
+BLOCK_FRAMES = 5
+
+
+def dbfs(level):
+    return 10 ** (level / 20)
+
+
+def feed(gate, energy, seconds):
+    """Blocks of constant frame energy; the mask of the last block."""
+    mask = None
+    for _ in range(int(seconds * 1000 / FRAME_MS / BLOCK_FRAMES)):
+        mask = gate.process(np.full(BLOCK_FRAMES, energy, dtype=np.float32))
+    return mask
+
+
+def test_steady_noise_gets_gated():
+    gate = EnergyGate(FRAME_MS)
+    assert not feed(gate, dbfs(-55), 15).any()
+
+
+def test_digital_silence_does_not_pin_the_floor():
+    gate = EnergyGate(FRAME_MS)
+    feed(gate, 0.0, 0.1)
+    assert gate.floor > 0
+    # From the lowest floor, 3 dB/s reaches -55 dBFS noise in about 7 s
+    assert not feed(gate, dbfs(-55), 15).any()
+
+
+def test_loud_frames_always_reach_the_vad():
+    gate = EnergyGate(FRAME_MS)
+    feed(gate, dbfs(-40), 60)
+    assert gate.process(np.array([dbfs(-45)], dtype=np.float32)).all()
+
+
+def test_floor_drops_at_once():
+    gate = EnergyGate(FRAME_MS)
+    feed(gate, dbfs(-50), 15)
+    feed(gate, dbfs(-65), FRAME_MS * BLOCK_FRAMES / 1000)
+    assert gate.process(np.array([dbfs(-55)], dtype=np.float32)).all()
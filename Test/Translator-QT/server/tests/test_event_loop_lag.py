@@ -0,0 +1,69 @@
+"""Event-loop lag under concurrent sessions, scaled down from benchmarks/bench_event_loop_lag.py.
+
+The clients stream from a separate process, so they don't compete with the
+server for the GIL.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import wave
+
+import numpy as np
+import websockets
+
+from conftest import SERVER_DIR
+from modules.protocol import pack_v2
+
+SESSIONS = 10
+SECONDS = 5
+CHUNK_FRAMES = 1024
+# Same bar as the benchmark, which runs five times the sessions
+MAX_P99_LAG_MS = 50
+
+
+def load_speech():
+    # 44.1 kHz stereo, streamed as if it were 48 kHz: a little fast, still speech to the VAD
+    with wave.open(os.path.join(SERVER_DIR, "sample.wav"), "rb") as wf:
+        return wf.readframes(wf.getnframes())
+
+
+async def session(url, role, speech, seconds):
+    chunk_bytes = CHUNK_FRAMES * 4
+    async with websockets.connect(url + "?protocol=2&caps=binary_audio", max_size=None, compression=None) as ws:
+        await ws.recv()  # hello
+        await ws.send(json.dumps({"type": "control", "sender": role, "src_lang": "vi", "tgt_lang": "ja"}))
+        start = time.perf_counter()
+        for seq in range(int(seconds * 48000 / CHUNK_FRAMES)):
+            offset = seq * chunk_bytes % (len(speech) - chunk_bytes)
+            chunk = speech[offset:offset + chunk_bytes]
+            await ws.send(pack_v2(role, seq, time.monotonic_ns() // 1000, chunk))
+            delay = start + (seq + 1) * CHUNK_FRAMES / 48000 - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+def run_clients(url, sessions, seconds):
+    speech = load_speech()
+
+    async def run():
+        await asyncio.gather(*(
+            session(url, "user" if i % 2 else "other", speech, seconds) for i in range(sessions)
+        ))
+
+    asyncio.run(run())
+
+
+def test_event_loop_lag_under_concurrent_sessions(live_server):
+    clients = multiprocessing.get_context("spawn").Process(
+        target=run_clients, args=(live_server.url, SESSIONS, SECONDS),
+    )
+    del live_server.lags[:]
+    clients.start()
+    clients.join(timeout=SECONDS + 30)
+    assert clients.exitcode == 0
+
+    lag_ms = np.array(live_server.lags) * 1000
+    assert len(lag_ms) > SECONDS * 10
+    assert np.percentile(lag_ms, 99) <= MAX_P99_LAG_MS
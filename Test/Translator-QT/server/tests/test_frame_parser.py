@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pytest
+
+from modules.frame_parser import HEADER_LEN, FrameAccumulator, FrameParser
+from modules.protocol import PROTOCOL_V1, PROTOCOL_V2, pack_v2
+
+
+def pack_v1(header, pcm):
+    header_bytes = json.dumps({**header, "length": len(pcm)}).encode("utf-8")
+    return HEADER_LEN.pack(len(header_bytes)) + header_bytes + pcm
+
+
+def pcm(n, seed):
+    return np.random.default_rng(seed).integers(-32768, 32767, n, dtype=np.int16).tobytes()
+
+
+RECORDS = {
+    PROTOCOL_V1: [
+        pack_v1({"sender": "user", "timestamp": 1.0}, pcm(300, 1)),
+        pack_v1({"sender": "other", "timestamp": 2.0}, pcm(17, 2)),
+        pack_v1({"sender": "user", "timestamp": 3.0}, pcm(512, 3)),
+    ],
+    PROTOCOL_V2: [
+        pack_v2("user", 0, 1_000_000, pcm(300, 1)),
+        pack_v2("other", 0, 2_000_000, pcm(17, 2)),
+        pack_v2("user", 1, 3_000_000, pcm(512, 3)),
+    ],
+}
+EXPECTED = [("user", pcm(300, 1)), ("other", pcm(17, 2)), ("user", pcm(512, 3))]
+
+
+def reassemble(parser, messages):
+    """(sender, timestamp) -> payload bytes, in arrival order."""
+    records = []
+    for message in messages:
+        for header, payload in parser.feed(message):
+            key = (header["sender"], header["timestamp"])
+            if records and records[-1][0] == key:
+                records[-1][1].extend(payload)
+            else:
+                records.append((key, bytearray(payload)))
+    return [(sender, bytes(payload)) for (sender, _), payload in records]
+
+
+@pytest.mark.parametrize("protocol", [PROTOCOL_V1, PROTOCOL_V2])
+def test_records_coalesced_into_one_message(protocol):
+    parser = FrameParser(protocol)
+    assert reassemble(parser, [b"".join(RECORDS[protocol])]) == EXPECTED
+    assert parser.header_errors == 0
+
+
+@pytest.mark.parametrize("protocol", [PROTOCOL_V1, PROTOCOL_V2])
+def test_record_split_at_every_offset(protocol):
+    record = RECORDS[protocol][0]
+    for offset in range(1, len(record)):
+        parser = FrameParser(protocol)
+        assert reassemble(parser, [record[:offset], record[offset:]]) == EXPECTED[:1], offset
+
+
+@pytest.mark.parametrize("protocol", [PROTOCOL_V1, PROTOCOL_V2])
+def test_coalesced_records_split_at_every_offset(protocol):
+    stream = b"".join(RECORDS[protocol])
+    for offset in range(1, len(stream)):
+        parser = FrameParser(protocol)
+        assert reassemble(parser, [stream[:offset], stream[offset:]]) == EXPECTED, offset
+
+
+@pytest.mark.parametrize("protocol", [PROTOCOL_V1, PROTOCOL_V2])
+def test_one_byte_messages(protocol):
+    stream = b"".join(RECORDS[protocol])
+    parser = FrameParser(protocol)
+    assert reassemble(parser, [stream[i:i + 1] for i in range(len(stream))]) == EXPECTED
+
+
+def test_v1_without_length_runs_to_end_of_message():
+    header = json.dumps({"sender": "user", "timestamp": 1.0}).encode("utf-8")
+    message = HEADER_LEN.pack(len(header)) + header + pcm(100, 4)
+    assert reassemble(FrameParser(PROTOCOL_V1), [message]) == [("user", pcm(100, 4))]
+
+
+def test_accumulator_carries_partial_frame():
+    frame_bytes = 960 * 2 * 2
+    # 2.5 frames and half a sample
+    data = pcm(frame_bytes * 2, 5)[:frame_bytes * 2 + frame_bytes // 2 + 1]
+    accumulator = FrameAccumulator(960, 2, 2)
+    out = []
+    for start in range(0, len(data), 1500):
+        accumulator.write(data[start:start + 1500])
+        frames = accumulator.frames()
+        if frames is not None:
+            assert frames.shape[1:] == (960, 2)
+            out.append(frames.tobytes())
+    assert b"".join(out) == data[:2 * frame_bytes]
+    assert len(accumulator) == len(data) - 2 * frame_bytes
+
+    # The carried-over bytes continue the next frame exactly
+    rest = pcm(frame_bytes, 6)
+    accumulator.write(rest)
+    frames = accumulator.frames()
+    carried = data[2 * frame_bytes:] + rest
+    assert frames.tobytes() == carried[:len(frames) * frame_bytes]
+    assert len(accumulator) == len(carried) - len(frames) * frame_bytes
+
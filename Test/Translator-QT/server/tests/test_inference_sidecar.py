@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+from modules.inference_sidecar import SidecarClient
+
+
+@pytest.fixture
+def client(tmp_path):
+    # No sidecar listens on this path
+    client = SidecarClient(str(tmp_path / "missing.sock"), slots=2, slot_seconds=1)
+    yield client
+    client.close()
+
+
+def test_requests_fail_when_the_sidecar_is_down(client):
+    future = client.submit([0.0] * 160, "en")
+    with pytest.raises(ConnectionError):
+        future.result(timeout=5)
+    # The slot it held is free again
+    assert len(client.arena._free) == 2
+
+
+def test_status_does_not_wait_for_a_busy_sender(client):
+    with client._send_lock:  # as while another thread sends a large inline payload
+        start = time.monotonic()
+        status = client.status()
+        client.submit([0.0] * 160, "en")
+        assert time.monotonic() - start < 0.1
+    assert status["ready"] is False
@@ -0,0 +1,65 @@
+"""Sessions opened and closed leave nothing behind; scaled down from benchmarks/soak_sessions.py."""
+import asyncio
+import time
+
+import numpy as np
+import websockets
+
+from modules.protocol import pack_v2
+
+SESSIONS = 50
+CONCURRENCY = 25
+CHUNKS = 40  # 1024-frame 48 kHz stereo chunks per session, about 0.85 s
+SETTLE_SECONDS = 15
+
+
+async def session(url, role, chunks):
+    async with websockets.connect(url + "?protocol=2&caps=binary_audio", max_size=None, compression=None) as ws:
+        await ws.recv()  # hello
+        for seq, chunk in enumerate(chunks):
+            await ws.send(pack_v2(role, seq, time.monotonic_ns() // 1000, chunk))
+
+
+def run_sessions(url, n, chunks):
+    async def run():
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def one(i):
+            async with semaphore:
+                await session(url, "user" if i % 2 else "other", chunks)
+
+        await asyncio.gather(*(one(i) for i in range(n)))
+
+    asyncio.run(run())
+
+
+def settled(server):
+    deadline = time.monotonic() + SETTLE_SECONDS
+    while True:
+        stats = server.stats()
+        idle = not any(stage["queued"] or stage["busy"] for stage in stats["pipeline"].values())
+        if (stats["sessions"] == 0 and stats["queued_utterances"] == 0 and idle) or time.monotonic() > deadline:
+            return stats
+        time.sleep(0.2)
+
+
+def test_sessions_are_released(live_server):
+    rng = np.random.default_rng(0)
+    chunks = [(rng.standard_normal(2048) * 3000).astype(np.int16).tobytes() for _ in range(CHUNKS)]
+
+    # Warm up lazily started worker threads before taking the baseline
+    run_sessions(live_server.url, CONCURRENCY, chunks)
+    before = settled(live_server)
+    tasks_before = live_server.task_count()
+
+    run_sessions(live_server.url, SESSIONS, chunks)
+    after = settled(live_server)
+
+    assert after["sessions_opened"] - before["sessions_opened"] == SESSIONS
+    assert after["sessions_closed"] - before["sessions_closed"] == SESSIONS
+    assert after["sessions"] == 0
+    assert after["role_buffers"] == 0
+    assert after["queued_frames"] == 0
+    assert after["queued_utterances"] == 0
+    assert after["threads"] <= before["threads"]
+    assert live_server.task_count() <= tasks_before
@@ -0,0 +1,39 @@
+from modules.streaming import PartialTranscript
+
+
+def run(hypotheses):
+    partial = PartialTranscript()
+    return [partial.update(text) for text in hypotheses]
+
+
+def test_stable_grows_on_agreement():
+    assert run(["hello wor", "hello world foo", "hello world foo bar"]) == [
+        ("", "hello wor"),
+        ("hello ", "world foo"),
+        ("hello world ", "foo bar"),
+    ]
+
+
+def test_rewrite_inside_stable_text_cuts_it_back():
+    results = run(["hello world foo", "hello world bar", "hello word again"])
+    assert results[1] == ("hello world ", "bar")
+    assert results[2] == ("hello ", "word again")
+
+
+def test_stable_grows_again_after_a_rewrite():
+    results = run(["hello world foo", "hello world bar", "hello word again", "hello word again ok"])
+    assert results[3] == ("hello word ", "again ok")
+
+
+def test_every_result_spells_the_hypothesis():
+    hypotheses = ["a b", "a b c", "a x", "a x y", "z", "z y x w"]
+    for text, (stable, unstable) in zip(hypotheses, run(hypotheses)):
+        assert stable + unstable == text
+
+
+def test_languages_without_spaces():
+    assert run(["こんに", "こんにちは", "こんばんは"]) == [
+        ("", "こんに"),
+        ("こんに", "ちは"),
+        ("こん", "ばんは"),
+    ]
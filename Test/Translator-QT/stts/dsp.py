@@ -0,0 +1,68 @@
+"""Client-side downmix and resampling of uplink audio.
+
+Mirrors PolyphaseDecimator in server/modules/dsp.py (same filter design), so
+audio resampled here reaches the server's VAD and STT as it would have after
+the server's own 48 kHz path. The client ships without the server code, so
+the two stay separate copies; server/tests/test_dsp_sync.py fails when
+they stop agreeing.
+"""
+import numpy as np
+
+
+def design_lowpass(num_taps: int, cutoff: float, sample_rate: int) -> np.ndarray:
+    """Windowed-sinc (Hamming) low-pass FIR with unity DC gain."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    fc = cutoff / sample_rate
+    taps = 2 * fc * np.sinc(2 * fc * n) * np.hamming(num_taps)
+    return taps / taps.sum()
+
+
+class Downsampler:
+    """Streaming low-pass + integer decimation of interleaved int16 PCM to mono int16.
+
+    Filter history and decimation phase carry across calls, so chunks of any
+    length come out as one continuous signal. Each call returns however many
+    output samples the input completes (about len / factor).
+    """
+
+    def __init__(self, in_rate=48000, out_rate=16000, channels=2, cutoff=3000.0, num_taps=96):
+        if in_rate % out_rate:
+            raise ValueError(f"in_rate {in_rate} is not a multiple of out_rate {out_rate}")
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.factor = in_rate // out_rate
+
+        num_taps += -num_taps % self.factor
+        taps = design_lowpass(num_taps, cutoff, in_rate)[::-1]
+        # Channel averaging is folded into the taps
+        taps = (taps / channels).astype(np.float32)
+        self.num_taps = num_taps
+        self._branches = [taps[q::self.factor].copy() for q in range(self.factor)]
+        self._branch_len = num_taps // self.factor
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(self.num_taps - 1, dtype=np.float32)
+        self._phase = 0
+
+    def process(self, pcm) -> np.ndarray:
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            pcm = np.frombuffer(pcm, dtype=np.int16)
+        samples = pcm.reshape(-1, self.channels)
+        mono = samples.sum(axis=1, dtype=np.float32) if self.channels > 1 else samples[:, 0].astype(np.float32)
+
+        x = np.concatenate((self._history, mono))
+        n_windows = len(x) - self.num_taps + 1
+        n_out = max(0, -(-(n_windows - self._phase) // self.factor))
+
+        out = np.zeros(n_out, dtype=np.float32)
+        if n_out:
+            span = n_out + self._branch_len - 1
+            for q, branch in enumerate(self._branches):
+                start = self._phase + q
+                out += np.correlate(x[start:start + span * self.factor:self.factor], branch, "valid")
+
+        self._phase = (self._phase - n_windows) % self.factor
+        self._history = x[len(x) - (self.num_taps - 1):]
+        return np.rint(out, out=out).clip(-32768, 32767).astype(np.int16)
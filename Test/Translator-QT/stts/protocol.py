@@ -0,0 +1,65 @@
+"""Client side of the /ws/audio wire protocol.
+
+Mirrors server/modules/protocol.py; keep the two in sync.
+"""
+import json
+import struct
+
+PROTOCOL_V1 = 1
+PROTOCOL_V2 = 2
+SUPPORTED_PROTOCOLS = (PROTOCOL_V2, PROTOCOL_V1)
+
+ROLE_IDS = {"user": 1, "other": 2}
+
+# version, role id, flags, sequence, monotonic timestamp (us), payload length
+HEADER_V2 = struct.Struct("!BBHIQI")
+HEADER_LEN = struct.Struct("!I")
+
+FLAG_DISCONTINUITY = 0x0001
+
+MSG_HELLO = "hello"
+MSG_CONTROL = "control"
+MSG_RESULT = "translate_with_audio"
+MSG_PARTIAL = "partial"
+MSG_FINAL = "final"
+
+# Result audio sent as its own binary frame, prefixed with the utterance id,
+# instead of hex inside the JSON result
+CAP_BINARY_AUDIO = "binary_audio"
+RESULT_AUDIO_HEADER = struct.Struct("!I")
+# `partial` transcripts while the speaker is still talking, then `final`
+# (whose optional `merged` lists the utterance ids folded into it)
+CAP_PARTIALS = "partials"
+# The server reads PCM in the rate/channels each role declares, so the client
+# may send mono 16 kHz (already low-passed) instead of 48 kHz stereo
+CAP_UPLINK_FORMAT = "uplink_format"
+SUPPORTED_CAPABILITIES = (CAP_BINARY_AUDIO, CAP_PARTIALS, CAP_UPLINK_FORMAT)
+
+
+def pack_v1(header: dict, pcm: bytes) -> bytes:
+    header_bytes = json.dumps(header).encode("utf-8")
+    return HEADER_LEN.pack(len(header_bytes)) + header_bytes + pcm
+
+
+def pack_v2(role: str, seq: int, timestamp_us: int, pcm: bytes, flags=0) -> bytes:
+    return HEADER_V2.pack(PROTOCOL_V2, ROLE_IDS[role], flags, seq & 0xFFFFFFFF, timestamp_us, len(pcm)) + pcm
+
+
+def control_message(role: str, src_lang: str, tgt_lang: str, fmt: str, rate: int, channels: int, sample_width: int) -> str:
+    return json.dumps({
+        "type": MSG_CONTROL,
+        "sender": role,
+        "src_lang": src_lang,
+        "tgt_lang": tgt_lang,
+        "format": fmt,
+        "rate": rate,
+        "channels": channels,
+        "sample_width": sample_width,
+    })
+
+
+def protocol_query() -> str:
+    return (
+        "protocol=" + ",".join(str(v) for v in SUPPORTED_PROTOCOLS)
+        + "&caps=" + ",".join(SUPPORTED_CAPABILITIES)
+    )
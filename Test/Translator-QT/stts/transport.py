@@ -0,0 +1,639 @@
+"""asyncio client transport for /ws/audio, shared by every role stream.
+
+One background thread runs one event loop that owns every connection: the
+mic ("user") and speaker ("other") streams no longer need a sender, a
+receiver and a connect thread each. Everything a stream does on the wire
+happens on that loop; the public methods of RoleStream only schedule work
+on it and return at once, so audio callbacks never wait on the network.
+
+With MULTIPLEX on, the "user" and "other" streams of a transport share one
+websocket (one Connection): each record already names its role, and the
+server routes results back by role, so one socket, one heartbeat and one
+hello serve both.
+
+Transcript and audio callbacks run in order on one dispatcher thread, so a
+slow GUI callback can't hold up sending.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import websockets
+
+from stts.dsp import Downsampler
+from stts.protocol import (
+    PROTOCOL_V1, PROTOCOL_V2, MSG_HELLO, MSG_RESULT, MSG_PARTIAL, MSG_FINAL,
+    FLAG_DISCONTINUITY, RESULT_AUDIO_HEADER, CAP_UPLINK_FORMAT,
+    pack_v1, pack_v2, control_message, protocol_query,
+)
+
+DEFAULT_URL = "ws://localhost:8000/ws/audio"
+CONNECT_TIMEOUT = 5
+HELLO_TIMEOUT = 1
+# Reconnect attempt n waits min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2**n),
+# less up to RECONNECT_JITTER of that at random, so clients of a restarted
+# server don't all come back in the same instant
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30
+RECONNECT_JITTER = 0.5
+RECONNECT_RESET_AFTER = 10  # seconds a connection must last before the backoff starts over
+# Per stream: audio captured while reconnecting, plus sent audio no result has
+# covered yet, up to this much; replayed on the new connection
+SPOOL_SECONDS = 5
+SEND_QUEUE_SIZE = 500  # chunks, about 10 s of audio
+# Queued chunks are sent together as one message once the oldest has waited
+# SEND_COALESCE_MS or they reach SEND_COALESCE_BYTES; 0 ms sends every chunk alone
+SEND_COALESCE_MS = 40
+SEND_COALESCE_BYTES = 64 * 1024
+MULTIPLEX = True  # streams of different roles share a connection to the same URL
+# Servers with the uplink_format capability get mono audio at UPLINK_RATE,
+# low-passed at UPLINK_CUTOFF like the server's own 48 kHz path; None sends
+# the captured rate and channels as they are
+UPLINK_RATE = 16000
+UPLINK_CUTOFF = 3000
+_FLUSH = object()  # queued by update_language/stop to end the batch being collected
+
+# Connection states
+CLOSED = "closed"
+CONNECTING = "connecting"
+CONNECTED = "connected"
+BACKOFF = "backoff"
+
+
+def backoff_delay(attempt):
+    delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** min(attempt, 32))
+    return delay * (1 - RECONNECT_JITTER * random.random())
+
+
+class ClientTransport:
+    """Background event loop thread serving any number of RoleStreams."""
+
+    def __init__(self, multiplex=MULTIPLEX):
+        self.loop = asyncio.new_event_loop()
+        self.multiplex = multiplex
+        self.streams = []
+        self.connections = []  # loop side
+        self.callbacks = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ws-callbacks")
+        self._thread = threading.Thread(target=self._run, name="ws-transport", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stream(self, role, url=None, coalesce_ms=SEND_COALESCE_MS, coalesce_bytes=SEND_COALESCE_BYTES,
+               rate=48000, channels=2):
+        stream = RoleStream(self, role, url or DEFAULT_URL, coalesce_ms, coalesce_bytes, rate, channels)
+        self.streams.append(stream)
+        return stream
+
+    def connection(self, stream):
+        """Loop side: a connection for `stream`, shared with other roles if multiplexing."""
+        if self.multiplex:
+            for connection in self.connections:
+                if connection.url == stream.url and stream.role not in connection.streams:
+                    return connection
+        connection = Connection(self, stream.url)
+        self.connections.append(connection)
+        return connection
+
+    def in_loop(self):
+        return threading.current_thread() is self._thread
+
+    def run(self, coro):
+        """Schedule `coro` on the loop from any thread; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, fn, *args):
+        self.loop.call_soon_threadsafe(fn, *args)
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> ClientTransport:
+    """The process-wide transport, started on first use."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = ClientTransport()
+        return _default_transport
+
+
+class Connection:
+    """One websocket to the server, carrying the audio of one or more roles.
+
+    Lives on the transport's loop. It connects when its first stream is
+    attached and closes once the last one is detached. In between it goes
+    CONNECTING -> CONNECTED -> BACKOFF -> CONNECTING ... with a growing,
+    jittered delay after every failed attempt or lost connection. Each attached stream runs its own send loop on
+    the socket; results are routed to the stream of the role they name.
+    """
+
+    def __init__(self, transport, url):
+        self.transport = transport
+        self.url = url
+        self.streams = {}  # role -> RoleStream
+        self.protocol = PROTOCOL_V1
+        self.capabilities = []
+        self.state = CLOSED
+        self.attempts = 0  # connection attempts, successful or not
+        self.reconnects = 0
+        self._ws = None
+        self._task = None
+        self._senders = {}  # role -> send loop task of the current socket
+        self._pending_audio = {}  # utterance_id -> role, waiting for its binary audio frame
+
+    @property
+    def connected(self):
+        return self.state == CONNECTED
+
+    def attach(self, stream):
+        self.streams[stream.role] = stream
+        if self.connected:
+            self._start_sender(stream, self._ws)
+        if self._task is None or self._task.done():
+            self._task = self.transport.loop.create_task(self._run())
+
+    async def detach(self, stream, timeout):
+        """Let the stream's sender finish its batch, then drop the stream."""
+        sender = self._senders.get(stream.role)
+        if sender is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(sender), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                sender.cancel()
+        if self.streams.get(stream.role) is stream:
+            del self.streams[stream.role]
+        if self.streams:
+            return
+        if self.connected:
+            await self._ws.close()
+        elif self._task is not None:
+            self._task.cancel()
+
+    def close_socket(self):
+        if self._ws is not None:
+            self.transport.loop.create_task(self._ws.close())
+
+    def _negotiation_url(self):
+        separator = "&" if "?" in self.url else "?"
+        return f"{self.url}{separator}{protocol_query()}"
+
+    def _start_sender(self, stream, ws):
+        task = asyncio.create_task(stream._send_loop(ws, self.protocol, CAP_UPLINK_FORMAT in self.capabilities))
+        task.add_done_callback(self._sender_done)
+        self._senders[stream.role] = task
+
+    def _sender_done(self, task):
+        # A failed send means the socket is gone; closing it ends the receive loop too
+        if not task.cancelled() and task.exception():
+            print(f"[WebSocketPCMClient] Connection error: {task.exception()}")
+            self.close_socket()
+
+    async def _run(self):
+        failures = 0  # since the last connection that lasted
+        try:
+            while self.streams:
+                self.state = CONNECTING
+                self.attempts += 1
+                try:
+                    ws = await asyncio.wait_for(
+                        websockets.connect(self._negotiation_url(), max_size=None, compression=None),
+                        CONNECT_TIMEOUT,
+                    )
+                except Exception as e:
+                    print(f"[WebSocketPCMClient] Connection failed: {e}")
+                    await self._backoff(failures)
+                    failures += 1
+                    continue
+
+                self._ws = ws
+                connected_at = time.monotonic()
+                try:
+                    self.protocol, self.capabilities = await self._read_hello(ws)
+                    self._pending_audio.clear()
+                    if self.attempts > 1:
+                        self.reconnects += 1
+                    self.state = CONNECTED
+                    roles = ", ".join(self.streams)
+                    print(f"[WebSocketPCMClient] Connected to {self.url} (protocol v{self.protocol}, roles: {roles})")
+                    for stream in list(self.streams.values()):
+                        self._start_sender(stream, ws)
+                    await self._receive_loop(ws)
+                except Exception as e:
+                    print(f"[WebSocketPCMClient] Connection error: {e}")
+                finally:
+                    self.state = BACKOFF
+                    self._ws = None
+                    for task in self._senders.values():
+                        task.cancel()
+                    self._senders.clear()
+                    # Keep what didn't make it out for the next connection
+                    for stream in self.streams.values():
+                        stream._on_disconnect()
+                    await ws.close()
+                    print("[WebSocketPCMClient] Connection closed.")
+
+                if time.monotonic() - connected_at >= RECONNECT_RESET_AFTER:
+                    failures = 0
+                if self.streams:
+                    await self._backoff(failures)
+                    failures += 1
+        finally:
+            self.state = CLOSED
+            if self in self.transport.connections:
+                self.transport.connections.remove(self)
+
+    async def _backoff(self, failures):
+        self.state = BACKOFF
+        delay = backoff_delay(failures)
+        print(f"[WebSocketPCMClient] Attempting to reconnect in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+    async def _read_hello(self, ws):
+        """Wait briefly for the server's hello; servers that don't send one speak v1."""
+        try:
+            msg = await asyncio.wait_for(ws.recv(), HELLO_TIMEOUT)
+            data = json.loads(msg) if isinstance(msg, str) else {}
+            if isinstance(data, dict) and data.get("type") == MSG_HELLO:
+                return int(data.get("protocol", PROTOCOL_V1)), data.get("capabilities", [])
+        except (asyncio.TimeoutError, ValueError):
+            pass
+        return PROTOCOL_V1, []
+
+    async def _receive_loop(self, ws):
+        async for msg in ws:
+            if isinstance(msg, bytes):
+                # binary_audio capability: utterance id + WAV, follows its JSON metadata
+                utterance_id = RESULT_AUDIO_HEADER.unpack_from(msg)[0]
+                role = self._pending_audio.pop(utterance_id, None)
+                if role is None:
+                    print(f"[WS WARNING] Audio for unknown utterance {utterance_id}")
+                elif role in self.streams:
+                    self.streams[role]._dispatch_audio(msg[RESULT_AUDIO_HEADER.size:])
+                continue
+
+            try:
+                data = json.loads(msg)
+            except json.JSONDecodeError:
+                if msg.strip().lower() != "ping":
+                    print("[WS WARNING] Received unparseable string:", msg)
+                continue
+
+            if data.get("type") not in (MSG_PARTIAL, MSG_FINAL, MSG_RESULT):
+                continue
+            role = data["data"]["role"]
+            stream = self.streams.get(role)
+
+            if data.get("type") == MSG_PARTIAL:
+                partial = data["data"]
+                if stream is not None:
+                    stream._dispatch_transcript(
+                        partial["stable"] + partial["unstable"], role,
+                        partial["utterance_id"], stable=partial["stable"], partial=True,
+                    )
+
+            elif data.get("type") == MSG_FINAL:
+                final = data["data"]
+                if stream is not None:
+                    stream._dispatch_transcript(
+                        final["text"], role, final["utterance_id"], merged=final.get("merged", []),
+                    )
+
+            else:
+                transcript_data = data["data"]
+                print(f"[TRANSCRIPT] Receive package from Role: {role}")
+                if stream is not None:
+                    stream._dispatch_transcript(transcript_data["text"], role, transcript_data.get("utterance_id"))
+                    # v2 echoes our own monotonic stamp; audio up to it needs no replay
+                    if "speech_end_ts" in transcript_data and self.protocol == PROTOCOL_V2:
+                        stream._acknowledge(transcript_data["speech_end_ts"])
+
+                if "audio_bytes" in transcript_data:
+                    if stream is not None:
+                        stream._dispatch_audio(bytes.fromhex(transcript_data["audio_bytes"]))
+                else:
+                    self._pending_audio[transcript_data["utterance_id"]] = role
+
+
+class RoleStream:
+    """One role's audio uplink and result downlink on the shared transport.
+
+    `submit()`, `update_language()`, `start()` and `stop()` are safe to call
+    from any thread and never block on the network. All other state belongs
+    to the transport's loop. The socket itself belongs to the Connection the
+    stream is attached to while started.
+
+    While the connection is down, audio goes to a ring spool of the last
+    SPOOL_SECONDS instead of being dropped. On v2 the spool also keeps the
+    audio already sent that no result has covered yet, since the server
+    loses an unfinished utterance with the connection; on the next
+    connection the whole spool is sent again first. v1 results acknowledge
+    nothing, so there only unsent audio is kept.
+    """
+
+    def __init__(self, transport, role, url, coalesce_ms=SEND_COALESCE_MS, coalesce_bytes=SEND_COALESCE_BYTES,
+                 rate=48000, channels=2):
+        self.transport = transport
+        self.role = role
+        self.url = url
+        self.coalesce_ms = coalesce_ms
+        self.coalesce_bytes = coalesce_bytes
+
+        self.src_lang = "ja"
+        self.tgt_lang = "vi"
+        # Format of the chunks passed to submit()
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = 2
+
+        self.connection = None
+        self.running = False
+        self.audio_callback = None
+        self.transcript_callback = None
+
+        self.messages_sent = 0
+        self.bytes_sent = 0  # PCM payload, after any resampling
+        self.chunks_sent = 0
+        self.chunks_dropped = 0
+        self.chunks_spooled = 0
+        self.chunks_replayed = 0
+
+        self._queue = asyncio.Queue(SEND_QUEUE_SIZE)
+        self._seq = 0
+        self._sent_control = None  # (src_lang, tgt_lang) last sent as a v2 control message
+        self._dropped = False  # audio was dropped since the last chunk sent
+        self._uplink = (rate, channels)  # format declared on the current connection
+        self._downsampler = None
+        self._batch = []  # (pcm, stamp_ns, languages) taken off the queue by the sender, not sent yet
+        self._held = None  # queued chunk that starts the next batch (its languages differ)
+        self._spool = deque()  # [pcm, stamp_ns, sent], oldest first
+        self._spool_bytes = 0
+        self._spool_limit = int(SPOOL_SECONDS * self.rate * self.channels * self.sample_width)
+
+    @property
+    def connected(self):
+        connection = self.connection
+        return self.running and connection is not None and connection.connected
+
+    # Thread-safe entry points
+
+    def start(self):
+        self.transport.call_soon(self._start)
+
+    def stop(self):
+        """Send what is queued, then detach; returns a concurrent Future."""
+        return self.transport.run(self._stop())
+
+    def reconnect(self):
+        """Drop the current connection (every role on it); it reconnects on its own."""
+        self.transport.call_soon(self._reconnect)
+
+    def submit(self, pcm_bytes: bytes):
+        self.transport.call_soon(self._enqueue, pcm_bytes, time.monotonic_ns())
+
+    def update_language(self, src_lang: str, tgt_lang: str):
+        self.transport.call_soon(self._set_language, src_lang, tgt_lang)
+        print(f"[LANGUAGE UPDATE] Role: {self.role} Source: {src_lang} -> Target: {tgt_lang}")
+
+    # Loop side
+
+    def _start(self):
+        if self.running:
+            return
+        self.running = True
+        self.connection = self.transport.connection(self)
+        self.connection.attach(self)
+
+    async def _stop(self):
+        self.running = False
+        self._flush()
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            await connection.detach(self, self.coalesce_ms / 1000 + 1)
+        self._held = None
+        self._spool.clear()
+        self._spool_bytes = 0
+
+    def _reconnect(self):
+        if self.connection is not None:
+            self.connection.close_socket()
+
+    def _enqueue(self, pcm_bytes, stamp_ns):
+        if not self.running:
+            return
+        if not self.connected:
+            self.chunks_spooled += 1
+            self._spool_chunk(pcm_bytes, stamp_ns)
+            return
+        try:
+            # Tagged with the languages it was captured under, so a batch never spans a change
+            self._queue.put_nowait((pcm_bytes, stamp_ns, (self.src_lang, self.tgt_lang)))
+        except asyncio.QueueFull:
+            self.chunks_dropped += 1
+            if not self._dropped:
+                print("[WARN] Send queue full. Audio frames dropped.")
+            self._dropped = True
+
+    def _set_language(self, src_lang, tgt_lang):
+        self.src_lang = src_lang
+        self.tgt_lang = tgt_lang
+        # Audio queued so far belongs to the old languages; send it now. Only
+        # the timing depends on the flush marker getting in: _collect splits
+        # batches on the languages each chunk was queued with
+        self._flush()
+
+    def _spool_chunk(self, pcm_bytes, stamp_ns, sent=False):
+        self._spool.append([pcm_bytes, stamp_ns, sent])
+        self._spool_bytes += len(pcm_bytes)
+        while self._spool_bytes > self._spool_limit:
+            pcm, _, was_sent = self._spool.popleft()
+            self._spool_bytes -= len(pcm)
+            if not was_sent:
+                # Unsent audio fell out of the ring
+                self.chunks_dropped += 1
+                self._dropped = True
+
+    def _drop_sent(self):
+        self._spool = deque(entry for entry in self._spool if not entry[2])
+        self._spool_bytes = sum(len(entry[0]) for entry in self._spool)
+
+    def _acknowledge(self, speech_end_ts):
+        """A result covered our audio up to this v2 stamp (seconds); it needn't be replayed."""
+        # Compared in whole microseconds, the precision _send put on the wire
+        acked_us = round(speech_end_ts * 1e6)
+        while self._spool and self._spool[0][1] // 1000 <= acked_us:
+            pcm, _, _ = self._spool.popleft()
+            self._spool_bytes -= len(pcm)
+
+    def _on_disconnect(self):
+        # The batch being collected and the queue were never sent; they follow
+        # the sent audio in the spool, in order
+        for pcm, stamp, _ in self._batch:
+            self._spool_chunk(pcm, stamp)
+        self._batch = []
+        if self._held is not None:
+            self._spool_chunk(*self._held[:2])
+            self._held = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _FLUSH:
+                self._spool_chunk(*item[:2])
+
+    def _flush(self):
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except asyncio.QueueFull:
+            pass  # the sender is draining a full queue, not waiting to coalesce
+    async def _collect(self):
+        """Next batch: (pcm bytes, enqueue time in ns of the last chunk, chunk count, languages), or None."""
+        if self._held is not None:
+            item, self._held = self._held, None
+        else:
+            item = await self._queue.get()
+            if item is _FLUSH:
+                return None
+        pcm, stamp, languages = item
+        chunks = [pcm]
+        self._batch = [item]
+        size = len(pcm)
+        # The budget runs from when the oldest chunk was queued, so a backlog goes out at once
+        deadline = stamp / 1e9 + self.coalesce_ms / 1000
+        while size < self.coalesce_bytes:
+            if self._queue.empty():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if item is _FLUSH:
+                break
+            if item[2] != languages:
+                # Queued after a language change; it starts the next batch
+                self._held = item
+                break
+            pcm, stamp, _ = item
+            chunks.append(pcm)
+            self._batch.append(item)
+            size += len(pcm)
+        return b"".join(chunks) if len(chunks) > 1 else chunks[0], stamp, len(chunks), languages
+
+    def _negotiate_uplink(self, uplink_format):
+        """Pick what to send on a new connection; resampler state starts over with it."""
+        self._downsampler = None
+        if not uplink_format:
+            # Older servers read every role as 48 kHz stereo
+            self._uplink = (self.rate, 2)
+        elif UPLINK_RATE and self.rate % UPLINK_RATE == 0 and (self.rate, self.channels) != (UPLINK_RATE, 1):
+            self._downsampler = Downsampler(self.rate, UPLINK_RATE, self.channels, cutoff=UPLINK_CUTOFF)
+            self._uplink = (UPLINK_RATE, 1)
+        else:
+            self._uplink = (self.rate, self.channels)
+
+    async def _send_loop(self, ws, protocol, uplink_format=False):
+        self._sent_control = None  # a new socket hasn't seen our languages yet
+        self._negotiate_uplink(uplink_format)
+        if protocol != PROTOCOL_V2:
+            # Nothing acknowledges audio on v1; replaying what was sent would only repeat it
+            self._drop_sent()
+        if self._spool:
+            await self._replay(ws, protocol)
+        while True:
+            batch = await self._collect()
+            if batch is not None:
+                pcm_bytes, stamp_ns, n_chunks, (src_lang, tgt_lang) = batch
+                await self._send(ws, protocol, pcm_bytes, stamp_ns, src_lang, tgt_lang)
+                self.chunks_sent += n_chunks
+                self._batch = []
+                if protocol == PROTOCOL_V2:
+                    self._spool_chunk(pcm_bytes, stamp_ns, sent=True)
+            if not self.running:
+                return
+
+    async def _replay(self, ws, protocol):
+        """Send the spool again, oldest first, in messages of up to coalesce_bytes."""
+        chunks = list(self._spool)
+        seconds = self._spool_bytes / (self.rate * self.channels * self.sample_width)
+        print(f"[WebSocketPCMClient] Replaying {seconds:.1f}s of {self.role} audio")
+        pending, size = [], 0
+        for i, entry in enumerate(chunks):
+            pcm, stamp, _ = entry
+            pending.append(entry)
+            size += len(pcm)
+            if size >= self.coalesce_bytes or i == len(chunks) - 1:
+                # Original stamps, so the replay delay shows up as latency
+                await self._send(ws, protocol, b"".join(e[0] for e in pending), stamp, self.src_lang, self.tgt_lang)
+                for sent in pending:
+                    sent[2] = True
+                pending, size = [], 0
+        self.chunks_replayed += len(chunks)
+        if protocol != PROTOCOL_V2:
+            self._drop_sent()
+
+    async def _send(self, ws, protocol, pcm_bytes, stamp_ns, src_lang, tgt_lang):
+        rate, channels = self._uplink
+        if self._downsampler is not None:
+            pcm_bytes = self._downsampler.process(pcm_bytes).tobytes()
+        elif channels != self.channels:
+            pcm_bytes = np.repeat(np.frombuffer(pcm_bytes, dtype=np.int16), channels).tobytes()
+        if protocol == PROTOCOL_V2:
+            if (src_lang, tgt_lang) != self._sent_control:
+                await ws.send(control_message(
+                    self.role, src_lang, tgt_lang, "pcm_s16le",
+                    rate, channels, self.sample_width,
+                ))
+                self._sent_control = (src_lang, tgt_lang)
+            flags = FLAG_DISCONTINUITY if self._dropped else 0
+            self._dropped = False
+            # Stamped with the last chunk's capture time, so coalescing delay counts as latency
+            message = pack_v2(self.role, self._seq, stamp_ns // 1000, pcm_bytes, flags)
+            self._seq += 1
+        else:
+            message = pack_v1({
+                "sender": self.role,
+                "src_lang": src_lang,
+                "tgt_lang": tgt_lang,
+                "format": "pcm_s16le",
+                "rate": rate,
+                "channels": channels,
+                "sample_width": self.sample_width,
+                "timestamp": time.time(),
+            }, pcm_bytes)
+        await ws.send(message)
+        self.messages_sent += 1
+        self.bytes_sent += len(pcm_bytes)
+
+    def _dispatch_transcript(self, text, role, utterance_id=None, stable=None, partial=False, merged=()):
+        if self.transcript_callback:
+            self.transport.callbacks.submit(self._call, self.transcript_callback, "transcript", {
+                "text": text,
+                "sender": role,
+                "utterance_id": utterance_id,
+                # Partial: `stable` is settled, the rest of `text` may still change
+                "stable": text if stable is None else stable,
+                "partial": partial,
+                # Final: ids of earlier partial lines the server folded into this one
+                "merged": list(merged),
+            })
+
+    def _dispatch_audio(self, audio_bytes):
+        if self.audio_callback:
+            self.transport.callbacks.submit(self._call, self.audio_callback, "audio", audio_bytes)
+
+    @staticmethod
+    def _call(callback, kind, payload):
+        try:
+            callback(payload)
+        except Exception as e:
+            print(f"[CALLBACK ERROR - {kind}] {e}")